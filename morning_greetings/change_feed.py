@@ -0,0 +1,239 @@
+# change_feed.py
+
+"""
+Module to publish every change to the contacts as an ordered feed (change data capture).
+
+ContactsManager appends one JSON line per added, updated or removed contact (and one per
+cleared list) to a log file next to contacts.json, with a sequence number that grows by one
+for each change:
+
+    {"seq": 42, "at": 1706684400.0, "op": "update", "email": "alice@example.com",
+     "contact": {...}, "previous": {...}}
+
+Downstream consumers (CRM sync, analytics) remember the last sequence number they handled
+and only read what came after it, so a sync costs as much as the number of changes instead
+of re-reading the whole contact list. The log is only ever appended to, under the same kind
+of file lock as contacts.json, so several processes can write to it.
+"""
+
+import json
+import os
+import time
+
+from morning_greetings.file_lock import atomic_write, locked
+
+ADD = "add"
+UPDATE = "update"
+REMOVE = "remove"
+CLEAR = "clear"
+
+# Bytes read at a time when looking for the last line from the end of the file
+TAIL_BLOCK = 4096
+
+
+def feed_path(data_file):
+    """
+    Return the change feed file of a contacts file (contacts.json -> contacts.changes.jsonl).
+
+    Parameters:
+    data_file (str): The contacts file.
+
+    Returns:
+    str: The change feed file.
+    """
+    return f"{os.path.splitext(data_file)[0]}.changes.jsonl"
+
+
+def add_event(contact):
+    """Return the event of an added contact."""
+    return {'op': ADD, 'email': contact['email'], 'contact': contact}
+
+
+def update_event(previous, contact):
+    """Return the event of an updated contact (its email may have changed)."""
+    return {'op': UPDATE, 'email': contact['email'], 'contact': contact, 'previous': previous}
+
+
+def remove_event(contact):
+    """Return the event of a removed contact."""
+    return {'op': REMOVE, 'email': contact['email'], 'previous': contact}
+
+
+def clear_event(count):
+    """Return the event of a cleared contact list."""
+    return {'op': CLEAR, 'count': count}
+
+
+class ChangeFeed:
+    def __init__(self, path, clock=time.time):
+        """
+        Open (or create on the first change) a change feed.
+
+        Parameters:
+        path (str): The change feed file.
+        clock (callable): Function returning the current time in seconds.
+        """
+        self.path = path
+        self.clock = clock
+
+    def append(self, events):
+        """
+        Number the events and add them to the end of the feed.
+
+        Parameters:
+        events (list): The events (dicts with at least an 'op'), in the order they happened.
+
+        Returns:
+        int: The sequence number of the last event (0 if the feed is still empty).
+        """
+        with locked(self.path):
+            with open(self.path, "a+b") as file:
+                last = self._last_seq(file, truncate=True)
+                if not events:
+                    return last
+                at = self.clock()
+                lines = []
+                for event in events:
+                    last += 1
+                    lines.append(json.dumps({'seq': last, 'at': at, **event}))
+                # One write for the whole batch, so readers never see half of it
+                file.write(("\n".join(lines) + "\n").encode())
+                file.flush()
+                os.fsync(file.fileno())
+                return last
+
+    def _last_seq(self, file, truncate=False):
+        """
+        Return the sequence number of the last complete line. A torn last line left by a
+        writer that crashed is ignored, or cut off the file with truncate (the caller then
+        holds the lock).
+        """
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        tail = b""
+        # Read blocks backwards until the last two newlines (or the start of the file) are found
+        while position > 0 and tail.count(b"\n") < 2:
+            block = min(TAIL_BLOCK, position)
+            position -= block
+            file.seek(position)
+            tail = file.read(block) + tail
+        if tail and not tail.endswith(b"\n"):
+            # A torn line: only the writer cuts the file back to the end of the last complete line
+            cut = tail.rfind(b"\n") + 1
+            if truncate:
+                file.truncate(position + cut)
+            tail = tail[:cut]
+        lines = tail.splitlines()
+        return json.loads(lines[-1])['seq'] if lines else 0
+
+    def last_seq(self):
+        """
+        Return the sequence number of the latest change.
+
+        Returns:
+        int: The sequence number (0 if there are no changes yet).
+        """
+        if not os.path.exists(self.path):
+            return 0
+        # Read-only: a line still being appended is not complete yet, so it is ignored
+        with open(self.path, "rb") as file:
+            return self._last_seq(file)
+
+    def _line_start(self, file, offset):
+        """
+        Find the first line starting at or after a byte offset.
+
+        Returns:
+        tuple: (start of the line, its sequence number), or (None, None) at the end of the file.
+        """
+        if offset:
+            # Skip the rest of the line the offset falls into
+            file.seek(offset - 1)
+            file.readline()
+        else:
+            file.seek(0)
+        start = file.tell()
+        line = file.readline()
+        if not line.endswith(b"\n"):  # End of the file (or a line still being written)
+            return None, None
+        return start, json.loads(line)['seq']
+
+    def read(self, after=0, limit=None):
+        """
+        Read the changes made after a sequence number.
+
+        The lines are sorted by sequence number, so the first change to return is found with
+        a binary search on the file and only the changes after it are read.
+
+        Parameters:
+        after (int): The last sequence number the consumer has handled (0 for everything).
+        limit (int): The maximum number of changes to return (optional).
+
+        Returns:
+        list: The change events, oldest first.
+        """
+        if not os.path.exists(self.path):
+            return []
+        events = []
+        with open(self.path, "rb") as file:
+            low, high = 0, file.seek(0, os.SEEK_END)
+            # Smallest offset whose next line is past "after"
+            while low < high:
+                middle = (low + high) // 2
+                _, seq = self._line_start(file, middle)
+                if seq is None or seq > after:
+                    high = middle
+                else:
+                    low = middle + 1
+            start, _ = self._line_start(file, low)
+            if start is None:
+                return events
+            file.seek(start)
+            for line in file:
+                if not line.endswith(b"\n") or (limit is not None and len(events) >= limit):
+                    break
+                events.append(json.loads(line))
+        return events
+
+
+class FeedConsumer:
+    def __init__(self, feed, cursor_file):
+        """
+        Initialize a consumer that remembers how far it has read.
+
+        Parameters:
+        feed (ChangeFeed): The feed to read.
+        cursor_file (str): The file holding the last sequence number the consumer handled.
+        """
+        self.feed = feed
+        self.cursor_file = cursor_file
+
+    @property
+    def position(self):
+        """The last sequence number handled (0 before the first commit)."""
+        try:
+            with open(self.cursor_file) as file:
+                return int(file.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def poll(self, limit=None):
+        """
+        Read the changes not handled yet (call commit once they are handled).
+
+        Parameters:
+        limit (int): The maximum number of changes to return (optional).
+
+        Returns:
+        list: The change events, oldest first.
+        """
+        return self.feed.read(self.position, limit)
+
+    def commit(self, seq):
+        """
+        Remember that the changes up to a sequence number are handled.
+
+        Parameters:
+        seq (int): The sequence number of the last handled change.
+        """
+        atomic_write(self.cursor_file, f"{seq}\n")
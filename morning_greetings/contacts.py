@@ -5,14 +5,41 @@ Managing a list of friends. It allows adding, removing, and retrieving friends
 (name, preferred greeting time, and contact information).
 """
 
+import logging  # Import logging to report what happened to the contacts
 import re  # Import regular expression module for email validation
+import threading  # Import threading to protect the contact list in thread-safe mode
+from contextlib import nullcontext
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError  # Import zoneinfo to validate time zones
+
+from morning_greetings.email_canonicalizer import canonicalize_email  # Import to detect variants of the same email
+from morning_greetings.name_index import NameIndex  # Import to find contacts by (partial or misspelled) name
+
+logger = logging.getLogger(__name__)
 
 class Contacts:
-    def __init__(self):
+    def __init__(self, thread_safe=False):
+        """
+        Initialize an empty contact list.
+
+        Parameters:
+        thread_safe (bool): Serialize writers from several threads with a lock. Snapshots
+                            are immutable in both modes (contacts are copied, never edited
+                            in place), so a reader can always iterate a snapshot while the
+                            contacts are being edited.
+        """
         # Initialize an empty list to store contact information
         self.contacts = []
-
-    def add_contact(self, name, email, preferred_time="08:00 AM"):
+        self.thread_safe = thread_safe
+        # Writers take this lock; readers never do (except to rebuild a stale snapshot)
+        self._write_lock = threading.Lock() if thread_safe else nullcontext()
+        # Immutable copy of the contact list, rebuilt lazily after each change
+        self._snapshot = None
+        # Number of contacts per canonical email, to find duplicates without scanning the list
+        self._emails = {}
+        # Search index of the contact names
+        self._names = NameIndex()
+
+    def add_contact(self, name, email, preferred_time="08:00 AM", time_zone=None):
         """
         Add a new contact to the contact list.
 
@@ -20,6 +47,57 @@ class Contacts:
         name (str): The name of the contact.
         email (str): The contact's email or phone number.
         preferred_time (str): The preferred time for greeting the contact.
+        time_zone (str): The contact's time zone, e.g. "Europe/Oslo" (optional, defaults to the local time zone).
+
+        Returns:
+        dict or None: The added contact, or None if it was not added.
+        """
+        contact = self._new_contact(name, email, preferred_time, time_zone)
+        if contact is None:
+            return
+
+        with self._write_lock:
+            # Check if the email (or a variant of it, e.g. with a +tag) already exists to prevent duplicates
+            if canonicalize_email(contact['email']) in self._emails:
+                logger.warning("Contact with email %s already exists. Cannot add '%s'.", contact['email'], contact['name'])
+                return
+
+            # Add the new contact to the contacts list
+            self.contacts.append(contact)
+            self._index_add(contact)
+            self._snapshot = None
+        logger.info("Contact added: %s with email %s", contact['name'], contact['email'])
+        return contact
+
+    def load_contacts(self, records):
+        """
+        Replace the contact list by stored contact records (e.g. read from contacts.json).
+
+        Every record is normalized and validated like a new contact, but contacts sharing a
+        mailbox (e.g. "johndoe@gmail.com" and "john.doe+news@gmail.com") are all kept, so
+        that deduplicate() can merge them and report what it merged.
+
+        Parameters:
+        records (iterable): The contact dictionaries.
+
+        Returns:
+        int: The number of contacts whose mailbox is shared with another contact.
+        """
+        contacts = []
+        for record in records:
+            contact = self._new_contact(record['name'], record['email'], record['preferred_time'],
+                                        record.get('time_zone'))
+            if contact is not None:
+                contacts.append(contact)
+        self.set_contacts(contacts)
+        return len(contacts) - len(self._emails)
+
+    def _new_contact(self, name, email, preferred_time="08:00 AM", time_zone=None):
+        """
+        Normalize and validate the fields of a contact.
+
+        Returns:
+        dict or None: The contact, or None if a field is invalid.
         """
         # Normalize inputs
         name = name.strip().title()  # Normalize name
@@ -28,18 +106,20 @@ class Contacts:
 
         # Validate the email format before adding the contact
         if not self._is_valid_email(email):
-            print(f"Invalid email format: {email}")
+            logger.warning("Invalid email format: %s", email)
             return
 
         # Validate the time format
         if not self._is_valid_time_format(preferred_time):
-            print(f"Invalid time format: {preferred_time}. Please use 'HH:MM AM/PM'.")
+            logger.warning("Invalid time format: %s. Please use 'HH:MM AM/PM'.", preferred_time)
             return
 
-        # Check if the email already exists in the contact list to prevent duplicates
-        if any(c['email'] == email for c in self.contacts):
-            print(f"Contact with email {email} already exists. Cannot add '{name}'.")
-            return
+        # Validate the time zone (if one is given)
+        if time_zone:
+            time_zone = time_zone.strip()
+            if not self._is_valid_time_zone(time_zone):
+                logger.warning("Invalid time zone: %s. Please use a name like 'Europe/Oslo'.", time_zone)
+                return
 
         # Create a contact dictionary with name, email, and preferred time
         contact = {
@@ -47,10 +127,10 @@ class Contacts:
             'email': email,
             'preferred_time': preferred_time
         }
-        
-        # Add the new contact to the contacts list
-        self.contacts.append(contact)
-        print(f"Contact added: {name} with email {email}")
+        # The time zone is only stored when it is set, contacts without one use the local time zone
+        if time_zone:
+            contact['time_zone'] = time_zone
+        return contact
 
     def remove_contact(self, name):
         """
@@ -58,19 +138,26 @@ class Contacts:
 
         Parameters:
         name (str): The name of the contact to remove.
+
+        Returns:
+        dict or None: The removed contact, or None if no contact was removed.
         """
         normalized_name = name.strip().title()  # Normalize the name for search by removing leading/trailing spaces and capitalizing each word
-        matching_contacts = [c for c in self.contacts if c['name'] == normalized_name] # Find contacts that match the given name
+        matching_contacts = self._names.exact(normalized_name) # Find contacts that match the given name
 
-        # If no matching contact is found, display a message and exit
+        # If no contact has exactly this name, offer the closest names instead
         if not matching_contacts:
-            print(f"Contact not found: {normalized_name}")
-            return
+            selected_contact = self._suggest(normalized_name, "remove")
+            if selected_contact is not None:
+                self._remove(selected_contact)
+                logger.info("Removed contact: %s", selected_contact['name'])
+            return selected_contact
 
         # If only one matching contact is found, remove it
         if len(matching_contacts) == 1:
-            self.contacts.remove(matching_contacts[0])
-            print(f"Removed contact: {normalized_name}")
+            self._remove(matching_contacts[0])
+            logger.info("Removed contact: %s", normalized_name)
+            return matching_contacts[0]
         else:
             # If multiple contacts match the name, display them to the user
             print(f"Multiple contacts found for name '{normalized_name}':")
@@ -81,10 +168,11 @@ class Contacts:
             if choice is not None:
                 # Remove the selected contact based on user input
                 selected_contact = matching_contacts[choice - 1]
-                self.contacts.remove(selected_contact)
-                print(f"Removed contact with email: {selected_contact['email']}")
+                self._remove(selected_contact)
+                logger.info("Removed contact with email: %s", selected_contact['email'])
+                return selected_contact
 
-    def update_contact(self, name, new_email=None, new_preferred_time=None):
+    def update_contact(self, name, new_email=None, new_preferred_time=None, new_time_zone=None):
         """
         Update an existing contact's information.
 
@@ -92,42 +180,56 @@ class Contacts:
         name (str): The name of the contact to update.
         new_email (str): The new email of the contact (optional).
         new_preferred_time (str): The new preferred greeting time (optional).
+        new_time_zone (str): The new time zone of the contact (optional, not prompted for).
+
+        Returns:
+        tuple or None: (contact before the update, contact after the update), or None if no contact was updated.
         """ 
         normalized_name = name.strip().title()  # Normalize the name for search
         # Find contacts that match the given name
-        matching_contacts = [c for c in self.contacts if c['name'] == normalized_name]
+        matching_contacts = self._names.exact(normalized_name)
 
-        # If no matching contact is found, display a message and exit
+        # If no contact has exactly this name, offer the closest names instead
         if not matching_contacts:
-            print(f"Contact not found: {normalized_name}")
-            return
+            contact = self._suggest(normalized_name, "update")
+            if contact is None:
+                return
 
         # If multiple contacts match the name, let the user choose which one to update
-        if len(matching_contacts) > 1:
+        elif len(matching_contacts) > 1:
             print(f"Multiple contacts found for name '{normalized_name}':")
             self._display_contacts(matching_contacts)
-            contact_index = self._get_user_choice(len(matching_contacts), "update") - 1
-            if contact_index is None:
+            choice = self._get_user_choice(len(matching_contacts), "update")
+            if choice is None:
                 return # Exit if invalid choice
-            contact = matching_contacts[contact_index]
+            contact = matching_contacts[choice - 1]
         else:
             # If only one contact matches, proceed with the update
             contact = matching_contacts[0]
 
+        # Edit a copy so that snapshots being read never see a half-updated contact
+        original = contact
+        contact = dict(contact)
+
         # Update the email if a new one is provided or ask the user for a new email
         if new_email:
             new_email = new_email.strip().lower()  # Normalize the new email
-            if self._is_valid_email(new_email):
-                contact['email'] = new_email
+            if not self._is_valid_email(new_email):
+                logger.warning("Invalid email format: %s. Keeping the old one.", new_email)
+            elif self._is_taken(new_email, original['email']):
+                logger.warning("Contact with email %s already exists. Keeping the old one.", new_email)
             else:
-                print(f"Invalid email format: {new_email}. Keeping the old one.")
+                contact['email'] = new_email
         
         else:
             new_email = input("Enter the new email address (or press Enter to skip): ").strip().lower()
             if new_email and self._is_valid_email(new_email):
-                contact['email'] = new_email
+                if self._is_taken(new_email, original['email']):
+                    logger.warning("Contact with email %s already exists. Keeping the old one.", new_email)
+                else:
+                    contact['email'] = new_email
             if not self._is_valid_email(new_email):
-                print("New email address is not valid. Keeping the old one.")
+                logger.warning("New email address is not valid. Keeping the old one.")
 
         # Update the preferred time if a new one is provided or ask the user for a new preferred time
         if new_preferred_time:
@@ -135,13 +237,92 @@ class Contacts:
             if self._is_valid_time_format(new_preferred_time):
                 contact['preferred_time'] = new_preferred_time
             else:
-                print(f"Invalid time format: {new_preferred_time}. Please use 'HH:MM AM/PM'.")
+                logger.warning("Invalid time format: %s. Please use 'HH:MM AM/PM'.", new_preferred_time)
         else:
             new_preferred_time = input("Enter the new preferred time (or press Enter to skip): ").strip().upper()
             if new_preferred_time and self._is_valid_time_format(new_preferred_time):
                 contact['preferred_time'] = new_preferred_time
 
-        print(f"Updated contact: {contact['name']} to email: {contact['email']} and preferred time: {contact['preferred_time']}")
+        # Update the time zone if a new one is provided
+        if new_time_zone:
+            new_time_zone = new_time_zone.strip()
+            if self._is_valid_time_zone(new_time_zone):
+                contact['time_zone'] = new_time_zone
+            else:
+                logger.warning("Invalid time zone: %s. Keeping the old one.", new_time_zone)
+
+        if not self._replace(original, contact):
+            logger.warning("Contact %s was changed or removed in the meantime. No contact updated.", original['name'])
+            return
+
+        logger.info("Updated contact: %s to email: %s and preferred time: %s",
+                    contact['name'], contact['email'], contact['preferred_time'])
+        return original, contact
+
+    def _remove(self, contact):
+        """
+        Remove a contact dictionary from the list.
+
+        Parameters:
+        contact (dict): The contact to remove.
+        """
+        with self._write_lock:
+            if contact in self.contacts:
+                self.contacts.remove(contact)
+                self._index_remove(contact)
+                self._snapshot = None
+
+    def _replace(self, old_contact, new_contact):
+        """
+        Replace a contact dictionary in the list by an updated copy.
+
+        Parameters:
+        old_contact (dict): The contact currently in the list.
+        new_contact (dict): The updated contact.
+
+        Returns:
+        bool: True if the contact was replaced, False if it is no longer in the list
+              (another writer changed or removed it).
+        """
+        with self._write_lock:
+            for i, contact in enumerate(self.contacts):
+                if contact is old_contact:
+                    self.contacts[i] = new_contact
+                    self._index_remove(old_contact)
+                    self._index_add(new_contact)
+                    self._snapshot = None
+                    return True
+        return False
+
+    def _index_add(self, contact):
+        """Count a contact's canonical email in the duplicate index."""
+        canonical = canonicalize_email(contact['email'])
+        self._emails[canonical] = self._emails.get(canonical, 0) + 1
+        self._names.add(contact)
+
+    def _index_remove(self, contact):
+        """Stop counting a contact's canonical email in the duplicate index."""
+        self._names.remove(contact)
+        canonical = canonicalize_email(contact['email'])
+        count = self._emails.get(canonical, 0)
+        if count <= 1:
+            self._emails.pop(canonical, None)
+        else:
+            self._emails[canonical] = count - 1
+
+    def _is_taken(self, email, own_email):
+        """
+        Check whether an email (or a variant of it) belongs to another contact.
+
+        Parameters:
+        email (str): The email to check.
+        own_email (str): The current email of the contact being edited.
+
+        Returns:
+        bool: True if another contact already uses the email.
+        """
+        canonical = canonicalize_email(email)
+        return canonical in self._emails and canonical != canonicalize_email(own_email)
 
     def _get_user_choice(self, num_choices, action):
         """
@@ -165,6 +346,27 @@ class Contacts:
             print("Invalid input. Please enter a number.")
         return None
 
+    def _suggest(self, name, action):
+        """
+        Offer the contacts with the closest names when no contact has exactly the given name.
+
+        Parameters:
+        name (str): The name that was not found.
+        action (str): The action being performed (e.g., 'update', 'remove').
+
+        Returns:
+        dict or None: The contact chosen by the user, or None.
+        """
+        candidates = self._names.search(name)
+        if not candidates:
+            logger.warning("Contact not found: %s", name)
+            return None
+
+        print(f"Contact '{name}' not found. Did you mean:")
+        self._display_contacts(candidates)
+        choice = self._get_user_choice(len(candidates), action)
+        return candidates[choice - 1] if choice is not None else None
+
     def _display_contacts(self, contacts):
         """
         Display a list of contacts with details (used for multi-contact selection).
@@ -173,7 +375,7 @@ class Contacts:
         contacts (list): A list of contact dictionaries to display.
         """
         for i, contact in enumerate(contacts, 1):
-            print(f"{i}. Email: {contact['email']}, Preferred Time: {contact['preferred_time']}")
+            print(f"{i}. Name: {contact['name']}, Email: {contact['email']}, Preferred Time: {contact['preferred_time']}")
 
     def _is_valid_email(self, email):
         """
@@ -203,6 +405,22 @@ class Contacts:
         time_regex = r"^(0[1-9]|1[0-2]):[0-5][0-9] (AM|PM)$"
         return re.match(time_regex, time_str) is not None
 
+    def _is_valid_time_zone(self, time_zone):
+        """
+        Validate a time zone name (e.g., Europe/Oslo or America/New_York).
+
+        Parameters:
+        time_zone (str): The time zone name to validate.
+
+        Returns:
+        bool: True if the time zone is known, False otherwise.
+        """
+        try:
+            ZoneInfo(time_zone)
+        except (ZoneInfoNotFoundError, ValueError):
+            return False
+        return True
+
     def get_contacts(self):
         """
         Retrieve all contacts.
@@ -212,9 +430,70 @@ class Contacts:
         """
         return self.contacts
 
+    def snapshot(self):
+        """
+        Retrieve an immutable snapshot of all contacts.
+
+        The snapshot is not affected by later changes to the contact list, so it can be
+        iterated (e.g. by a sender thread) while contacts are being edited.
+
+        Returns:
+        tuple: The contacts at the time of the call.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._write_lock:
+                if self._snapshot is None:
+                    self._snapshot = tuple(self.contacts)
+                snapshot = self._snapshot
+        return snapshot
+
+    def set_contacts(self, contacts):
+        """
+        Replace the whole contact list (e.g. after reloading it from disk).
+
+        Parameters:
+        contacts (list): The new list of contact dictionaries.
+        """
+        with self._write_lock:
+            self._set(contacts)
+
+    def apply(self, change):
+        """
+        Replace the whole contact list by a new list computed from it (e.g. merged with the
+        contacts stored on disk), with no other writer changing the list in between.
+
+        Parameters:
+        change (callable): Takes the current list of contacts and returns the new list.
+
+        Returns:
+        bool: True if the contact list changed, False otherwise.
+        """
+        with self._write_lock:
+            current = self.contacts
+            contacts = change(current)
+            if contacts == current:
+                return False
+            self._set(contacts)
+            return True
+
+    def _set(self, contacts):
+        """Replace the contact list and rebuild the indexes (the caller holds the write lock)."""
+        self.contacts = list(contacts)
+        self._emails = {}
+        for contact in self.contacts:
+            canonical = canonicalize_email(contact['email'])
+            self._emails[canonical] = self._emails.get(canonical, 0) + 1
+        self._names.rebuild(self.contacts)
+        self._snapshot = None
+
     def clear_contacts(self):
         """
         Clear all contacts from the list.
         """
-        self.contacts = []
-        print("Cleared all contacts.")
\ No newline at end of file
+        with self._write_lock:
+            self.contacts = []
+            self._emails = {}
+            self._names.clear()
+            self._snapshot = None
+        logger.info("Cleared all contacts.")
\ No newline at end of file
@@ -8,32 +8,66 @@ Contacts class (presumed to be defined in the contacts.py file).
 """
 
 import json
+import logging
 import os
+import threading
+from morning_greetings.change_feed import ChangeFeed, add_event, clear_event, feed_path, remove_event, update_event
 from morning_greetings.contacts import Contacts
+from morning_greetings.email_canonicalizer import canonicalize_email, deduplicate
+from morning_greetings.file_lock import atomic_write, file_signature, locked
+from morning_greetings.message_generator import render_cache
+from morning_greetings.metrics import metrics
+from morning_greetings.output import summary
+
+logger = logging.getLogger(__name__)
 
 
 # Run this module as a single file?:
 # from contacts import Contacts
 
+def data_path(data_file="contacts.json"):
+    """
+    Return the full path of a data file (relative names are located in the morning_greetings module).
+
+    Parameters:
+    data_file (str): The name of the data file.
+
+    Returns:
+    str: The full path.
+    """
+    return os.path.join(os.path.dirname(__file__), data_file)
+
+
 class ContactsManager:
-    def __init__(self, data_file="contacts.json"):
+    def __init__(self, data_file="contacts.json", thread_safe=False, change_feed=True):
         """
         Initialize ContactsManager with the JSON file located in the morning_greetings module.
 
         Parameters:
         data_file (str): The name of the file where contact data is stored.
+        thread_safe (bool): Allow the contacts to be read from other threads while they are edited.
+        change_feed (bool): Append every change to the change feed next to the data file.
         """
-        # Get the directory where this module is located
-        module_dir = os.path.dirname(__file__)
         # Set the full path of the data file where contacts will be stored
-        self.data_file = os.path.join(module_dir, data_file)
+        self.data_file = data_path(data_file)
+        # Ordered feed of the changes made through this manager (see change_feed.py)
+        self.change_feed = ChangeFeed(feed_path(self.data_file)) if change_feed else None
+        # Change events waiting to be written by the next successful save
+        self._changes = []
         # Create an instance of the Contacts class
-        self.contacts = Contacts()
+        self.contacts = Contacts(thread_safe=thread_safe)
+        # Contacts as they were on disk at the last load/save (keyed by email), and the
+        # signature of the file at that moment. Used to detect and merge changes made
+        # by other processes sharing the same data file.
+        self._synced = {}
+        self._signature = None
+        # Serializes load/save/refresh between threads of this process
+        self._sync_lock = threading.RLock()
 
         # Load existing contacts from the data file during initialization
         self.load_data()
 
-    def add_contact(self, name, email, preferred_time="08:00 AM"):
+    def add_contact(self, name, email, preferred_time="08:00 AM", time_zone=None):
         """
         Add a new contact to the contacts list.
 
@@ -41,10 +75,14 @@ class ContactsManager:
         name (str): The name of the contact.
         email (str): The email address of the contact.
         preferred_time (str): The preferred time for greeting the contact.
+        time_zone (str): The contact's time zone, e.g. "Europe/Oslo" (optional).
         """
-    
+        # Pick up changes made by other processes first
+        self.refresh()
         # Add the new contact to the list of contacts (if it doesn't already exist)
-        self.contacts.add_contact(name, email, preferred_time)
+        contact = self.contacts.add_contact(name, email, preferred_time, time_zone)
+        if contact:
+            self._record(add_event(contact))
         # Save the updated contacts list to the data file
         self.save_contacts()
 
@@ -55,12 +93,16 @@ class ContactsManager:
         Parameters:
         name (str): The name of the contact to be removed.
         """
+        # Pick up changes made by other processes first
+        self.refresh()
         # Remove the contact from the list of contacts
-        self.contacts.remove_contact(name)
+        contact = self.contacts.remove_contact(name)
+        if contact:
+            self._record(remove_event(contact))
         # Save the updated contacts list to the data file
         self.save_contacts()
 
-    def update_contact(self, name=None, new_email=None, new_preferred_time=None):
+    def update_contact(self, name=None, new_email=None, new_preferred_time=None, new_time_zone=None):
         """
         Update contact information.
 
@@ -68,13 +110,16 @@ class ContactsManager:
         name (str): Name of the contact to be updated.
         new_email (str): New email of the contact.
         new_preferred_time (str): New preferred time for the contact.
+        new_time_zone (str): New time zone for the contact.
         """
+        # Pick up changes made by other processes first
+        self.refresh()
         # Get the current list of contacts
         contacts_list = self.contacts.get_contacts()  # Get contacts from the Contacts instance
 
         # If the contacts list is empty, print a message and exit
         if len(contacts_list) == 0:  # Check if contacts list is empty
-            print("There are no contacts to update. The contact list is empty.")
+            logger.warning("There are no contacts to update. The contact list is empty.")
             return 
         
         if name == None: 
@@ -82,7 +127,13 @@ class ContactsManager:
             name = input("Enter the name of the contact to update: ")
         
         # Update the contact information (email, preferred time)
-        self.contacts.update_contact(name, new_email, new_preferred_time)
+        updated = self.contacts.update_contact(name, new_email, new_preferred_time, new_time_zone)
+        # An update that kept every field as it was is not a change
+        if updated and updated[0] != updated[1]:
+            # Only the edited contact's cached message is dropped (under its old and new email)
+            for contact in updated:
+                render_cache.invalidate(contact['email'])
+            self._record(update_event(*updated))
         # Save the updated contacts list to the data file
         self.save_contacts()
 
@@ -90,8 +141,8 @@ class ContactsManager:
         """
         Print the list of all contacts with their details.
         """
-        # Retrieve all contacts
-        contacts = self.contacts.get_contacts()
+        # Retrieve all contacts (including changes made by other processes)
+        contacts = self.get_contacts()
         # If no contacts are available, print a message and exit
         if not contacts:
             print("No contacts available.")
@@ -99,7 +150,8 @@ class ContactsManager:
 
         # Loop through each contact and print the details (name, email, preferred time)
         for contact in contacts:
-            print(f"Name: {contact['name']}, Email: {contact['email']}, Preferred Time: {contact['preferred_time']}")
+            print(f"Name: {contact['name']}, Email: {contact['email']}, Preferred Time: {contact['preferred_time']}"
+                  f"{', Time Zone: ' + contact['time_zone'] if contact.get('time_zone') else ''}")
 
     def get_contacts(self):
         """
@@ -108,61 +160,269 @@ class ContactsManager:
         Returns:
         list: List of all contacts.
         """
+        # Pick up changes made by other processes first
+        self.refresh()
         # Return the list of contacts from the Contacts class instance
         return self.contacts.get_contacts()  # Get contacts from the Contacts instance
+
+    def snapshot(self):
+        """
+        Retrieve an immutable snapshot of all contacts, safe to iterate while contacts are edited.
+
+        Returns:
+        tuple: The contacts at the time of the call.
+        """
+        # Pick up changes made by other processes first
+        self.refresh()
+        return self.contacts.snapshot()
     
     def clear_contacts(self):
         """
         Clear all contacts from the list and save the changes.
         """
+        # Pick up changes made by other processes first
+        self.refresh()
         # Clear all contacts from the Contacts class instance
+        count = len(self.contacts.get_contacts())
         self.contacts.clear_contacts()
+        if count:
+            self._record(clear_event(count))
         # Save the empty contact list to the data file
         self.save_contacts()
 
+    def deduplicate(self):
+        """
+        Remove contacts whose email is a variant of another contact's email
+        (e.g. "john.doe+news@gmail.com" and "johndoe@gmail.com") and save the changes.
+
+        Returns:
+        dict: The merges, {domain: {kept email: [removed emails]}}.
+        """
+        # Pick up changes made by other processes first
+        self.refresh()
+        merges = {}
+
+        def drop_duplicates(contacts):
+            # Runs under the contacts' write lock, so no contact added meanwhile is dropped
+            kept, found = deduplicate(contacts)
+            merges.update(found)
+            # Every contact that was not kept is published as removed
+            kept_ids = {id(contact) for contact in kept}
+            self._record(*(remove_event(contact) for contact in contacts if id(contact) not in kept_ids))
+            return kept
+
+        self.contacts.apply(drop_duplicates)
+        if not merges:
+            summary.info("No duplicate contacts found.")
+            return merges
+
+        for domain, domain_merges in sorted(merges.items()):
+            removed = sum(len(emails) for emails in domain_merges.values())
+            summary.info("%s: removed %d duplicate(s) of %d contact(s)", domain, removed, len(domain_merges))
+            for email, emails in domain_merges.items():
+                # Dropped contacts no longer need their cached message
+                for duplicate in emails:
+                    render_cache.invalidate(duplicate)
+                logger.info("  kept %s, removed %s", email, ", ".join(emails))
+        self.save_contacts()
+        return merges
+
+    def restore_contacts(self, contacts):
+        """
+        Add recovered contacts that are missing from the list (e.g. after contacts.json was
+        partly lost) and save the changes. Contacts already in the list are left unchanged.
+
+        Parameters:
+        contacts (iterable): The recovered contacts.
+
+        Returns:
+        int: The number of contacts added.
+        """
+        # Pick up changes made by other processes first
+        self.refresh()
+        known = {canonicalize_email(contact['email']) for contact in self.contacts.get_contacts()}
+        before = len(self.contacts.get_contacts())
+        for contact in contacts:
+            if canonicalize_email(contact['email']) not in known:
+                added_contact = self.contacts.add_contact(contact['name'], contact['email'],
+                                                          contact['preferred_time'], contact.get('time_zone'))
+                if added_contact:
+                    self._record(add_event(added_contact))
+        added = len(self.contacts.get_contacts()) - before
+        if added:
+            self.save_contacts()
+        summary.info("Restored %d missing contact(s).", added)
+        return added
+
+    def _record(self, *events):
+        """
+        Queue change events; they are appended to the change feed by the next successful save.
+
+        Parameters:
+        events (dict): The change events.
+        """
+        if self.change_feed is not None:
+            self._changes.extend(events)
+
     def save_contacts(self):
-         """
-         Save the current contacts to the data file in JSON format.
-         """
-         try:
-            # Combine existing contacts into a dictionary where the key is the email
-            all_contacts = {contact['email']: contact for contact in self.contacts.get_contacts()}
+        """
+        Save the current contacts to the data file in JSON format.
 
-            # Save all contacts back to the file in JSON format
-            with open(self.data_file, 'w') as file:
-                json.dump(list(all_contacts.values()), file, indent=4)
+        The file is locked while saving. If another process changed the file since it was
+        last read, our changes are merged on top of theirs instead of overwriting them, and
+        the file is replaced atomically so readers never see a partially written file.
+        """
+        try:
+            with self._sync_lock, locked(self.data_file):
+                # Merge with the file if another process has written to it in the meantime. The
+                # merge runs under the contacts' write lock, so an edit made by another thread of
+                # this process cannot slip in between reading the list and replacing it.
+                signature = file_signature(self.data_file)
+                if signature != self._signature:
+                    remote_contacts = self._read_file()
+                    self.contacts.apply(lambda current: self._merge(self._synced, current, remote_contacts))
+                contacts = self.contacts.snapshot()
 
-            print(f"Contacts saved to {self.data_file}")
+                # Combine existing contacts into a dictionary where the key is the email
+                all_contacts = {contact['email']: contact for contact in contacts}
 
-         except Exception as e:
+                # Save all contacts back to the file in JSON format
+                atomic_write(self.data_file, json.dumps(list(all_contacts.values()), indent=4))
+                self._remember(all_contacts.values(), file_signature(self.data_file))
+
+                # Publish our changes while the file is still locked, so the feed has them in
+                # the same order as the saves of all processes
+                if self._changes:
+                    self.change_feed.append(self._changes)
+                    self._changes = []
+
+            logger.info("Contacts saved to %s", self.data_file)
+
+        except Exception as e:
             # Handle any error that occurs while saving the contacts
-            print(f"Error saving contacts: {e}")
+            logger.error("Error saving contacts: %s", e)
+
+    def refresh(self):
+        """
+        Reload the contacts if another process has changed the data file.
+
+        Only a stat() call is made when nothing has changed. Otherwise the changes made by
+        the other process are merged into the contacts held in memory.
+
+        Returns:
+        bool: True if the contacts were changed by the reload, False otherwise.
+        """
+        signature = file_signature(self.data_file)
+        if signature == self._signature:
+            return False  # Nothing changed since the last load/save
+
+        with self._sync_lock:
+            try:
+                with locked(self.data_file, shared=True):
+                    signature = file_signature(self.data_file)
+                    remote_contacts = self._read_file()
+            except Exception as e:
+                # Handle any error that occurs while reloading the contacts
+                logger.error("Error reloading contacts: %s", e)
+                return False
+
+            # Merge under the contacts' write lock (see save_contacts)
+            base = self._synced
+            changed = self.contacts.apply(lambda current: self._merge(base, current, remote_contacts))
+            self._remember(remote_contacts, signature)
+            return changed
+
+    def _read_file(self):
+        """
+        Read the contacts stored in the data file.
+
+        Returns:
+        list: The list of contact dictionaries (empty if the file is missing or empty).
+        """
+        if not os.path.exists(self.data_file) or os.stat(self.data_file).st_size == 0:
+            return []
+        with open(self.data_file, 'r') as file:
+            return json.load(file)
+
+    def _remember(self, contacts, signature):
+        """
+        Remember the contacts as they are on disk, to detect later changes.
+
+        Parameters:
+        contacts (iterable): The contacts currently stored in the data file.
+        signature (tuple): The signature of the data file.
+        """
+        self._synced = {contact['email']: dict(contact) for contact in contacts}
+        self._signature = signature
+
+    @staticmethod
+    def _merge(base, local, remote):
+        """
+        Apply the local changes (local compared to base) on top of the remote contacts.
+
+        Contacts are identified by email, so changes to different contacts never conflict.
+        If both sides changed the same contact, the local change wins.
+
+        Parameters:
+        base (dict): The contacts (keyed by email) as they were when last synchronized.
+        local (list): The contacts held in memory.
+        remote (list): The contacts currently stored in the data file.
+
+        Returns:
+        list: The merged list of contacts.
+        """
+        merged = {contact['email']: contact for contact in remote}
+        local_by_email = {contact['email']: contact for contact in local}
+
+        # Contacts removed locally
+        for email in base:
+            if email not in local_by_email:
+                merged.pop(email, None)
+
+        # Contacts added or changed locally
+        for email, contact in local_by_email.items():
+            if base.get(email) != contact:
+                merged[email] = contact
+
+        return list(merged.values())
     
     def load_data(self):
         """
         Load existing contacts from the data file.
         """
         try:
-            # Check if the data file exists
-            if os.path.exists(self.data_file):
-                # Check if the file is empty
-                if os.stat(self.data_file).st_size == 0:
-                    print("File found but empty. Initializing an empty list [].")
-                    return []  # Return an empty list if the file is empty
+            # Hold a shared lock so that no other process is writing the file while we read it
+            with self._sync_lock, locked(self.data_file, shared=True):
+                signature = file_signature(self.data_file)
+                # Check if the data file exists
+                if signature is not None:
+                    # Check if the file is empty
+                    if os.stat(self.data_file).st_size == 0:
+                        logger.info("File found but empty. Initializing an empty list [].")
+                        self._remember([], signature)
+                        return []  # Return an empty list if the file is empty
+                    else:
+                        # Load the data from the file
+                        with open(self.data_file, 'r') as file:
+                            existing_contacts = json.load(file)
+
+                        # Add the loaded contacts to the Contacts class instance
+                        logger.info("Load existing contacts: ")
+                        with metrics.timer("load"):
+                            # Variants of the same mailbox are kept, only deduplicate() merges them
+                            shared = self.contacts.load_contacts(existing_contacts)
+                        loaded = len(self.contacts.get_contacts())
+                        metrics.increment("contacts_loaded", loaded)
+                        summary.info("Loaded %d contact(s) from %s", loaded, self.data_file)
+                        if shared:
+                            logger.warning("%d contact(s) share a mailbox with another contact. "
+                                           "Run 'morning_greetings dedupe' to merge them.", shared)
+                        self._remember(existing_contacts, signature)
+
                 else:
-                    # Load the data from the file
-                    with open(self.data_file, 'r') as file:
-                        existing_contacts = json.load(file)
-                    
-                    # Add the loaded contacts to the Contacts class instance
-                    print("Load existing contacts: ")
-                    for contact in existing_contacts:
-                        self.contacts.add_contact(contact['name'], contact['email'], contact['preferred_time'])
-
-            else:
-                # If the file does not exist, print a message
-                print("No existing contacts found.")
+                    # If the file does not exist, print a message
+                    logger.info("No existing contacts found.")
 
         except Exception as e:
             # Handle any error that occurs while loading the contacts
-            print(f"Error loading contacts: {e}")
\ No newline at end of file
+            logger.error("Error loading contacts: %s", e)
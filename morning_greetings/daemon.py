@@ -0,0 +1,230 @@
+# daemon.py
+
+"""
+Module to run morning_greetings as a long-running daemon.
+
+The daemon keeps the contacts and the send schedule in memory, reloads the contacts when
+contacts.json is changed by another process (e.g. the interactive menu), updates the
+schedule incrementally and greets every contact when their preferred time is reached.
+
+When a minute is reached, its contacts are put in a send queue spread evenly over that
+minute. The queue is drained a little at every tick (within the rate limits), so a large
+bucket never blocks the daemon from reloading contacts or firing the next minutes.
+"""
+
+import heapq
+import logging
+import itertools
+import time
+from collections import Counter
+from datetime import datetime, time as day_time, timezone
+
+from morning_greetings.history import FAILED
+from morning_greetings.logger import log_message
+from morning_greetings.message_generator import render_cache, render_message
+from morning_greetings.message_sender import calculate_time
+from morning_greetings.metrics import metrics
+from morning_greetings.output import summary
+from morning_greetings.rate_limiter import email_domain
+from morning_greetings.scheduler import Schedule
+
+logger = logging.getLogger(__name__)
+
+
+def send_greeting(contact, history=None):
+    """
+    Generate, send and log a greeting for one contact.
+
+    Parameters:
+    contact (dict): The contact to greet.
+    history (DeliveryHistory): Records the outcome, and contacts already sent a message
+                               today (e.g. by the send command) are skipped (optional).
+    """
+    if history and history.already_sent(contact['email']):
+        metrics.increment("messages_skipped")
+        return
+    with metrics.timer("render"):
+        message = render_message(contact)
+    try:
+        # The preferred time has been reached, so the message is sent right away. The stages
+        # are timed one after the other (log_message times "log"), never nested.
+        with metrics.timer("schedule"):
+            action = calculate_time(contact, message)
+        metrics.increment(f"messages_{action}")
+        log_message(contact, message, preferred_time=contact['preferred_time'], log_file=f"{action}_messages_log.txt")
+        if history:
+            history.record(contact, action)
+    except ValueError as e:  # Handle any errors that occur during message sending
+        metrics.increment("messages_failed")
+        logger.error("Error sending message to %s: %s", contact['name'], e)
+        if history:
+            history.record(contact, FAILED, str(e))
+
+
+class Daemon:
+    def __init__(self, manager, send=send_greeting, limiter=None, window=60, clock=None):
+        """
+        Initialize the daemon.
+
+        Parameters:
+        manager (ContactsManager): The contact store to watch.
+        send (callable): Function called with each contact that is due.
+        limiter (RateLimiter): Limits how fast the due contacts are sent (optional).
+        window (float): Seconds over which the contacts of one minute are spread (0 to send at once).
+        clock (callable): Function returning the current time as an aware datetime (defaults to the system clock).
+        """
+        self.manager = manager
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.send = send
+        self.limiter = limiter
+        self.window = window
+        # Contacts waiting to be sent: heap of (send at timestamp, sequence number, contact)
+        self.queue = []
+        # Number of queued contacts per email domain
+        self._queued_domains = Counter()
+        self._sequence = itertools.count()
+        self.schedule = Schedule()
+        self._last_day = None      # The UTC day of the last tick
+        self._last_minute = None   # The last UTC minute of the day that was fired
+
+    def reload(self):
+        """
+        Apply changes made to the contacts to the schedule.
+
+        Returns:
+        tuple: The number of contacts (added, updated, removed) in the schedule.
+        """
+        self.manager.refresh()  # Only re-reads contacts.json if it has changed
+        return self.schedule.sync(self.manager.contacts.snapshot())
+
+    def tick(self, now=None):
+        """
+        Reload changed contacts, queue every contact whose preferred time has been reached
+        since the last tick, and send the queued contacts that are due.
+
+        Parameters:
+        now (datetime): The current time (defaults to now). Naive times are taken as local time.
+
+        Returns:
+        int: The number of contacts greeted.
+        """
+        now = (now or self.clock()).astimezone(timezone.utc)
+        minute = now.hour * 60 + now.minute
+
+        if self._last_day is None:
+            # First tick: start from the current minute, earlier buckets were missed already
+            self.schedule.set_day(now.date())
+            self.reload()
+            first = minute
+        elif now.date() != self._last_day:
+            # A new day has started: finish the minutes of the previous day (with that
+            # day's UTC offsets), then fire everything of the new day from midnight
+            self.reload()
+            self._enqueue(self._last_day, self._last_minute + 1, 1440)
+            self.schedule.set_day(now.date())  # Recalculates the UTC offsets once a day
+            first = 0
+        else:
+            self.reload()
+            first = self._last_minute + 1
+
+        self._enqueue(now.date(), first, minute + 1)
+        self._last_day = now.date()
+        self._last_minute = minute
+        return self.drain(now)
+
+    def _enqueue(self, day, first, stop):
+        """
+        Put the contacts of the given minutes in the send queue, spread over each minute.
+
+        Parameters:
+        day (date): The UTC day of the minutes.
+        first (int): The first UTC minute of the day to fire.
+        stop (int): The UTC minute of the day to stop at (not included).
+        """
+        for due_minute in range(first, stop):
+            due = self.schedule.due(due_minute)
+            if not due:
+                continue
+            start = datetime.combine(day, day_time(due_minute // 60, due_minute % 60), tzinfo=timezone.utc).timestamp()
+            spacing = self.window / len(due)
+            for i, contact in enumerate(due):
+                heapq.heappush(self.queue, (start + i * spacing, next(self._sequence), contact))
+                self._queued_domains[email_domain(contact['email'])] += 1
+
+    def drain(self, now=None):
+        """
+        Send the queued contacts that are due, as far as the rate limits allow.
+
+        Contacts held back by the limit of their domain stay in the queue, while the
+        contacts of other domains are sent. Once every queued domain is held back, the rest
+        of the queue is not looked at, so a large backlog is not scanned at every tick.
+
+        Parameters:
+        now (datetime): The current time (defaults to now).
+
+        Returns:
+        int: The number of contacts greeted.
+        """
+        now = (now or self.clock()).timestamp()
+        held_back = []
+        throttled = set()
+        greeted = 0
+        while self.queue and self.queue[0][0] <= now:
+            if self.limiter and self.limiter.global_wait_time() > 0:
+                break  # The global limit is reached, nothing else can be sent now
+            if len(throttled) == len(self._queued_domains):
+                break  # Every domain in the queue is throttled
+            entry = heapq.heappop(self.queue)
+            domain = email_domain(entry[2]['email'])
+            if domain in throttled:
+                held_back.append(entry)
+                continue
+            if self.limiter and not self.limiter.try_acquire(entry[2]['email']):
+                throttled.add(domain)
+                held_back.append(entry)  # This domain is throttled, try again at the next tick
+                continue
+            self._queued_domains[domain] -= 1
+            if not self._queued_domains[domain]:
+                del self._queued_domains[domain]
+            self.send(entry[2])
+            greeted += 1
+
+        for entry in held_back:
+            heapq.heappush(self.queue, entry)
+        return greeted
+
+    def next_wait(self, poll_interval):
+        """
+        Calculate how long the daemon can sleep before the next tick.
+
+        Parameters:
+        poll_interval (float): The longest time to sleep.
+
+        Returns:
+        float: Seconds to sleep.
+        """
+        if not self.queue:
+            return poll_interval
+        wait = self.queue[0][0] - self.clock().timestamp()
+        if wait <= 0 and self.limiter:
+            wait = self.limiter.wait_time(email_domain(self.queue[0][2]['email']))
+        return min(poll_interval, max(wait, 0.01))
+
+    def run(self, poll_interval=5, metrics_file=None):
+        """
+        Run the daemon until it is interrupted (Ctrl+C).
+
+        Parameters:
+        poll_interval (float): Seconds between two ticks.
+        metrics_file (str): File the metrics are written to after each tick that sent messages (optional).
+        """
+        summary.info("Daemon started with %d contacts. Press Ctrl+C to stop.", len(self.manager.get_contacts()))
+        try:
+            while True:
+                if self.tick() and metrics_file:
+                    metrics.write(metrics_file)
+                time.sleep(self.next_wait(poll_interval))
+        except KeyboardInterrupt:
+            summary.info("Daemon stopped.")
+            summary.info("Render cache: %(hits)d hits, %(misses)d misses, %(evictions)d evictions, "
+                         "%(entries)d entries, %(bytes)d bytes", render_cache.stats())
@@ -0,0 +1,83 @@
+# email_canonicalizer.py
+
+"""
+Module to recognize different spellings of the same mailbox.
+
+Many mail providers deliver "John.Doe+news@Gmail.com" to the same mailbox as
+"johndoe@gmail.com". canonicalize_email() reduces an address to one canonical form using
+per-domain rules, so that such variants are treated as duplicates. deduplicate() uses it to
+remove duplicates from a whole contact list in a single pass.
+"""
+
+# Domains that are other names for the same provider
+DOMAIN_ALIASES = {
+    'googlemail.com': 'gmail.com',
+}
+
+# Per-domain rules:
+# "tag" - the character that starts a sub-address tag ("john+news" -> "john")
+# "ignore_dots" - dots in the local part are ignored ("j.o.h.n" -> "john")
+DOMAIN_RULES = {
+    'gmail.com': {'tag': '+', 'ignore_dots': True},
+    'outlook.com': {'tag': '+'},
+    'hotmail.com': {'tag': '+'},
+    'live.com': {'tag': '+'},
+    'icloud.com': {'tag': '+'},
+    'me.com': {'tag': '+'},
+    'fastmail.com': {'tag': '+'},
+    'protonmail.com': {'tag': '+'},
+    'proton.me': {'tag': '+'},
+    'yahoo.com': {'tag': '-'},
+}
+
+
+def canonicalize_email(email):
+    """
+    Return the canonical form of an email address.
+
+    Parameters:
+    email (str): The email address.
+
+    Returns:
+    str: The address in lower case, with the domain's rules applied.
+    """
+    email = email.strip().lower()
+    local, at, domain = email.rpartition('@')
+    if not at:
+        return email
+    domain = DOMAIN_ALIASES.get(domain, domain)
+    rules = DOMAIN_RULES.get(domain)
+    if rules:
+        tag = rules.get('tag')
+        if tag:
+            local = local.split(tag, 1)[0]
+        if rules.get('ignore_dots'):
+            local = local.replace('.', '')
+    return f"{local}@{domain}"
+
+
+def deduplicate(contacts):
+    """
+    Remove contacts whose email is a variant of an earlier contact's email.
+
+    The first contact of each mailbox is kept. Runs in a single pass (one dictionary lookup
+    per contact).
+
+    Parameters:
+    contacts (iterable): The contacts to check.
+
+    Returns:
+    tuple: (list of the contacts kept, merges), where merges is
+           {domain: {kept email: [removed emails]}}.
+    """
+    kept = {}      # {canonical email: contact}
+    merges = {}
+    for contact in contacts:
+        canonical = canonicalize_email(contact['email'])
+        first = kept.get(canonical)
+        if first is None:
+            kept[canonical] = contact
+            continue
+        domain = canonical.rpartition('@')[2]
+        merges.setdefault(domain, {}).setdefault(first['email'], []).append(contact['email'])
+    return list(kept.values()), merges
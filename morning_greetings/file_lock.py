@@ -0,0 +1,110 @@
+# file_lock.py
+
+"""
+Module to share files safely between several morning_greetings processes.
+
+It provides an advisory lock (held on a separate ".lock" file next to the data file),
+an atomic write that never leaves a half-written file behind, and a cheap file
+signature used to detect whether another process has changed the file.
+"""
+
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl  # Advisory locking on POSIX systems
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+try:
+    import msvcrt  # Byte-range locking on Windows
+except ImportError:
+    msvcrt = None
+
+
+@contextmanager
+def locked(path, shared=False):
+    """
+    Hold an advisory lock for the given data file while the block runs.
+
+    Parameters:
+    path (str): The data file to protect. The lock is taken on "<path>.lock".
+    shared (bool): Take a shared (reader) lock instead of an exclusive (writer) lock.
+    """
+    lock_path = f"{path}.lock"
+    # Open (or create) the lock file; it never holds any data
+    with open(lock_path, "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        elif msvcrt is not None:  # pragma: no cover - Windows has no shared locks
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:  # pragma: no cover
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _file_mode(path):
+    """
+    Return the permissions to give a rewritten file: those of the existing file, or the
+    ones a plain open() would give a new file (0o666 without the bits masked by the umask).
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        # The umask can only be read by setting it, so put it straight back
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def atomic_write(path, text):
+    """
+    Write text to a file atomically (write to a temporary file, then rename it).
+
+    Readers either see the old content or the new content, never a partial file.
+    The file keeps its permissions (mkstemp creates the temporary file as 0600).
+
+    Parameters:
+    path (str): The file to write.
+    text (str): The content to write.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    mode = _file_mode(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, "w") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())  # Make sure the data is on disk before the rename
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Never leave temporary files behind if something goes wrong
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def file_signature(path):
+    """
+    Return a cheap signature of a file that changes whenever the file is rewritten.
+
+    Parameters:
+    path (str): The file to inspect.
+
+    Returns:
+    tuple or None: (inode, modification time in ns, size), or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,251 @@
+# history.py
+
+"""
+Module to keep the delivery history of every contact (an SQLite file).
+
+Every outcome (sent, planned or failed) is stored as one row, and two aggregate tables
+are updated in the same transaction: one row per contact (last greeted day, number of
+messages per outcome) and one row per day and outcome. Reports read the aggregates instead
+of scanning the history, and the last day each contact was sent a message is also kept in
+memory, so the send loop can skip contacts already greeted today with a dictionary lookup.
+"""
+
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+SENT = "sent"
+PLANNED = "planned"
+FAILED = "failed"
+ACTIONS = (SENT, PLANNED, FAILED)
+
+
+class DeliveryHistory:
+    def __init__(self, path="history.db", clock=time.time):
+        """
+        Open (or create) the history.
+
+        Parameters:
+        path (str): The SQLite file holding the history.
+        clock (callable): Function returning the current time in seconds.
+        """
+        self.path = path
+        self.clock = clock
+        # Autocommit mode: transactions are started explicitly where they are needed
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")  # Durable enough with WAL, much faster per record
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS deliveries (
+                id INTEGER PRIMARY KEY,
+                email TEXT NOT NULL,
+                day TEXT NOT NULL,
+                at REAL NOT NULL,
+                action TEXT NOT NULL,
+                detail TEXT
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS deliveries_contact ON deliveries (email, day)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS deliveries_day ON deliveries (day)")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS contact_stats (
+                email TEXT PRIMARY KEY,
+                name TEXT,
+                first_day TEXT NOT NULL,
+                last_day TEXT NOT NULL,
+                last_action TEXT NOT NULL,
+                last_sent_day TEXT,
+                sent INTEGER NOT NULL DEFAULT 0,
+                planned INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0
+            )""")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS daily_stats (
+                day TEXT NOT NULL,
+                action TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, action)
+            )""")
+        # The last day each contact was sent a message: {email: "YYYY-MM-DD"}
+        self._last_sent = {}
+        self.reload()
+
+    def is_empty(self):
+        """Tell whether nothing was recorded yet."""
+        return self.connection.execute("SELECT 1 FROM contact_stats LIMIT 1").fetchone() is None
+
+    def close(self):
+        """Close the history file."""
+        self.connection.close()
+
+    def reload(self):
+        """Re-read the last sent day of every contact (e.g. to see what other processes recorded)."""
+        self._last_sent = dict(self.connection.execute(
+            "SELECT email, last_sent_day FROM contact_stats WHERE last_sent_day IS NOT NULL"))
+
+    def record(self, contact, action, detail=None, at=None):
+        """
+        Record the outcome of one greeting and update the aggregates.
+
+        Parameters:
+        contact (dict): The contact.
+        action (str): "sent", "planned" or "failed".
+        detail (str): Extra information, e.g. the error of a failed message (optional).
+        at (float): When it happened, in seconds (defaults to the clock).
+
+        Raises:
+        ValueError: If the action is unknown.
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action: {action}")
+        at = self.clock() if at is None else at
+        day = datetime.fromtimestamp(at).date().isoformat()
+        email = contact['email']
+        with self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.execute("INSERT INTO deliveries (email, day, at, action, detail) VALUES (?, ?, ?, ?, ?)",
+                                    (email, day, at, action, detail))
+            self.connection.execute(f"""
+                INSERT INTO contact_stats (email, name, first_day, last_day, last_action, last_sent_day, {action})
+                VALUES (?, ?, ?, ?, ?, ?, 1)
+                ON CONFLICT (email) DO UPDATE SET
+                    name = excluded.name,
+                    last_day = MAX(last_day, excluded.last_day),
+                    last_action = excluded.last_action,
+                    last_sent_day = CASE WHEN excluded.last_sent_day IS NULL THEN last_sent_day
+                                         ELSE MAX(COALESCE(last_sent_day, ''), excluded.last_sent_day) END,
+                    {action} = {action} + 1""",
+                                    (email, contact.get('name'), day, day, action, day if action == SENT else None))
+            self.connection.execute("""
+                INSERT INTO daily_stats (day, action, count) VALUES (?, ?, 1)
+                ON CONFLICT (day, action) DO UPDATE SET count = count + 1""", (day, action))
+        if action == SENT and day > self._last_sent.get(email, ""):
+            self._last_sent[email] = day
+
+    def restore(self, contacts, daily):
+        """
+        Replace the whole history with recovered totals (see recovery.py).
+
+        The logs do not hold every outcome the history records (e.g. failures), so only the
+        per-contact and per-day totals are restored; the table of individual deliveries
+        starts empty again.
+
+        Parameters:
+        contacts (iterable): Per-contact totals, dicts with the columns of contact_stats.
+        daily (iterable): (day, action, count) tuples.
+
+        Returns:
+        int: The number of contacts in the restored history.
+        """
+        with self.connection:
+            self.connection.execute("BEGIN")
+            for table in ("deliveries", "contact_stats", "daily_stats"):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.connection.executemany(
+                "INSERT INTO contact_stats (email, name, first_day, last_day, last_action, last_sent_day, "
+                "sent, planned, failed) VALUES (:email, :name, :first_day, :last_day, :last_action, "
+                ":last_sent_day, :sent, :planned, :failed)", contacts)
+            self.connection.executemany("INSERT INTO daily_stats (day, action, count) VALUES (?, ?, ?)", daily)
+        self.reload()
+        return self.connection.execute("SELECT COUNT(*) FROM contact_stats").fetchone()[0]
+
+    def last_sent_day(self, email):
+        """
+        Return the last day a contact was sent a message.
+
+        Parameters:
+        email (str): The contact's email.
+
+        Returns:
+        str or None: The day ("YYYY-MM-DD"), or None if the contact was never reached.
+        """
+        return self._last_sent.get(email)
+
+    def already_sent(self, email, day=None, refresh=True):
+        """
+        Check whether a contact was already sent a message on a day.
+
+        Parameters:
+        email (str): The contact's email.
+        day (date): The day (defaults to today).
+        refresh (bool): When the day in memory is older, read the contact's last sent day from
+                        the file, to see messages recorded by other processes (e.g. a send run
+                        while the daemon is running). Pass False right after reload().
+
+        Returns:
+        bool: True if a message was sent to the contact that day.
+        """
+        day = (day or date.today()).isoformat()
+        last_sent = self._last_sent.get(email)
+        if (last_sent is not None and last_sent >= day) or not refresh:
+            return last_sent == day
+        row = self.connection.execute("SELECT last_sent_day FROM contact_stats WHERE email = ?", (email,)).fetchone()
+        if row is not None and row[0] is not None:
+            self._last_sent[email] = last_sent = row[0]
+        return last_sent == day
+
+    def never_reached(self, contacts):
+        """
+        Find the contacts that were never sent a message.
+
+        Parameters:
+        contacts (iterable): The contacts to check.
+
+        Returns:
+        list: The contacts without any sent message.
+        """
+        return [contact for contact in contacts if contact['email'] not in self._last_sent]
+
+    def contact_stats(self, email):
+        """
+        Return the aggregates of one contact.
+
+        Parameters:
+        email (str): The contact's email.
+
+        Returns:
+        dict or None: name, first_day, last_day, last_action, last_sent_day and the number of
+                      sent, planned and failed messages, or None if nothing was recorded.
+        """
+        row = self.connection.execute("SELECT * FROM contact_stats WHERE email = ?", (email,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def daily_counts(self, days=30, today=None):
+        """
+        Return the number of messages per day and outcome over the last days.
+
+        Parameters:
+        days (int): The number of days, today included.
+        today (date): The last day (defaults to today).
+
+        Returns:
+        list: (day, {action: count}) pairs, oldest first, including days without messages.
+        """
+        today = today or date.today()
+        first = today - timedelta(days=days - 1)
+        counts = {(first + timedelta(days=i)).isoformat(): dict.fromkeys(ACTIONS, 0) for i in range(days)}
+        rows = self.connection.execute("SELECT day, action, count FROM daily_stats WHERE day BETWEEN ? AND ?",
+                                       (first.isoformat(), today.isoformat()))
+        for day, action, count in rows:
+            counts[day][action] = count
+        return list(counts.items())
+
+    def prune(self, keep_days=90, today=None):
+        """
+        Delete the individual deliveries and daily counts older than keep_days.
+
+        The per-contact aggregates are kept, so the last greeted day and the totals stay known.
+
+        Parameters:
+        keep_days (int): The number of days to keep, today included.
+        today (date): The last day (defaults to today).
+
+        Returns:
+        int: The number of deliveries deleted.
+        """
+        cutoff = ((today or date.today()) - timedelta(days=keep_days - 1)).isoformat()
+        with self.connection:
+            self.connection.execute("BEGIN")
+            deleted = self.connection.execute("DELETE FROM deliveries WHERE day < ?", (cutoff,)).rowcount
+            self.connection.execute("DELETE FROM daily_stats WHERE day < ?", (cutoff,))
+        return deleted
@@ -0,0 +1,224 @@
+# load_test.py
+
+"""
+Module to load-test the whole pipeline with generated contacts.
+
+The harness runs every stage of a send run on a large synthetic contact list, in a
+temporary directory so the real contacts and logs are not touched:
+
+import    - add the contacts one by one through Contacts.add_contact (validation, duplicate
+            checks) and save them with ContactsManager
+load      - read contacts.json back with a new ContactsManager
+plan      - build the send schedule and look up who is due at each minute of the day
+render, schedule, send, log
+          - the real send loop (main.send_messages) on the loaded contacts, with the messages
+            handed to a local fake transport; each stage is the time its own timer measured
+
+For each stage it reports the throughput, the p50/p99 latency per contact and the peak
+resident memory of the process so far.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from morning_greetings.contacts_manager import ContactsManager
+from morning_greetings.message_generator import render_cache
+from morning_greetings.metrics import DEFAULT_BUCKETS, Metrics, metrics
+from morning_greetings.scheduler import Schedule
+from morning_greetings.synthetic import generate_contacts
+
+STAGES = ("import", "load", "plan", "render", "schedule", "send", "log")
+
+# Per-contact operations take microseconds, so the latency buckets start lower than the default
+LATENCY_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005) + DEFAULT_BUCKETS
+
+
+class FakeTransport:
+    def __init__(self, latency=0.0):
+        """
+        Initialize a transport that accepts every message without sending it.
+
+        Parameters:
+        latency (float): Seconds to wait per message, to imitate a mail server.
+        """
+        self.latency = latency
+        self.sent = 0
+        self.bytes = 0
+
+    def send(self, contact, message):
+        """
+        Accept a message.
+
+        Parameters:
+        contact (dict): The recipient.
+        message (str): The message.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        self.sent += 1
+        self.bytes += len(message)
+
+
+def peak_rss():
+    """
+    Return the peak resident memory of the process.
+
+    Returns:
+    int or None: Bytes, or None where it cannot be measured (Windows has no resource module).
+    """
+    try:
+        import resource  # Unix only, imported here so the CLI still starts on Windows
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB, macOS bytes
+
+
+class LoadTest:
+    def __init__(self, count=10000, seed=0, transport=None):
+        """
+        Initialize a load test.
+
+        Parameters:
+        count (int): The number of generated contacts.
+        seed (int): The seed of the generated contacts.
+        transport (FakeTransport): The transport the messages are handed to (defaults to an instant one).
+        """
+        self.count = count
+        self.seed = seed
+        self.transport = transport or FakeTransport()
+        self.metrics = Metrics(LATENCY_BUCKETS)
+        # {stage: (seconds, items, peak RSS in bytes)}
+        self.results = {}
+
+    def _stage(self, name, items, work):
+        """
+        Run one stage and record its duration, throughput and the peak memory.
+
+        Parameters:
+        name (str): The stage name.
+        items (int): The number of contacts processed by the stage.
+        work (callable): The stage itself.
+
+        Returns:
+        The value returned by work.
+        """
+        started = time.perf_counter()
+        value = work()
+        self.results[name] = (time.perf_counter() - started, items, peak_rss())
+        return value
+
+    def _each(self, name, contacts, action):
+        """Call an action for every contact, timing each call as one operation of the stage."""
+        observe = self.metrics.observe
+        clock = time.perf_counter
+        for contact in contacts:
+            start = clock()
+            action(contact)
+            observe(name, clock() - start)
+
+    def run(self):
+        """
+        Run every stage once.
+
+        Returns:
+        dict: The results, {stage: (seconds, items, peak RSS in bytes)}.
+        """
+        contacts = generate_contacts(self.count, self.seed)
+        # Per-contact messages would flood the output and measure the terminal, not the code
+        package_logger = logging.getLogger("morning_greetings")
+        level = package_logger.level
+        package_logger.setLevel(logging.WARNING)
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                self._run(contacts, tmp_dir)
+        finally:
+            package_logger.setLevel(level)
+        return self.results
+
+    def _run(self, contacts, tmp_dir):
+        """Run the stages in a temporary directory."""
+        data_file = os.path.join(tmp_dir, "contacts.json")
+
+        def import_contacts():
+            manager = ContactsManager(data_file=data_file)
+            add = manager.contacts.add_contact
+            self._each("import", contacts,
+                       lambda c: add(c['name'], c['email'], c['preferred_time'], c.get('time_zone')))
+            manager.save_contacts()
+        self._stage("import", len(contacts), import_contacts)
+
+        manager = self._stage("load", len(contacts), lambda: ContactsManager(data_file=data_file))
+        loaded = manager.snapshot()
+
+        def plan():
+            schedule = Schedule(datetime.now(timezone.utc).date())
+            self._each("plan", loaded, schedule.add)
+            return sum(len(schedule.due(minute)) for minute in range(1440))
+        self._stage("plan", len(loaded), plan)
+
+        # The send loop of a real run, with the per-contact timers it records kept by the load test
+        from morning_greetings.main import send_messages  # main imports this module for its loadtest command
+        render_cache.clear()  # Every message is rendered, as on the first run of a process
+        with self._recording():
+            send_messages(manager, transport=self.transport, log_dir=tmp_dir)
+        rss = peak_rss()
+        for stage in ("render", "schedule", "send", "log"):
+            histogram = self.metrics.histograms.get(stage)
+            if histogram is not None:
+                self.results[stage] = (histogram.sum, histogram.count, rss)
+
+    @contextmanager
+    def _recording(self):
+        """Record what the shared metrics measure in the load test's metrics while the block runs."""
+        saved = metrics.counters, metrics.histograms, metrics.buckets
+        metrics.counters, metrics.histograms, metrics.buckets = {}, self.metrics.histograms, self.metrics.buckets
+        try:
+            yield
+        finally:
+            metrics.counters, metrics.histograms, metrics.buckets = saved
+
+    def format_report(self):
+        """
+        Return the results as a table.
+
+        Returns:
+        str: One line per stage.
+        """
+        lines = [f"Load test with {self.count} contacts (seed {self.seed}):",
+                 f"  {'stage':<8} {'seconds':>9} {'contacts/s':>12} {'p50 ms':>9} {'p99 ms':>9} {'peak RSS MiB':>13}"]
+        for stage in STAGES:
+            if stage not in self.results:
+                continue
+            seconds, items, rss = self.results[stage]
+            histogram = self.metrics.histograms.get(stage)
+            p50 = f"{histogram.quantile(0.5) * 1000:.3f}" if histogram else "-"
+            p99 = f"{histogram.quantile(0.99) * 1000:.3f}" if histogram else "-"
+            rate = items / seconds if seconds else float("inf")
+            peak = f"{rss / 2 ** 20:.1f}" if rss is not None else "-"
+            lines.append(f"  {stage:<8} {seconds:>9.3f} {rate:>12.0f} {p50:>9} {p99:>9} {peak:>13}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        """
+        Return the results as a dictionary (e.g. to save them as JSON and compare runs).
+
+        Returns:
+        dict: The contact count, the seed and per stage the seconds, throughput, p50, p99 and peak RSS.
+        """
+        stages = {}
+        for stage, (seconds, items, rss) in self.results.items():
+            histogram = self.metrics.histograms.get(stage)
+            stages[stage] = {
+                'seconds': seconds,
+                'contacts_per_second': items / seconds if seconds else None,
+                'p50_seconds': histogram.quantile(0.5) if histogram else None,
+                'p99_seconds': histogram.quantile(0.99) if histogram else None,
+                'peak_rss_bytes': rss,
+            }
+        return {'contacts': self.count, 'seed': self.seed, 'stages': stages}
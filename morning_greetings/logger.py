@@ -5,6 +5,11 @@ Module to log the messages that were "sent" or are planned to be "sent" to each
 """
 
 import datetime  # Importing datetime to add timestamps to the log entries
+import logging  # Importing logging to report failures to write the log file
+
+from morning_greetings.metrics import metrics  # Importing metrics to time logging and count failures
+
+logger = logging.getLogger(__name__)
 
 # The log_message method logs details of a message that was sent, including the contact's name,
 # email, the message content, and the time when it was sent. It also allows logging messages
@@ -30,7 +35,9 @@ def log_message(contact, message, preferred_time=None, log_file: str = "message_
     # Error handling: Attempt to open the log file and append the log entry. 
     # If an error occurs, print an error message.
     try:
-        with open(log_file, "a") as file:
-            file.write(log_entry)
+        with metrics.timer("log"):
+            with open(log_file, "a") as file:
+                file.write(log_entry)
     except Exception as e:
-        print(f"Error logging message: {e}")  # Print error details if logging fails
+        metrics.increment("log_errors")
+        logger.error("Error logging message: %s", e)  # Report error details if logging fails
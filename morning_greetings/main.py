@@ -3,13 +3,34 @@ Main script that integrates all the modules. The script performes the entire aut
 create a personalized message for each contact, send the message, and record the operation in a log.
 """
 
+import argparse
+import json
+import logging
+from functools import partial
 import sys
 import os
+from datetime import date, datetime, timezone
 
+from morning_greetings.daemon import Daemon, send_greeting
+from morning_greetings.history import DeliveryHistory, FAILED
 from morning_greetings.logger import log_message
-from morning_greetings.message_generator import generate_message
+from morning_greetings.message_generator import render_cache, render_message
 from morning_greetings.message_sender import calculate_time
-from morning_greetings.contacts_manager import ContactsManager
+from morning_greetings.metrics import metrics
+from morning_greetings.change_feed import ChangeFeed, FeedConsumer, feed_path
+from morning_greetings.contacts_manager import ContactsManager, data_path
+from morning_greetings.outbox import Outbox
+from morning_greetings.output import configure_output, summary
+from morning_greetings.profiling import profile_call
+from morning_greetings.recovery import backup_log, recover
+from morning_greetings.rate_limiter import RateLimiter
+from morning_greetings.load_test import FakeTransport, LoadTest
+from morning_greetings.minute_index import index_for
+from morning_greetings.simulator import simulate_day
+from morning_greetings.synthetic import generate_contacts
+from morning_greetings.file_lock import atomic_write
+
+logger = logging.getLogger("morning_greetings.main")
 
 def display_menu():
     """Display the menu options to the user."""
@@ -24,12 +45,134 @@ def display_menu():
     print("8. Exit")
     print("-------------------------------")
 
-def main():
-    """Main program loop to manage the greeting process, handle user input, and perform actions."""
-    
-    # Initialize the ContactsManager to manage contact data
-    manager = ContactsManager()
+def deliver(contact, message, history=None, transport=None, log_dir=None):
+    """
+    Send (or plan) one message and record it in the matching log file.
+
+    Parameters:
+    contact (dict): The contact to greet.
+    message (str): The message to send.
+    history (DeliveryHistory): Records the outcome (optional).
+    transport: The mail transport, any object with a send(contact, message) method (optional,
+               the message is only simulated and logged by default).
+    log_dir (str): The directory of the log files (defaults to the current directory).
+
+    Raises:
+    ValueError: If the message cannot be sent (the transport may raise its own errors too).
+    """
+    # Simulate sending the message at the preferred time. Each stage has its own timer, one
+    # after the other (never nested), so the stage totals add up to the time of the run.
+    try:
+        with metrics.timer("schedule"):
+            action = calculate_time(contact, message, contact['preferred_time'])
+        with metrics.timer("send"):
+            if transport is not None:
+                # Hand the message over, planned ones too (like the simulated send_message)
+                transport.send(contact, message)
+    except Exception as e:
+        if history:
+            history.record(contact, FAILED, str(e))
+        raise
+    metrics.increment(f"messages_{action}")
+    if history:
+        history.record(contact, action)
+    log_file_name = f"{action}_messages_log.txt"  # Log based on whether the message was sent or planned
+    if log_dir is not None:
+        log_file_name = os.path.join(log_dir, log_file_name)
+
+    # Log the message (either in planned_messages_log.txt or sent_messages_log.txt)
+    log_message(contact, message, preferred_time=None, log_file=log_file_name)
+
+def send_messages(manager, limiter=None, outbox=None, history=None, transport=None, log_dir=None):
+    """
+    Send (or plan) a personalized message to every contact.
+
+    Parameters:
+    manager (ContactsManager): The contact store.
+    limiter (RateLimiter): Limits how fast the messages are sent (optional).
+    outbox (Outbox): Durable queue to send through (optional). Each contact is queued once
+                     per day, and failed messages are retried or moved to the dead-letter list.
+    history (DeliveryHistory): Records every outcome, and contacts already sent a message
+                               today are skipped (optional).
+    transport: The mail transport (optional, see deliver).
+    log_dir (str): The directory of the log files (defaults to the current directory).
+    """
+    contacts = manager.snapshot()  # Retrieve a consistent snapshot of all contacts
+
+    if history and contacts:
+        # Read what other processes (e.g. the daemon) recorded once, then one dictionary lookup per contact
+        history.reload()
+        today = date.today()
+        greeted = len(contacts)
+        contacts = [contact for contact in contacts
+                    if not history.already_sent(contact['email'], today, refresh=False)]
+        greeted -= len(contacts)
+        if greeted:
+            metrics.increment("messages_skipped", greeted)
+            summary.info("Skipped %d contact(s) already greeted today.", greeted)
     
+    if not contacts:  # If no contacts exist, notify the user and skip sending
+        logger.warning("No contacts to send messages to.")
+        if outbox is None:
+            return
+
+    if outbox is not None:
+        # Queue today's greetings (contacts already queued today are skipped), then send them
+        added = outbox.enqueue_many(((contact, render(contact)) for contact in contacts), date.today().isoformat())
+        summary.info("Queued %d new message(s).", added)
+        process_outbox(outbox, limiter, history, transport, log_dir)
+        return
+
+    # Iterate through all contacts (no faster than the rate limits) and send a personalized message
+    for contact in (limiter.throttle(contacts) if limiter else contacts):
+        message = render(contact)  # Generate the "Good Morning" message
+        try:
+            deliver(contact, message, history, transport, log_dir)
+        except Exception as e:  # Handle any errors that occur during message sending (or in the transport)
+            metrics.increment("messages_failed")
+            logger.error("Error sending message to %s: %s", contact['name'], e)
+
+def render(contact):
+    """
+    Generate the message for a contact (timed as the "render" stage).
+
+    Parameters:
+    contact (dict): The contact to greet.
+
+    Returns:
+    str: The personalized message.
+    """
+    with metrics.timer("render"):
+        return render_message(contact)
+
+def process_outbox(outbox, limiter=None, history=None, transport=None, log_dir=None):
+    """
+    Send the messages waiting in the outbox and print a summary.
+
+    Parameters:
+    outbox (Outbox): The durable queue.
+    limiter (RateLimiter): Limits how fast the messages are sent (optional).
+    history (DeliveryHistory): Records every outcome (optional).
+    transport: The mail transport (optional, see deliver).
+    log_dir (str): The directory of the log files (defaults to the current directory).
+    """
+    sent, failed = outbox.process(partial(deliver, history=history, transport=transport, log_dir=log_dir),
+                                  limiter=limiter)
+    metrics.increment("messages_failed", failed)
+    counts = outbox.counts()
+    summary.info("Outbox: %d sent, %d failed in this run; %d pending, %d dead.",
+                 sent, failed, counts['pending'], counts['dead'])
+    for job in outbox.dead_letters():
+        logger.warning("Dead letter: %s after %d attempt(s): %s",
+                       job['contact']['email'], job['attempts'], job['last_error'])
+
+def menu(manager):
+    """
+    Interactive menu loop to manage the greeting process, handle user input, and perform actions.
+
+    Parameters:
+    manager (ContactsManager): The contact store.
+    """
     while True:
         # Display the menu and get user's choice
         display_menu()
@@ -40,12 +183,12 @@ def main():
             name = input("Enter the contact's name: ")
             email = input("Enter the contact's email: ")
             preferred_time = input("Enter the preferred time (e.g., 08:00 AM, leave blank for default): ")
+            time_zone = input("Enter the time zone (e.g., Europe/Oslo, leave blank for local time): ")
 
             # If no preferred time is provided, use the default time
             if preferred_time.strip() == "":
-                manager.add_contact(name, email)  # Call without passing preferred_time
-            else:
-                manager.add_contact(name, email, preferred_time)  # Call with preferred_time
+                preferred_time = "08:00 AM"
+            manager.add_contact(name, email, preferred_time, time_zone.strip() or None)
 
         elif choice == '2':  # Remove a contact
             name = input("Enter the name of the contact to remove: ")
@@ -62,29 +205,7 @@ def main():
             manager.clear_contacts()
 
         elif choice == '6':  # Send messages to all contacts
-            contacts = manager.get_contacts()  # Retrieve all contacts
-            
-            if not contacts:  # If no contacts exist, notify the user and skip sending
-                print("No contacts to send messages to.")
-                continue
-
-            # Iterate through all contacts and send a personalized message
-            for contact in contacts:
-                name = contact['name']
-                email = contact['email']  # Ensure 'contact_info' matches your data structure
-                message = generate_message(name)  # Generate the "Good Morning" message
-                preferred_time = contact['preferred_time']  # Get the preferred time
-
-                try:
-                    # Simulate sending the message at the preferred time
-                    action = calculate_time(contact, message, preferred_time)
-                    log_file_name = f"{action}_messages_log.txt"  # Log based on whether the message was sent or planned
-
-                    # Log the message (either in planned_messages_log.txt or sent_messages_log.txt)
-                    log_message(contact, message, preferred_time=None, log_file=log_file_name)
-
-                except ValueError as e:  # Handle any errors that occur during message sending
-                    print(f"Error sending message to {name}: {e}")
+            send_messages(manager)
         
         elif choice == '7':  # Clear the log files
             log_files = {
@@ -100,31 +221,22 @@ def main():
 
             log_choice = input("\nEnter your choice (1, 2, or 3): ")
 
-            if log_choice == '1':  # Clear only planned log
-                try:
-                    with open(log_files['1'], 'w') as file:
-                        file.truncate()  # Empty the file
-                    print(f"Cleared contents of {log_files['1']}.")
-                except Exception as e:
-                    print(f"Error clearing log file {log_files['1']}: {e}")
-
-            elif log_choice == '2':  # Clear only sent log
-                try:
-                    with open(log_files['2'], 'w') as file:
-                        file.truncate()  # Empty the file
-                    print(f"Cleared contents of {log_files['2']}.")
-                except Exception as e:
-                    print(f"Error clearing log file {log_files['2']}: {e}")
-
-            elif log_choice == '3':  # Clear both logs
-                for log_file in [log_files['1'], log_files['2']]:
+            if log_choice in ('1', '2', '3'):
+                # Option 3 clears both logs
+                chosen = [log_files['1'], log_files['2']] if log_choice == '3' else [log_files[log_choice]]
+                for log_file in chosen:
                     try:
-                        with open(log_file, 'w') as file:
-                            file.truncate()  # Empty the file
-                        print(f"Cleared contents of {log_file}.")
+                        # Move the old messages aside first, so "recover" can still read them
+                        backup = backup_log(log_file)
+                        if backup is None:
+                            with open(log_file, 'w') as file:
+                                file.truncate()  # Empty (or create) the file
+                            print(f"Cleared contents of {log_file}.")
+                        else:
+                            print(f"Cleared contents of {log_file} (backup saved to {backup}).")
                     except Exception as e:
                         print(f"Error clearing log file {log_file}: {e}")
-            
+
             else:
                 print("Invalid choice. Please select either 1, 2, or 3.")
 
@@ -136,6 +248,297 @@ def main():
         else:  # Handle invalid menu option input
             print("Invalid option. Please try again.")
 
+def show_due(contacts, now=None, list_contacts=False):
+    """
+    Print how many contacts are due at a given minute, how many are overdue and the busiest minutes.
+
+    Parameters:
+    contacts (iterable): The contacts (a snapshot, so the index is only rebuilt when they change).
+    now (datetime): The time to check (defaults to now). Naive times are taken as local time.
+    list_contacts (bool): Also print the contacts due at that minute.
+    """
+    now = (now or datetime.now()).astimezone(timezone.utc)
+    index = index_for(contacts, now.date())
+    due = index.due(now.hour * 60 + now.minute)
+    overdue = index.overdue(now)
+    summary.info("%d contact(s) due at %s UTC, %d of %d with their preferred time already passed today.",
+                 len(due), now.strftime("%H:%M"), len(overdue), len(index))
+    volume = index.volume()
+    busiest = sorted(range(len(volume)), key=lambda minute: -volume[minute])[:5]
+    summary.info("Busiest minutes (UTC): %s", ", ".join(f"{minute // 60:02d}:{minute % 60:02d} ({volume[minute]})"
+                                                        for minute in busiest if volume[minute]))
+    if list_contacts:
+        for contact in due:
+            print(f"Name: {contact['name']}, Email: {contact['email']}, Preferred Time: {contact['preferred_time']}")
+
+def show_history(history, contacts=(), days=30, email=None):
+    """
+    Print the messages per day, and optionally one contact's history or the contacts never reached.
+
+    Parameters:
+    history (DeliveryHistory): The delivery history.
+    contacts (iterable): Contacts to check for "never reached" (none to skip the check).
+    days (int): The number of days to show.
+    email (str): The contact to show the history of (optional).
+    """
+    if email:
+        stats = history.contact_stats(email)
+        if stats is None:
+            summary.info("No messages recorded for %s.", email)
+        else:
+            summary.info("%(email)s (%(name)s): last greeted %(last_sent_day)s, last outcome %(last_action)s on "
+                         "%(last_day)s; %(sent)d sent, %(planned)d planned, %(failed)d failed since %(first_day)s.",
+                         stats)
+        return
+
+    summary.info("Messages per day (sent / planned / failed):")
+    for day, counts in history.daily_counts(days):
+        summary.info("  %s  %6d %6d %6d", day, counts['sent'], counts['planned'], counts['failed'])
+    if contacts:
+        never = history.never_reached(contacts)
+        summary.info("%d of %d contact(s) were never sent a message.", len(never), len(contacts))
+        for contact in never:
+            print(f"Name: {contact['name']}, Email: {contact['email']}")
+
+def show_changes(feed, since=0, limit=None, cursor_file=None):
+    """
+    Print the contact changes after a sequence number, one JSON line per change (nothing else).
+
+    Parameters:
+    feed (ChangeFeed): The change feed.
+    since (int): The last sequence number already handled.
+    limit (int): The maximum number of changes to print (optional).
+    cursor_file (str): File remembering how far a consumer got; used instead of since, and
+                       moved past the printed changes (optional).
+    """
+    consumer = FeedConsumer(feed, cursor_file) if cursor_file else None
+    changes = consumer.poll(limit) if consumer else feed.read(since, limit)
+    for change in changes:
+        print(json.dumps(change))
+    if consumer and changes:  # Move the consumer past what was printed
+        consumer.commit(changes[-1]['seq'])
+
+def parse_args(argv=None):
+    """
+    Parse the command line arguments.
+
+    Parameters:
+    argv (list): The arguments to parse (defaults to sys.argv[1:]).
+
+    Returns:
+    argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(prog="morning_greetings", description="Send personalized Good Morning messages.")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="Only print warnings, errors and summaries, not a line per contact")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run the command under cProfile and tracemalloc and print the hot spots")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="Directory for the .prof, .tracemalloc and .folded files (default: profiles)")
+    parser.add_argument("--sample-interval", type=float,
+                        help="Also sample the call stack every N seconds and write a flamegraph-ready .folded file")
+
+    # Options shared by the commands that send (or simulate sending) messages
+    rate_options = argparse.ArgumentParser(add_help=False)
+    rate_options.add_argument("--rate", type=float, default=10,
+                              help="Maximum messages sent per second (default: 10, 0 for no limit)")
+    rate_options.add_argument("--domain-rate", type=float, default=2,
+                              help="Maximum messages sent per second to one email domain (default: 2, 0 for no limit)")
+    send_options = argparse.ArgumentParser(add_help=False, parents=[rate_options])
+    send_options.add_argument("--metrics-file",
+                              help="Write counters and stage latencies to this file (JSON if it ends with .json, "
+                                   "Prometheus text otherwise)")
+    send_options.add_argument("--history", default="history.db",
+                              help="File of the delivery history; contacts already greeted today are skipped "
+                                   "(default: history.db)")
+
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("menu", help="Start the interactive menu (default)")
+    subparsers.add_parser("load", help="Load the contacts and exit (e.g. to profile loading)")
+    subparsers.add_parser("dedupe", help="Remove contacts whose email is a variant of another contact's email")
+    send_parser = subparsers.add_parser("send", parents=[send_options],
+                                        help="Send (or plan) a message to every contact once and exit")
+    send_parser.add_argument("--outbox", default="outbox.db",
+                             help="File of the durable send queue (default: outbox.db)")
+    send_parser.add_argument("--resume", action="store_true",
+                             help="Only send the messages left in the outbox by an earlier run")
+    daemon_parser = subparsers.add_parser("daemon", parents=[send_options],
+                                          help="Keep running and greet each contact at their preferred time")
+    daemon_parser.add_argument("--poll-interval", type=float, default=5,
+                               help="Seconds between two checks of the schedule (default: 5)")
+    simulate_parser = subparsers.add_parser("simulate", parents=[rate_options],
+                                            help="Fast-forward a whole day of sends with a simulated clock (nothing is sent)")
+    simulate_parser.add_argument("--day", type=date.fromisoformat,
+                                 help="The UTC day to simulate, as YYYY-MM-DD (default: today)")
+    simulate_parser.add_argument("--synthetic", type=int, metavar="N",
+                                 help="Simulate N generated contacts instead of the contacts file")
+    simulate_parser.add_argument("--seed", type=int, default=0,
+                                 help="Random seed of the generated contacts (default: 0)")
+    simulate_parser.add_argument("--window", type=float, default=60,
+                                 help="Seconds over which the contacts of one minute are spread (default: 60)")
+    simulate_parser.add_argument("--histogram-file",
+                                 help="Write the contacts due and sent per minute to this CSV file")
+    simulate_parser.add_argument("--outcome-file",
+                                 help="Write the send time and delay of every message to this CSV file")
+    due_parser = subparsers.add_parser("due", help="Show who is due now, who is overdue and the busiest minutes")
+    due_parser.add_argument("--at", type=datetime.fromisoformat,
+                            help="The time to check, e.g. 2024-01-15T08:00+01:00 (default: now)")
+    due_parser.add_argument("--list", action="store_true", help="Also list the contacts due at that minute")
+    history_parser = subparsers.add_parser("history", help="Show the delivery history")
+    history_parser.add_argument("--history", default="history.db",
+                                help="File of the delivery history (default: history.db)")
+    history_parser.add_argument("--days", type=int, default=30,
+                                help="Show the messages per day over this many days (default: 30)")
+    history_parser.add_argument("--contact", metavar="EMAIL", help="Show the history of one contact")
+    history_parser.add_argument("--never-reached", action="store_true",
+                                help="List the contacts that were never sent a message")
+    recover_parser = subparsers.add_parser("recover",
+                                           help="Rebuild the delivery history (and lost contacts) from the message logs")
+    recover_parser.add_argument("logs", nargs="*",
+                                help="The log files to read (default: the sent and planned logs and their backups)")
+    recover_parser.add_argument("--history", default="history.db",
+                                help="File of the delivery history to rebuild (default: history.db)")
+    recover_parser.add_argument("--outbox", default="outbox.db",
+                                help="Outbox to read contact records and failed messages from (default: outbox.db)")
+    recover_parser.add_argument("--workers", type=int,
+                                help="Processes parsing the logs in parallel (default: one per CPU)")
+    recover_parser.add_argument("--replace", action="store_true",
+                                help="Replace the delivery history even if it already holds records")
+    recover_parser.add_argument("--restore-contacts", action="store_true",
+                                help="Also add the contacts found in the logs that are missing from contacts.json")
+    changes_parser = subparsers.add_parser("changes", help="Print the contact changes (one JSON line per change)")
+    changes_parser.add_argument("--since", type=int, default=0,
+                                help="Only print the changes after this sequence number (default: 0, all)")
+    changes_parser.add_argument("--limit", type=int, help="Print at most this many changes")
+    changes_parser.add_argument("--consumer", metavar="CURSOR_FILE",
+                                help="Resume after the last change printed for this consumer, and remember "
+                                     "how far it got in this file (overrides --since)")
+    load_test_parser = subparsers.add_parser("loadtest",
+                                             help="Run import, load, plan, render, send and log on generated contacts")
+    load_test_parser.add_argument("--contacts", type=int, default=10000,
+                                  help="Number of generated contacts (default: 10000)")
+    load_test_parser.add_argument("--seed", type=int, default=0,
+                                  help="Random seed of the generated contacts (default: 0)")
+    load_test_parser.add_argument("--latency", type=float, default=0,
+                                  help="Seconds the fake transport waits per message (default: 0)")
+    load_test_parser.add_argument("--report-file",
+                                  help="Write the results to this JSON file (e.g. to compare runs)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Main entry point: run the command chosen on the command line (the interactive menu by default)."""
+    args = parse_args(argv)
+    configure_output(quiet=args.quiet)
+
+    if args.profile:
+        profile_call(run_command, args, output_dir=args.profile_dir, name=args.command or "menu",
+                     sample_interval=args.sample_interval)
+    else:
+        run_command(args)
+
+def run_command(args):
+    """
+    Run the command chosen on the command line.
+
+    Parameters:
+    args (argparse.Namespace): The parsed arguments.
+    """
+    if args.command == "load":
+        ContactsManager()  # Loading happens when the manager is created
+        return
+
+    if args.command == "simulate":
+        contacts = generate_contacts(args.synthetic, args.seed) if args.synthetic else ContactsManager().get_contacts()
+        result = simulate_day(contacts, args.day, rate=args.rate, domain_rate=args.domain_rate,
+                              window=args.window, keep_outcomes=bool(args.outcome_file))
+        summary.info("%s", result.format_summary())
+        if args.histogram_file:
+            result.write_histogram(args.histogram_file)
+        if args.outcome_file:
+            result.write_outcomes(args.outcome_file)
+        return
+
+    if args.command == "due":
+        show_due(ContactsManager().snapshot(), args.at, args.list)
+        return
+
+    if args.command == "loadtest":
+        load_test = LoadTest(args.contacts, args.seed, FakeTransport(args.latency))
+        load_test.run()
+        summary.info("%s", load_test.format_report())
+        if args.report_file:
+            atomic_write(args.report_file, json.dumps(load_test.to_dict(), indent=4))
+        return
+
+    if args.command == "dedupe":
+        ContactsManager().deduplicate()
+        return
+
+    if args.command == "changes":
+        show_changes(ChangeFeed(feed_path(data_path())), args.since, args.limit, args.consumer)
+        return
+
+    if args.command == "history":
+        history = DeliveryHistory(args.history)
+        try:
+            show_history(history, ContactsManager().snapshot() if args.never_reached else (),
+                         days=args.days, email=args.contact)
+        finally:
+            history.close()
+        return
+
+    if args.command == "recover":
+        history = DeliveryHistory(args.history)
+        try:
+            if not history.is_empty() and not args.replace:
+                logger.error("%s already holds a delivery history. Use --replace to rebuild it from the logs.",
+                             args.history)
+                return
+            state = recover(args.logs or None, args.outbox, args.workers)
+            summary.info("%s", state.format_summary())
+            restored = history.restore(state.stats.values(),
+                                        ((day, action, count) for (day, action), count in state.daily.items()))
+            summary.info("Rebuilt the delivery history of %d contact(s) in %s.", restored, args.history)
+        finally:
+            history.close()
+        if args.restore_contacts:
+            ContactsManager().restore_contacts(state.recovered_contacts())
+        return
+
+    if args.command == "daemon":
+        limiter = RateLimiter(rate=args.rate, domain_rate=args.domain_rate)
+        history = DeliveryHistory(args.history)
+        try:
+            Daemon(ContactsManager(), send=partial(send_greeting, history=history), limiter=limiter).run(
+                poll_interval=args.poll_interval, metrics_file=args.metrics_file)
+        finally:
+            history.close()
+        return
+
+    if args.command == "send":
+        limiter = RateLimiter(rate=args.rate, domain_rate=args.domain_rate)
+        outbox = Outbox(args.outbox)
+        history = DeliveryHistory(args.history)
+        try:
+            if args.resume:
+                # Continue an interrupted run straight from the outbox, without loading the contacts
+                process_outbox(outbox, limiter, history)
+            else:
+                send_messages(ContactsManager(), limiter, outbox, history)
+        finally:
+            outbox.close()
+            history.close()
+
+        # Per-run summary of where the time went
+        summary.info("%s", metrics.format_summary())
+        summary.info("Render cache: %(hits)d hits, %(misses)d misses, %(entries)d entries, %(bytes)d bytes",
+                     render_cache.stats())
+        if args.metrics_file:
+            metrics.write(args.metrics_file)
+    else:
+        # Initialize the ContactsManager to manage contact data
+        menu(ContactsManager())  # The interactive menu sends without rate limits
+
 # Entry point of the program, calls the main function
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,8 +2,22 @@
 
 """
 Module to generate personalized "Good Morning" messages.
+
+Rendered messages are kept in a bounded cache (one entry per recipient), keyed by the
+template version and the contact fields the template uses. The template does not depend on
+the day, so a daemon keeps its hits from one morning to the next, and an entry made stale by
+an edit in another process simply misses because its fields no longer match.
 """
 
+import sys
+from collections import OrderedDict
+
+# The greeting template, the version to bump whenever it changes, and the contact fields it uses
+TEMPLATE = "Good Morning, {name}! Have a great day!"
+TEMPLATE_VERSION = 1
+TEMPLATE_FIELDS = ('name',)
+
+
 def generate_message(name):
     """
     Generate a personalized "Good Morning" message for a given name.
@@ -15,4 +29,112 @@ def generate_message(name):
     str: A personalized "Good Morning" message for the contact.
     """
     # Create and return a message with the given name
-    return f"Good Morning, {name}! Have a great day!"
+    return TEMPLATE.format(name=name)
+
+
+class RenderCache:
+    def __init__(self, max_entries=100000, max_bytes=32 * 1024 * 1024):
+        """
+        Initialize an empty cache.
+
+        Parameters:
+        max_entries (int): The maximum number of cached messages.
+        max_bytes (int): The maximum (approximate) memory used by the cached messages.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # {email: (key, message, size)}, least recently used first
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, contact):
+        """
+        Return the message for a contact, rendering it only if it is not cached.
+
+        Parameters:
+        contact (dict): The contact to greet.
+
+        Returns:
+        str: The personalized message.
+        """
+        email = contact['email']
+        # Only what the message is made of: no day, so no entry expires just because time passed
+        key = (TEMPLATE_VERSION, tuple(contact.get(field) for field in TEMPLATE_FIELDS))
+        entry = self._entries.get(email)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            self._entries.move_to_end(email)
+            return entry[1]
+
+        self.misses += 1
+        message = generate_message(contact['name'])
+        self._store(email, key, message)
+        return message
+
+    def _store(self, email, key, message):
+        """Store a message (replacing the recipient's previous one) and evict the oldest entries if needed."""
+        self.invalidate(email)
+        size = sys.getsizeof(message)
+        self._entries[email] = (key, message, size)
+        self.bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def invalidate(self, email):
+        """
+        Forget the cached message of one recipient (e.g. after their contact was removed),
+        to free its memory early; an edited contact misses anyway since its key changed.
+
+        Parameters:
+        email (str): The recipient's email address.
+        """
+        entry = self._entries.pop(email, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def clear(self):
+        """Forget all cached messages."""
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """
+        Return the cache statistics, to help choosing its size.
+
+        Returns:
+        dict: hits, misses, hit_rate, evictions, entries and bytes.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+        }
+
+
+# The render cache of the current process, shared by all modules
+render_cache = RenderCache()
+
+
+def render_message(contact):
+    """
+    Return the personalized message for a contact, using the shared render cache.
+
+    Parameters:
+    contact (dict): The contact to greet.
+
+    Returns:
+    str: The personalized message.
+    """
+    return render_cache.render(contact)
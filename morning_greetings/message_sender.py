@@ -4,19 +4,25 @@
 Module to simulate sending the messages to each friend.
 """
 
+import logging # Importing logging to report what happens to each message
 import time # Importing time to simulate delays in sending messages
 from datetime import datetime # Importing datetime to handle current and preferred times for sending
+from zoneinfo import ZoneInfo # Importing ZoneInfo to use the contact's own time zone
 import morning_greetings.logger as log # Importing the logger module to log the messages sent or planned
 
+logger = logging.getLogger(__name__)
 
-def calculate_time(contact, message, preferred_time=None):
+
+def calculate_time(contact, message, preferred_time=None, now=None):
     """
     Calculate the appropriate time to send a message based on the contact's preferred time.
 
     Parameters:
-    contact (dict): A dictionary containing the contact's information.
+    contact (dict): A dictionary containing the contact's information. If it has a 'time_zone',
+                    the preferred time is interpreted in that time zone.
     message (str): The message to be sent.
     preferred_time (str): The preferred time at which the message should be sent (optional).
+    now (datetime): The current time (defaults to the clock). Naive times are taken as local time.
     
     Returns:
     str: "planned" if the message is scheduled, "sent" if sent immediately.
@@ -28,7 +34,13 @@ def calculate_time(contact, message, preferred_time=None):
     
     # If a preferred time is provided, simulate waiting until that time to send the message
     if preferred_time:
-        now = datetime.now()  # Get the current date and time
+        # Get the current date and time (in the contact's time zone if they have one)
+        time_zone = contact.get('time_zone')
+        if now is None:
+            now = datetime.now(ZoneInfo(time_zone)) if time_zone else datetime.now()
+        else:
+            now = now.astimezone(ZoneInfo(time_zone) if time_zone else None)
+        now = now.replace(tzinfo=None)
         preferred_time_dt = datetime.strptime(preferred_time, "%I:%M %p")  # Parse the preferred time
         # Set the preferred time to the current date
         preferred_time_dt = preferred_time_dt.replace(year=now.year, month=now.month, day=now.day)
@@ -38,7 +50,8 @@ def calculate_time(contact, message, preferred_time=None):
         
         # If the preferred time is in the future, plan the message to be sent later
         if delay_seconds > 0:
-            print(f"\nThe message will be sent to {contact['name']} with the email address {contact['email']} at the preferred time: {preferred_time}")
+            logger.info("The message will be sent to %s with the email address %s at the preferred time: %s",
+                        contact['name'], contact['email'], preferred_time)
             
             # Simulate message scheduling by setting delay_seconds to 0 for this simulation
             delay_seconds = 0
@@ -48,7 +61,8 @@ def calculate_time(contact, message, preferred_time=None):
         
         # If the preferred time is in the past, send the message immediately and show a warning
         if delay_seconds < 0:
-            print(f"\nPreferred time {preferred_time} has already passed. Sending message immediately to {contact['name']} with the email address {contact['email']}.")
+            logger.info("Preferred time %s has already passed. Sending message immediately to %s with the email address %s.",
+                        preferred_time, contact['name'], contact['email'])
             
             # Simulate sending the message immediately
             delay_seconds = 0
@@ -57,15 +71,16 @@ def calculate_time(contact, message, preferred_time=None):
             return "sent"  # Indicate the message has been sent
     
     if preferred_time == None: 
-        print(f"Sending message to {contact['email']}: {message}")
+        logger.info("Sending message to %s: %s", contact['email'], message)
         return "sent"
 
-def send_message(delay_seconds):
+def send_message(delay_seconds, sleep=time.sleep):
     """
     Simulate sending a message after a delay.
 
     Parameters:
     delay_seconds (int): The number of seconds to wait before sending the message.
+    sleep (callable): Function used to wait (e.g. a simulated clock's sleep).
     """
     # Simulate sending the message by waiting for the specified delay time (0 in this case)
-    time.sleep(delay_seconds)
\ No newline at end of file
+    sleep(delay_seconds)
\ No newline at end of file
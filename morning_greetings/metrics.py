@@ -0,0 +1,219 @@
+# metrics.py
+
+"""
+Module to measure where the time goes during a send run.
+
+It keeps counters (e.g. messages sent) and latency histograms per stage (load, render,
+schedule, send, log). The stages are timed one after the other, never one inside another,
+so no time is counted twice; "send" is only the hand-off of the message to the transport. The numbers can be printed as a summary, or written to a file in the
+Prometheus text format (for the node exporter's textfile collector) or as JSON.
+"""
+
+import json
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from morning_greetings.file_lock import atomic_write
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Parameters:
+        buckets (tuple): Sorted upper bounds of the buckets (an extra +Inf bucket is added).
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """
+        Record one value.
+
+        Parameters:
+        value (float): The value (e.g. a duration in seconds).
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the buckets (the upper bound of the bucket holding it).
+
+        Parameters:
+        q (float): The quantile (e.g. 0.99).
+
+        Returns:
+        float: The estimated value (0 if nothing was recorded).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        """
+        Return the histogram as a dictionary.
+
+        Returns:
+        dict: count, sum, mean, max, p50, p99 and the cumulative bucket counts.
+        """
+        cumulative, seen = {}, 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            seen += count
+            cumulative[str(bound)] = seen
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': cumulative,
+        }
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize empty metrics.
+
+        Parameters:
+        buckets (tuple): Upper bounds of the latency histogram buckets.
+        """
+        self.buckets = buckets
+        # {name: value}
+        self.counters = {}
+        # {stage: Histogram}
+        self.histograms = {}
+        self.started = time.time()
+
+    def reset(self):
+        """Forget everything recorded so far (e.g. at the start of a run)."""
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.time()
+
+    def increment(self, name, amount=1):
+        """
+        Increase a counter.
+
+        Parameters:
+        name (str): The counter name (e.g. "messages_sent").
+        amount (int): How much to add.
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage, seconds):
+        """
+        Record how long one operation of a stage took.
+
+        Parameters:
+        stage (str): The stage (e.g. "render").
+        seconds (float): The duration.
+        """
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        Measure the duration of the block as one operation of a stage.
+
+        Parameters:
+        stage (str): The stage (e.g. "send").
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self):
+        """
+        Return everything recorded as a dictionary.
+
+        Returns:
+        dict: The counters, the stage histograms and the run duration.
+        """
+        return {
+            'duration_seconds': time.time() - self.started,
+            'counters': dict(self.counters),
+            'stages': {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+        }
+
+    def format_summary(self):
+        """
+        Return a short human-readable summary of the run.
+
+        Returns:
+        str: One line for the counters and one line per stage.
+        """
+        lines = [f"Run took {time.time() - self.started:.3f} s. "
+                 + ", ".join(f"{name}: {value}" for name, value in sorted(self.counters.items()))]
+        for stage, histogram in self.histograms.items():
+            lines.append(f"  {stage:<9} n={histogram.count:<8} total={histogram.sum:.3f} s "
+                         f"p50={histogram.quantile(0.5) * 1000:.3f} ms p99={histogram.quantile(0.99) * 1000:.3f} ms "
+                         f"max={histogram.max * 1000:.3f} ms")
+        return "\n".join(lines)
+
+    def to_prometheus(self):
+        """
+        Return everything recorded in the Prometheus text exposition format.
+
+        Returns:
+        str: The metrics text.
+        """
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE morning_greetings_{name}_total counter")
+            lines.append(f"morning_greetings_{name}_total {value}")
+        if self.histograms:
+            lines.append("# TYPE morning_greetings_stage_seconds histogram")
+        for stage, histogram in self.histograms.items():
+            seen = 0
+            for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                seen += count
+                lines.append(f'morning_greetings_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {seen}')
+            lines.append(f'morning_greetings_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'morning_greetings_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines.append("# TYPE morning_greetings_run_duration_seconds gauge")
+        lines.append(f"morning_greetings_run_duration_seconds {time.time() - self.started}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Write the metrics to a file: JSON if the name ends with ".json", Prometheus text otherwise.
+
+        The file is replaced atomically, so a scraper never reads a partial file.
+
+        Parameters:
+        path (str): The file to write.
+        """
+        if path.endswith(".json"):
+            text = json.dumps(self.summary(), indent=4)
+        else:
+            text = self.to_prometheus()
+        atomic_write(path, text)
+
+
+# The metrics of the current process, shared by all modules
+metrics = Metrics()
@@ -0,0 +1,201 @@
+# minute_index.py
+
+"""
+Module to answer "who is due" questions for all contacts at once.
+
+The preferred time of every contact is kept as a minute since midnight in a compact int16
+array, next to the contact's time zone (as a small integer code) and the UTC minute it is
+due at on the chosen day. "Who is due at this minute", "whose time has already passed" and
+"how many contacts per minute" then become array operations (masks, binary searches and
+counting) instead of datetime calculations per contact.
+
+NumPy is used when it is installed (pip install morning_greetings[fast]), which handles
+millions of contacts in milliseconds. Without it the same operations run on the standard
+library's array module.
+
+index_for() keeps the last index built, so asking again about the same snapshot of the
+contacts on the same day costs nothing.
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from morning_greetings.scheduler import minute_of_day, utc_offset_minutes
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+MINUTES_PER_DAY = 1440
+
+
+class MinuteIndex:
+    def __init__(self, contacts, day=None, use_numpy=None):
+        """
+        Index the preferred times of the contacts.
+
+        Parameters:
+        contacts (iterable): The contacts (e.g. a snapshot from ContactsManager).
+        day (date): The UTC day the UTC minutes are computed for (defaults to today).
+        use_numpy (bool): Use NumPy (defaults to True when it is installed).
+
+        Raises:
+        ValueError: If use_numpy is True but NumPy is not installed.
+        """
+        if use_numpy is None:
+            use_numpy = np is not None
+        elif use_numpy and np is None:
+            raise ValueError("NumPy is not installed (pip install morning_greetings[fast])")
+        self.use_numpy = use_numpy
+        self.contacts = tuple(contacts)
+        self.day = day or datetime.now(timezone.utc).date()
+
+        # Number the time zones: {time zone: code}, and the time zone of each code
+        codes = {}
+        local = array('h')
+        zone_codes = array('h')
+        for contact in self.contacts:
+            time_zone = contact.get('time_zone')
+            code = codes.get(time_zone)
+            if code is None:
+                code = codes[time_zone] = len(codes)
+            local.append(minute_of_day(contact['preferred_time']))
+            zone_codes.append(code)
+        self.time_zones = list(codes)
+        offsets = [utc_offset_minutes(time_zone, self.day) for time_zone in self.time_zones]
+
+        if use_numpy:
+            self.local_minutes = np.frombuffer(local, dtype=np.int16).copy()
+            self.zone_codes = np.frombuffer(zone_codes, dtype=np.int16).copy()
+            utc = (self.local_minutes - np.array(offsets, dtype=np.int16)[self.zone_codes]) % MINUTES_PER_DAY
+            self.utc_minutes = utc.astype(np.int16)
+            # Contacts sorted by UTC minute, for binary searches
+            self._order = np.argsort(self.utc_minutes, kind="stable")
+            self._sorted = self.utc_minutes[self._order]
+        else:
+            self.local_minutes = local
+            self.zone_codes = zone_codes
+            self.utc_minutes = array('h', ((minute - offsets[code]) % MINUTES_PER_DAY
+                                           for minute, code in zip(local, zone_codes)))
+            self._order = sorted(range(len(self.contacts)), key=self.utc_minutes.__getitem__)
+            self._sorted = array('h', (self.utc_minutes[i] for i in self._order))
+
+    def __len__(self):
+        return len(self.contacts)
+
+    def _between(self, start, stop):
+        """Return the positions (in self.contacts) of the contacts due from minute start to stop (not included)."""
+        if self.use_numpy:
+            first, last = np.searchsorted(self._sorted, [start, stop], side="left")
+            return self._order[first:last].tolist()  # Python ints index the tuple much faster
+        first, last = bisect_left(self._sorted, start), bisect_left(self._sorted, stop)
+        return self._order[first:last]
+
+    def due(self, utc_minute):
+        """
+        Retrieve the contacts due at a UTC minute of the day.
+
+        Parameters:
+        utc_minute (int): The UTC minute of the day (0-1439).
+
+        Returns:
+        list: The contacts due at that minute.
+        """
+        return self.due_between(utc_minute, utc_minute + 1)
+
+    def due_between(self, start, stop):
+        """
+        Retrieve the contacts due from one UTC minute of the day to another.
+
+        Parameters:
+        start (int): The first UTC minute of the day.
+        stop (int): The UTC minute to stop at (not included).
+
+        Returns:
+        list: The contacts due in that range, in order of their UTC minute.
+        """
+        return [self.contacts[i] for i in self._between(start, stop)]
+
+    def passed_mask(self, now=None):
+        """
+        Tell for every contact whether their preferred time has passed today in their own time zone.
+
+        This is the same decision calculate_time makes for one contact ("sent" when the
+        preferred time has passed, "planned" otherwise), computed for all contacts at once.
+
+        Parameters:
+        now (datetime): The current time (defaults to now). Naive times are taken as local time.
+
+        Returns:
+        numpy.ndarray or list: True per contact whose preferred time has passed.
+        """
+        now = now or datetime.now().astimezone()
+        # The local time of day (in seconds) in each time zone
+        seconds = []
+        for time_zone in self.time_zones:
+            local_now = now.astimezone(ZoneInfo(time_zone) if time_zone else None)
+            seconds.append(local_now.hour * 3600 + local_now.minute * 60 + local_now.second
+                           + local_now.microsecond / 1e6)
+        if self.use_numpy:
+            return self.local_minutes.astype(np.int32) * 60 < np.array(seconds)[self.zone_codes]
+        return [minute * 60 < seconds[code] for minute, code in zip(self.local_minutes, self.zone_codes)]
+
+    def overdue(self, now=None):
+        """
+        Retrieve the contacts whose preferred time has already passed today.
+
+        Parameters:
+        now (datetime): The current time (defaults to now).
+
+        Returns:
+        list: The contacts.
+        """
+        mask = self.passed_mask(now)
+        if self.use_numpy:
+            return [self.contacts[i] for i in np.flatnonzero(mask).tolist()]
+        return [contact for contact, passed in zip(self.contacts, mask) if passed]
+
+    def volume(self):
+        """
+        Count the contacts due at each UTC minute of the day.
+
+        Returns:
+        list: 1440 counts, one per UTC minute of the day.
+        """
+        if self.use_numpy:
+            return np.bincount(self.utc_minutes, minlength=MINUTES_PER_DAY).tolist()
+        counts = [0] * MINUTES_PER_DAY
+        for minute in self.utc_minutes:
+            counts[minute] += 1
+        return counts
+
+
+# The last index built by index_for, reused while the snapshot and the day stay the same
+_last_index = None
+
+
+def index_for(contacts, day=None):
+    """
+    Return the index of a snapshot of the contacts, reusing the last one built if it was
+    built for the same snapshot and day.
+
+    ContactsManager.snapshot() returns the same tuple until a contact changes, so the
+    snapshot itself tells whether the index is still up to date. Lists (which can change in
+    place) always get a new index.
+
+    Parameters:
+    contacts (iterable): The contacts (e.g. a snapshot from ContactsManager).
+    day (date): The UTC day the UTC minutes are computed for (defaults to today).
+
+    Returns:
+    MinuteIndex: The index.
+    """
+    global _last_index
+    day = day or datetime.now(timezone.utc).date()
+    index = _last_index
+    if index is None or index.contacts is not contacts or index.day != day:
+        index = _last_index = MinuteIndex(contacts, day)
+    return index
@@ -0,0 +1,219 @@
+# name_index.py
+
+"""
+Module to find contacts by name, even when the name is incomplete or misspelled.
+
+Exact lookups use a dictionary. For searches, the index also keeps the names in a sorted
+list (for prefix lookups with a binary search) and in an inverted index of trigrams
+(three-letter pieces of the name, for typo-tolerant lookups). Both are only built on the
+first search, so loading the contacts does not pay for them. A search only looks at the
+names that share one of the query's rarest trigrams, instead of comparing the query with
+every name.
+"""
+
+from bisect import bisect_left, insort
+from math import ceil
+
+
+def normalize_name(name):
+    """
+    Return the form of a name used for comparisons (lower case, single spaces).
+
+    Parameters:
+    name (str): The name.
+
+    Returns:
+    str: The normalized name.
+    """
+    return " ".join(name.lower().split())
+
+
+def trigrams(text):
+    """
+    Return the set of trigrams of a normalized name.
+
+    The name is padded so that its first letters (and its end) also form trigrams, which
+    makes names with the same beginning score higher.
+
+    Parameters:
+    text (str): The normalized name.
+
+    Returns:
+    set: The trigrams.
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    def __init__(self, contacts=(), max_postings=1000):
+        """
+        Initialize the index.
+
+        Parameters:
+        contacts (iterable): The contacts to index.
+        max_postings (int): Trigrams found in more names than this (e.g. the trigrams of a
+                            common first name) are skipped when picking the names to compare,
+                            as long as the query has rarer trigrams.
+        """
+        self.max_postings = max_postings
+        # {normalized name: list of contacts with that name}
+        self._names = {}
+        # {trigram: set of normalized names containing it}, None until the first search
+        self._grams = None
+        # All normalized names, sorted, for prefix lookups (None until the first search)
+        self._sorted = None
+        self.rebuild(contacts)
+
+    def __len__(self):
+        return len(self._names)
+
+    def rebuild(self, contacts):
+        """
+        Replace the content of the index.
+
+        Parameters:
+        contacts (iterable): The contacts to index.
+        """
+        self._names = {}
+        self._grams = None
+        self._sorted = None
+        for contact in contacts:
+            key = normalize_name(contact['name'])
+            homonyms = self._names.get(key)
+            if homonyms is None:
+                self._names[key] = [contact]
+            else:
+                homonyms.append(contact)
+
+    def _build_search_index(self):
+        """Build the sorted name list and the trigram index (before the first search)."""
+        grams = {}
+        for key in self._names:
+            for gram in trigrams(key):
+                names = grams.get(gram)
+                if names is None:
+                    grams[gram] = {key}
+                else:
+                    names.add(key)
+        self._grams = grams
+        self._sorted = sorted(self._names)
+
+    def clear(self):
+        """Remove every contact from the index."""
+        self.rebuild(())
+
+    def add(self, contact):
+        """
+        Add a contact to the index.
+
+        Parameters:
+        contact (dict): The contact.
+        """
+        key = normalize_name(contact['name'])
+        homonyms = self._names.get(key)
+        if homonyms is not None:
+            homonyms.append(contact)
+            return
+        self._names[key] = [contact]
+        if self._grams is not None:
+            for gram in trigrams(key):
+                self._grams.setdefault(gram, set()).add(key)
+            insort(self._sorted, key)
+
+    def remove(self, contact):
+        """
+        Remove a contact (the same dictionary that was added) from the index.
+
+        Parameters:
+        contact (dict): The contact.
+        """
+        key = normalize_name(contact['name'])
+        homonyms = self._names.get(key)
+        if not homonyms:
+            return
+        for i, indexed in enumerate(homonyms):
+            if indexed is contact:
+                del homonyms[i]
+                break
+        else:
+            return
+        if homonyms:
+            return
+
+        # The last contact with this name is gone: forget the name too
+        del self._names[key]
+        if self._grams is None:
+            return
+        for gram in trigrams(key):
+            names = self._grams.get(gram)
+            if names is not None:
+                names.discard(key)
+                if not names:
+                    del self._grams[gram]
+        del self._sorted[bisect_left(self._sorted, key)]
+
+    def exact(self, name):
+        """
+        Return the contacts with exactly this name (ignoring case and extra spaces).
+
+        Parameters:
+        name (str): The name.
+
+        Returns:
+        list: The matching contacts.
+        """
+        return list(self._names.get(normalize_name(name), ()))
+
+    def search(self, name, limit=5, min_score=0.5):
+        """
+        Return the contacts whose name starts with, or looks like, the given name.
+
+        Names are ranked by similarity: an exact match scores 1, a name starting with the
+        query scores at least 0.5, and other names score their trigram similarity (Dice
+        coefficient between 0 and 1).
+
+        Parameters:
+        name (str): The (partial or misspelled) name to look for.
+        limit (int): The maximum number of names to return.
+        min_score (float): The minimum similarity of a misspelled name.
+
+        Returns:
+        list: The contacts with the best matching names, best first.
+        """
+        query = normalize_name(name)
+        if not query:
+            return []
+        if self._grams is None:
+            self._build_search_index()
+        scores = {}
+
+        # Names starting with the query are next to each other in the sorted list
+        i = bisect_left(self._sorted, query)
+        while i < len(self._sorted) and len(scores) < limit and self._sorted[i].startswith(query):
+            key = self._sorted[i]
+            scores[key] = 0.5 + 0.5 * len(query) / len(key)
+            i += 1
+
+        # A name reaching min_score shares at least `needed` trigrams with the query, so it
+        # contains one of the query's (len(grams) - needed + 1) rarest trigrams
+        grams = trigrams(query)
+        needed = max(1, ceil(min_score * len(grams) / (2 - min_score)))
+        postings = sorted((self._grams.get(gram, ()) for gram in grams), key=len)
+        postings = postings[:len(grams) - needed + 1]
+        # Very common trigrams would bring in most of the names: skip them if rarer ones are
+        # left, and only fall back to the rarest one if the prefix lookup found too few names
+        rare = [names for names in postings if len(names) <= self.max_postings]
+        if any(rare):
+            postings = rare
+        else:
+            postings = postings[:1] if len(scores) < limit else []
+        candidates = set().union(*postings)
+        for key in candidates:
+            key_grams = trigrams(key)
+            score = 2 * len(grams & key_grams) / (len(grams) + len(key_grams))
+            if score >= min_score and score > scores.get(key, 0):
+                scores[key] = score
+
+        ranked = sorted(scores, key=lambda key: (-scores[key], key))[:limit]
+        return [contact for key in ranked for contact in self._names[key]]
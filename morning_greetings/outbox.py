@@ -0,0 +1,213 @@
+# outbox.py
+
+"""
+Module to keep the greetings that still have to be sent in a durable queue (an SQLite file).
+
+Each greeting is a job that goes through the states pending -> in_flight -> sent. A failed
+job goes back to pending with an exponential backoff, and after too many attempts it is
+moved to the dead-letter list (state "dead"). Jobs claimed by a process that died are
+released again when their lease expires, so a new run picks up where the old one stopped
+without planning everything again.
+"""
+
+import json
+import sqlite3
+import time
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+SENT = "sent"
+DEAD = "dead"
+
+
+class Outbox:
+    def __init__(self, path="outbox.db", max_attempts=5, base_delay=30, lease=300, clock=time.time):
+        """
+        Open (or create) the outbox.
+
+        Parameters:
+        path (str): The SQLite file holding the queue.
+        max_attempts (int): Attempts before a job is moved to the dead-letter list.
+        base_delay (float): Seconds to wait before the first retry (doubled for each attempt).
+        lease (float): Seconds a claimed job may stay in flight before it is released again.
+        clock (callable): Function returning the current time in seconds.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.lease = lease
+        self.clock = clock
+        # Autocommit mode: transactions are started explicitly where they are needed
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                email TEXT NOT NULL,
+                run_date TEXT NOT NULL,
+                contact TEXT NOT NULL,
+                message TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL DEFAULT 0,
+                lease_until REAL,
+                last_error TEXT,
+                UNIQUE (email, run_date)
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, next_attempt)")
+
+    def close(self):
+        """Close the outbox file."""
+        self.connection.close()
+
+    def enqueue(self, contact, message, run_date):
+        """
+        Add a greeting to the queue (once per contact and day).
+
+        Parameters:
+        contact (dict): The contact to greet.
+        message (str): The message to send.
+        run_date (str): The day the greeting belongs to (e.g. "2024-01-31").
+
+        Returns:
+        bool: True if the job was added, False if the contact already has a job for that day.
+        """
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO jobs (email, run_date, contact, message) VALUES (?, ?, ?, ?)",
+            (contact['email'], run_date, json.dumps(contact), message))
+        return cursor.rowcount == 1
+
+    def enqueue_many(self, jobs, run_date):
+        """
+        Add many greetings to the queue in one transaction.
+
+        Parameters:
+        jobs (iterable): Pairs of (contact, message).
+        run_date (str): The day the greetings belong to.
+
+        Returns:
+        int: The number of jobs added.
+        """
+        with self.connection:
+            self.connection.execute("BEGIN")
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO jobs (email, run_date, contact, message) VALUES (?, ?, ?, ?)",
+                ((contact['email'], run_date, json.dumps(contact), message) for contact, message in jobs))
+            return self.connection.total_changes - before
+
+    def claim(self, batch_size=100):
+        """
+        Claim a batch of jobs that are ready to be sent.
+
+        Parameters:
+        batch_size (int): The maximum number of jobs to claim.
+
+        Returns:
+        list: The claimed jobs as dictionaries (id, contact, message, attempts).
+        """
+        now = self.clock()
+        with self.connection:
+            # BEGIN IMMEDIATE: no other process can claim the same jobs in the meantime
+            self.connection.execute("BEGIN IMMEDIATE")
+            # Release the jobs of processes that died while sending them
+            self.connection.execute("UPDATE jobs SET state = ?, lease_until = NULL WHERE state = ? AND lease_until < ?",
+                                    (PENDING, IN_FLIGHT, now))
+            rows = self.connection.execute(
+                "SELECT id, contact, message, attempts FROM jobs WHERE state = ? AND next_attempt <= ? "
+                "ORDER BY next_attempt, id LIMIT ?", (PENDING, now, batch_size)).fetchall()
+            self.connection.executemany("UPDATE jobs SET state = ?, lease_until = ? WHERE id = ?",
+                                        ((IN_FLIGHT, now + self.lease, row['id']) for row in rows))
+
+        jobs = []
+        for row in rows:
+            contact = json.loads(row['contact'])
+            jobs.append({'id': row['id'], 'email': contact['email'], 'contact': contact,
+                         'message': row['message'], 'attempts': row['attempts']})
+        return jobs
+
+    def complete(self, job_id):
+        """
+        Mark a job as sent.
+
+        Parameters:
+        job_id (int): The job to mark.
+        """
+        self.connection.execute("UPDATE jobs SET state = ?, lease_until = NULL WHERE id = ?", (SENT, job_id))
+
+    def fail(self, job_id, error):
+        """
+        Record a failed attempt: retry later with exponential backoff, or give up after max_attempts.
+
+        Parameters:
+        job_id (int): The job that failed.
+        error (str): The error message.
+
+        Returns:
+        str: The new state of the job ("pending" or "dead").
+        """
+        attempts = self.connection.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0] + 1
+        if attempts >= self.max_attempts:
+            state, next_attempt = DEAD, 0
+        else:
+            state, next_attempt = PENDING, self.clock() + self.base_delay * 2 ** (attempts - 1)
+        self.connection.execute(
+            "UPDATE jobs SET state = ?, attempts = ?, next_attempt = ?, lease_until = NULL, last_error = ? WHERE id = ?",
+            (state, attempts, next_attempt, str(error), job_id))
+        return state
+
+    def counts(self):
+        """
+        Count the jobs in each state.
+
+        Returns:
+        dict: {state: number of jobs}.
+        """
+        counts = {PENDING: 0, IN_FLIGHT: 0, SENT: 0, DEAD: 0}
+        for state, count in self.connection.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+            counts[state] = count
+        return counts
+
+    def dead_letters(self):
+        """
+        Retrieve the jobs that were given up on.
+
+        Returns:
+        list: Dictionaries with the contact, message, attempts and last error of each dead job.
+        """
+        rows = self.connection.execute(
+            "SELECT contact, message, attempts, last_error FROM jobs WHERE state = ? ORDER BY id", (DEAD,))
+        return [{'contact': json.loads(row['contact']), 'message': row['message'],
+                 'attempts': row['attempts'], 'last_error': row['last_error']} for row in rows]
+
+    def process(self, send, batch_size=100, limiter=None):
+        """
+        Send every job that is ready, batch by batch.
+
+        A job is marked as sent when send() returns, and as failed when it raises any
+        exception, so a message that can never be sent (e.g. a broken contact record) is
+        retried with backoff and then dead-lettered instead of blocking the queue.
+
+        Parameters:
+        send (callable): Function called with (contact, message) for each job.
+        batch_size (int): The number of jobs claimed at a time.
+        limiter (RateLimiter): Limits how fast the jobs are sent (optional).
+
+        Returns:
+        tuple: The number of jobs (sent, failed).
+        """
+        sent = failed = 0
+        while True:
+            jobs = self.claim(batch_size)
+            if not jobs:
+                return (sent, failed)
+            for job in (limiter.throttle(jobs) if limiter else jobs):
+                try:
+                    send(job['contact'], job['message'])
+                except Exception as e:  # Invalid message, bad contact record, transport or history error
+                    self.fail(job['id'], e if isinstance(e, ValueError) else f"{type(e).__name__}: {e}")
+                    failed += 1
+                else:
+                    self.complete(job['id'])
+                    sent += 1
@@ -0,0 +1,33 @@
+# output.py
+
+"""
+Module to set up the program's output.
+
+Every module logs through the standard logging module (under the "morning_greetings"
+logger), with lazy %-style formatting, so messages that are not shown are never built.
+Per-record messages (contact added, message planned, ...) are logged at INFO level, problems
+at WARNING or ERROR. Aggregated summaries go to the "morning_greetings.summary" logger,
+which stays visible in quiet mode.
+"""
+
+import logging
+import sys
+
+# Logger for aggregated, once-per-run messages (shown even in quiet mode)
+summary = logging.getLogger("morning_greetings.summary")
+
+
+def configure_output(quiet=False):
+    """
+    Print the package's log messages to stdout.
+
+    Parameters:
+    quiet (bool): Only print warnings, errors and summaries (skip the per-record messages).
+    """
+    package_logger = logging.getLogger("morning_greetings")
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    package_logger.handlers = [handler]
+    package_logger.propagate = False
+    package_logger.setLevel(logging.WARNING if quiet else logging.INFO)
+    summary.setLevel(logging.INFO)
@@ -0,0 +1,145 @@
+# profiling.py
+
+"""
+Module to profile any operation of the program.
+
+It runs the operation under cProfile (time per function) and tracemalloc (memory per
+allocation site), writes the results to files that can be opened later, and prints the
+hottest functions and the biggest allocation sites. Optionally, a background thread samples
+the call stack at a fixed interval and writes the stacks in the "folded" format used by
+flamegraph tools (flamegraph.pl, speedscope, inferno).
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from morning_greetings.output import summary
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, thread_id, interval=0.005):
+        """
+        Initialize a sampler for one thread.
+
+        Parameters:
+        thread_id (int): The identifier of the thread to sample (threading.get_ident()).
+        interval (float): Seconds between two samples.
+        """
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # {"outer;inner;innermost": number of samples}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Sample the stack of the target thread until stopped."""
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        """Stop sampling and wait for the thread to finish."""
+        self._stop_event.set()
+        self.join()
+
+    def write_folded(self, path):
+        """
+        Write the sampled stacks in the folded format ("frame;frame;frame count" per line).
+
+        Parameters:
+        path (str): The file to write.
+        """
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+def profile_call(func, *args, output_dir=".", name="profile", sample_interval=None, top=15, **kwargs):
+    """
+    Call a function under cProfile and tracemalloc, write the results and print the hot spots.
+
+    Files written to output_dir:
+    <name>.prof (pstats, e.g. for snakeviz), <name>.tracemalloc (tracemalloc snapshot) and,
+    with sampling, <name>.folded (stacks for a flamegraph).
+
+    Parameters:
+    func (callable): The operation to profile.
+    *args, **kwargs: Arguments passed to func.
+    output_dir (str): Directory for the result files.
+    name (str): Base name of the result files.
+    sample_interval (float): Seconds between stack samples (None for no sampling).
+    top (int): Number of functions and allocation sites to print.
+
+    Returns:
+    The value returned by func.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, name)
+
+    sampler = None
+    if sample_interval:
+        sampler = StackSampler(threading.get_ident(), sample_interval)
+        sampler.start()
+    tracemalloc.start(25)  # Keep 25 frames per allocation to find the real allocation site
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - started
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if sampler:
+            sampler.stop()
+
+        profiler.dump_stats(f"{base}.prof")
+        snapshot.dump(f"{base}.tracemalloc")
+        if sampler:
+            sampler.write_folded(f"{base}.folded")
+
+        summary.info("%s", format_report(profiler, snapshot, elapsed, peak, top))
+        summary.info("Profile written to %s.prof and %s.tracemalloc%s", base, base,
+                     f" (stack samples in {base}.folded)" if sampler else "")
+
+
+def format_report(profiler, snapshot, elapsed, peak, top=15):
+    """
+    Format the hottest functions and the biggest allocation sites.
+
+    Parameters:
+    profiler (cProfile.Profile): The finished profiler.
+    snapshot (tracemalloc.Snapshot): The memory snapshot.
+    elapsed (float): Wall time of the operation in seconds.
+    peak (int): Peak traced memory in bytes.
+    top (int): Number of entries to show.
+
+    Returns:
+    str: The report.
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+
+    lines = [f"Wall time: {elapsed:.3f} s, peak traced memory: {peak / 1024:.1f} KiB",
+             f"Top {top} functions by cumulative time:",
+             stream.getvalue().strip(),
+             f"Top {top} allocation sites:"]
+    for statistic in snapshot.statistics("lineno")[:top]:
+        frame = statistic.traceback[0]
+        lines.append(f"  {frame.filename}:{frame.lineno}: {statistic.size / 1024:.1f} KiB in {statistic.count} block(s)")
+    return "\n".join(lines)
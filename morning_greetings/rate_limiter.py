@@ -0,0 +1,197 @@
+# rate_limiter.py
+
+"""
+Module to limit how fast messages are sent.
+
+A token bucket limits the total number of messages per second, and one bucket per email
+domain limits how many messages a single mail provider receives per second. Contacts are
+sent in round-robin order over their domains, so one throttled domain does not hold up
+the contacts of the other domains.
+"""
+
+import time
+from collections import deque
+
+
+def email_domain(email):
+    """
+    Return the domain part of an email address.
+
+    Parameters:
+    email (str): The email address.
+
+    Returns:
+    str: The domain (e.g. "example.com").
+    """
+    return email.rsplit('@', 1)[-1]
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        """
+        Initialize a full token bucket.
+
+        Parameters:
+        rate (float): Number of tokens added per second.
+        burst (float): Maximum number of tokens in the bucket (defaults to the rate, at least 1).
+        clock (callable): Function returning the current time in seconds.
+        """
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        """Add the tokens earned since the last refill."""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """
+        Calculate how long to wait before a token is available.
+
+        Returns:
+        float: Seconds to wait (0 if a token is available now).
+        """
+        self._refill()
+        if self.tokens >= 1 - 1e-9:  # Tolerate floating point rounding left after waiting
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Take one token from the bucket."""
+        self._refill()
+        self.tokens -= 1
+
+
+class RateLimiter:
+    def __init__(self, rate=10, domain_rate=2, burst=None, domain_burst=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        """
+        Initialize the rate limiter.
+
+        Parameters:
+        rate (float): Maximum messages per second in total (None for no global limit).
+        domain_rate (float): Maximum messages per second to one email domain (None for no limit).
+        burst (float): Messages that may be sent at once before the global rate applies.
+        domain_burst (float): Messages that may be sent at once to one domain.
+        clock (callable): Function returning the current time in seconds.
+        sleep (callable): Function used to wait.
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.domain_rate = domain_rate
+        self.domain_burst = domain_burst
+        self.global_bucket = TokenBucket(rate, burst, clock) if rate else None
+        self._domain_buckets = {}
+
+    def _domain_bucket(self, domain):
+        """
+        Return the bucket of an email domain (created on first use).
+
+        Parameters:
+        domain (str): The email domain.
+
+        Returns:
+        TokenBucket or None: The bucket, or None if domains are not limited.
+        """
+        if not self.domain_rate:
+            return None
+        bucket = self._domain_buckets.get(domain)
+        if bucket is None:
+            bucket = self._domain_buckets[domain] = TokenBucket(self.domain_rate, self.domain_burst, self.clock)
+        return bucket
+
+    def wait_time(self, domain):
+        """
+        Calculate how long to wait before a message can be sent to a domain.
+
+        Parameters:
+        domain (str): The email domain.
+
+        Returns:
+        float: Seconds to wait (0 if a message can be sent now).
+        """
+        buckets = (self.global_bucket, self._domain_bucket(domain))
+        return max((bucket.wait_time() for bucket in buckets if bucket), default=0.0)
+
+    def _take(self, domain):
+        """Take a token from the global bucket and from the domain's bucket."""
+        for bucket in (self.global_bucket, self._domain_bucket(domain)):
+            if bucket:
+                bucket.take()
+
+    def global_wait_time(self):
+        """
+        Calculate how long to wait before the global limit allows another message.
+
+        Returns:
+        float: Seconds to wait (0 if a message can be sent now).
+        """
+        return self.global_bucket.wait_time() if self.global_bucket else 0.0
+
+    def try_acquire(self, email):
+        """
+        Take the tokens for a message to the given email address, without waiting.
+
+        Parameters:
+        email (str): The recipient's email address.
+
+        Returns:
+        bool: True if the message can be sent now, False if the limits do not allow it yet.
+        """
+        domain = email_domain(email)
+        if self.wait_time(domain) > 0:
+            return False
+        self._take(domain)
+        return True
+
+    def acquire(self, email):
+        """
+        Wait until a message can be sent to the given email address.
+
+        Parameters:
+        email (str): The recipient's email address.
+        """
+        domain = email_domain(email)
+        wait = self.wait_time(domain)
+        while wait > 0:
+            self.sleep(wait)
+            wait = self.wait_time(domain)
+        self._take(domain)
+
+    def throttle(self, contacts):
+        """
+        Yield the contacts no faster than the limits allow.
+
+        Contacts are taken round-robin from one queue per domain, so while one domain waits
+        for its limit the contacts of the other domains keep being sent.
+
+        Parameters:
+        contacts (iterable): The contacts to send to.
+
+        Yields:
+        dict: The next contact that can be sent to right now.
+        """
+        queues = {}
+        for contact in contacts:
+            queues.setdefault(email_domain(contact['email']), deque()).append(contact)
+
+        while queues:
+            shortest_wait = None
+            for domain in list(queues):
+                wait = self.wait_time(domain)
+                if wait > 0:
+                    shortest_wait = wait if shortest_wait is None else min(shortest_wait, wait)
+                    continue
+                self._take(domain)
+                queue = queues[domain]
+                yield queue.popleft()
+                if not queue:
+                    del queues[domain]
+                shortest_wait = 0.0
+            if shortest_wait:
+                # Nothing could be sent in this round: wait for the first domain to become ready
+                self.sleep(shortest_wait)
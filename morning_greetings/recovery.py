@@ -0,0 +1,426 @@
+# recovery.py
+
+"""
+Module to rebuild the delivery history and lost contacts from the message logs.
+
+The sent and planned logs are append-only text files with one line per message:
+
+    2024-01-31 08:00:00.123456 - Sent to Alice (alice@example.com) at 08:00 AM: Good Morning, Alice!
+
+Large logs are split into byte ranges that are parsed in parallel by several processes.
+Each range is read line by line and reduced to totals per contact and per day, the same
+totals DeliveryHistory keeps, so the memory used depends on the number of contacts, not on
+the size of the logs. Lines
+that do not look like log entries (torn writes, editor damage, other text) are counted and
+skipped instead of stopping the recovery.
+
+The outbox is read as well when it exists: its jobs hold the full contact records (with
+time zones, which the logs do not contain) and its dead letters are the failed messages.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+
+from morning_greetings.history import SENT, PLANNED, FAILED
+
+logger = logging.getLogger(__name__)
+
+LOG_FILES = ("sent_messages_log.txt", "planned_messages_log.txt")
+
+# Bytes parsed by one worker at a time
+CHUNK_SIZE = 32 * 2 ** 20
+
+SENT_TO = b" - Sent to "
+AT = b") at "
+
+
+def split_line(line):
+    """
+    Cut one log line into its fields without decoding it.
+
+    The fields are found with plain searches instead of a regular expression: the name runs
+    from "Sent to " to the last " (" before ") at ", so names with parentheses are kept.
+
+    Parameters:
+    line (bytes): The line.
+
+    Returns:
+    tuple or None: (timestamp, day, name, email, preferred time) as bytes, or None if the
+                   line is not a log entry. The timestamp ("YYYY-MM-DD HH:MM:SS[.ffffff]")
+                   sorts like the time it stands for.
+    """
+    sent_to = line.find(SENT_TO, 19, 40)
+    if sent_to < 0 or line[4:5] != b"-" or line[10:11] not in (b" ", b"T"):
+        return None
+    at = line.find(AT, sent_to)
+    if at < 0:
+        return None
+    email_start = line.rfind(b" (", sent_to, at)
+    end = line.find(b": ", at + 5)
+    if email_start < 0 or end < 0 or b"@" not in line[email_start:at]:
+        return None
+    return (line[:sent_to], line[:10], line[sent_to + len(SENT_TO):email_start], line[email_start + 2:at],
+            line[at + 5:end])
+
+
+def to_timestamp(stamp, hours=None):
+    """
+    Convert a log timestamp to seconds.
+
+    Parameters:
+    stamp (bytes): The timestamp of a log line (local time).
+    hours (dict): Cache of the start of each hour, {b"YYYY-MM-DD HH": seconds} (optional).
+                  Converting a local time is slow, and log lines share few distinct hours.
+
+    Returns:
+    float or None: The timestamp in seconds, or None if it is not a valid time (e.g. a damaged date).
+    """
+    try:
+        if hours is None:
+            return datetime.fromisoformat(stamp.decode()).timestamp()
+        hour = stamp[:13]
+        start = hours.get(hour)
+        if start is None:
+            start = hours[hour] = datetime.fromisoformat(hour.decode() + ":00").timestamp()
+        return start + int(stamp[14:16]) * 60 + float(stamp[17:])
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_line(line):
+    """
+    Parse one log line.
+
+    Parameters:
+    line (bytes): The line.
+
+    Returns:
+    tuple or None: (day, timestamp in seconds, name, email, preferred time or None),
+                   or None if the line is not a log entry.
+    """
+    fields = split_line(line)
+    if fields is None:
+        return None
+    stamp, day, name, email, preferred_time = fields
+    at = to_timestamp(stamp)
+    if at is None:
+        return None
+    preferred_time = preferred_time.decode(errors="replace")
+    return (day.decode(), at, name.decode(errors="replace"), email.decode(errors="replace"),
+            None if preferred_time == "N/A" else preferred_time)
+
+
+def log_action(path):
+    """
+    Tell which outcome a log file holds from its name (backups keep the name as a prefix).
+
+    Parameters:
+    path (str): The log file.
+
+    Returns:
+    str: "planned" for planned logs, "sent" otherwise.
+    """
+    return PLANNED if "planned" in os.path.basename(path) else SENT
+
+
+def default_logs(directory="."):
+    """
+    Find the sent and planned logs and their backups.
+
+    Parameters:
+    directory (str): The directory holding the logs.
+
+    Returns:
+    list: The paths of the log files.
+    """
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith(LOG_FILES))
+
+
+def backup_log(path):
+    """
+    Move a log file aside before it is cleared, so it can still be recovered from.
+
+    The file is renamed (instant, whatever its size) and an empty log takes its place.
+
+    Parameters:
+    path (str): The log file.
+
+    Returns:
+    str or None: The backup file, or None if there was nothing to back up.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    backup = f"{path}.{datetime.now():%Y%m%d-%H%M%S}.bak"
+    os.replace(path, backup)
+    open(path, "w").close()
+    return backup
+
+
+def chunks(path, chunk_size=CHUNK_SIZE):
+    """
+    Split a file into byte ranges.
+
+    Parameters:
+    path (str): The file.
+    chunk_size (int): The size of each range in bytes.
+
+    Returns:
+    list: (start, end) pairs covering the whole file.
+    """
+    size = os.path.getsize(path)
+    return [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+
+def valid_day(day):
+    """Check that a log day (b"YYYY-MM-DD") is a real date."""
+    try:
+        date.fromisoformat(day.decode())
+        return True
+    except (ValueError, UnicodeDecodeError):
+        return False
+
+
+def scan_chunk(path, start, end, action):
+    """
+    Parse the lines starting in a byte range of a log file.
+
+    A line belongs to the range its first byte is in, so the line cut by the start of the
+    range is left to the previous range.
+
+    Parameters:
+    path (str): The log file.
+    start (int): The first byte of the range.
+    end (int): The byte after the range.
+    action (str): The outcome of the messages in this log.
+
+    Returns:
+    dict: 'contacts' {email: (count, first day, last day, last timestamp, name, preferred time)}
+          where the name and preferred time are the latest ones, 'days' {day: count},
+          'action', 'lines' and 'skipped'.
+    """
+    # The lines are counted on raw bytes; decoding and time conversions only happen once
+    # per contact at the end. {email: [count, first stamp, last stamp, name, preferred time]}
+    latest = {}
+    days = {}  # {day: count}
+    checked = {}  # {day: True if it is a real date}
+    lines = skipped = 0
+    with open(path, "rb") as file:
+        if start:
+            # Skip the rest of the line that started in the previous range
+            file.seek(start - 1)
+            file.readline()
+        position = file.tell()
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            lines += 1
+            fields = split_line(line)
+            if fields is None:
+                skipped += 1
+                continue
+            stamp, day, name, email, preferred_time = fields
+            valid = checked.get(day)
+            if valid is None:
+                valid = checked[day] = valid_day(day)
+            if not valid:
+                skipped += 1
+                continue
+            days[day] = days.get(day, 0) + 1
+            if preferred_time == b"N/A":
+                preferred_time = None  # The main send loop does not log the preferred time
+            known = latest.get(email)
+            if known is None:
+                latest[email] = [1, stamp, stamp, name, preferred_time]
+                continue
+            known[0] += 1
+            if stamp >= known[2]:
+                known[2], known[3] = stamp, name
+                known[4] = preferred_time or known[4]
+            else:
+                known[1] = min(known[1], stamp)
+                known[4] = known[4] or preferred_time
+
+    hours = {}
+    contacts = {}
+    for email, (count, first, last, name, preferred_time) in latest.items():
+        at = to_timestamp(last, hours)
+        if at is None:  # A damaged time of day, the date is still known
+            at = to_timestamp(last[:10] + b" 00:00:00", hours)
+        contacts[email.decode(errors="replace")] = (
+            count, first[:10].decode(), last[:10].decode(), at, name.decode(errors="replace"),
+            preferred_time and preferred_time.decode(errors="replace"))
+    return {'contacts': contacts, 'days': {day.decode(): count for day, count in days.items()},
+            'action': action, 'lines': lines, 'skipped': skipped}
+
+
+class RecoveredState:
+    def __init__(self):
+        """Initialize an empty state."""
+        # {email: the contact's totals, in the form of DeliveryHistory's contact_stats rows,
+        #         plus the latest 'preferred_time' and 'last_at'}
+        self.stats = {}
+        # {(day, action): count}
+        self.daily = {}
+        # {email: contact} from the outbox (complete records, used first)
+        self.outbox_contacts = {}
+        self.files = 0
+        self.lines = 0
+        self.skipped = 0
+
+    def add(self, email, action, count, first_day, last_day, last_at, name=None, preferred_time=None):
+        """
+        Add the messages of one contact with one outcome.
+
+        Parameters:
+        email (str): The contact's email.
+        action (str): The outcome.
+        count (int): The number of messages.
+        first_day (str): The day of the first message.
+        last_day (str): The day of the last message.
+        last_at (float): When the last message was logged, in seconds.
+        name (str): The contact's name in the last message.
+        preferred_time (str): The preferred time in the last message (None if it was not logged).
+        """
+        stats = self.stats.get(email)
+        if stats is None:
+            stats = self.stats[email] = {'email': email, 'name': name, 'preferred_time': preferred_time,
+                                         'first_day': first_day, 'last_day': last_day, 'last_action': action,
+                                         'last_at': last_at, 'last_sent_day': None, SENT: 0, PLANNED: 0, FAILED: 0}
+        else:
+            stats['first_day'] = min(stats['first_day'], first_day)
+            stats['last_day'] = max(stats['last_day'], last_day)
+            if last_at >= stats['last_at']:
+                stats['last_action'], stats['last_at'] = action, last_at
+                stats['name'] = name or stats['name']
+                stats['preferred_time'] = preferred_time or stats['preferred_time']
+            else:
+                stats['name'] = stats['name'] or name
+                stats['preferred_time'] = stats['preferred_time'] or preferred_time
+        if action == SENT:
+            stats['last_sent_day'] = max(stats['last_sent_day'] or "", last_day)
+        stats[action] += count
+
+    def merge(self, partial):
+        """
+        Add the result of one scanned range.
+
+        Parameters:
+        partial (dict): The result of scan_chunk.
+        """
+        action = partial['action']
+        self.lines += partial['lines']
+        self.skipped += partial['skipped']
+        for day, count in partial['days'].items():
+            self.daily[(day, action)] = self.daily.get((day, action), 0) + count
+        for email, (count, first_day, last_day, last_at, name, preferred_time) in partial['contacts'].items():
+            self.add(email, action, count, first_day, last_day, last_at, name, preferred_time)
+
+    def scan_logs(self, paths, workers=None, chunk_size=CHUNK_SIZE):
+        """
+        Parse log files, in parallel when there is more than one range to parse.
+
+        Parameters:
+        paths (iterable): The log files (the outcome is taken from each file name).
+        workers (int): The number of processes (defaults to the number of CPUs, 1 parses in this process).
+        chunk_size (int): The size of the ranges in bytes.
+        """
+        tasks = []
+        for path in paths:
+            if not os.path.exists(path):
+                logger.warning("Log file not found: %s", path)
+                continue
+            self.files += 1
+            tasks.extend((path, start, end, log_action(path)) for start, end in chunks(path, chunk_size))
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                self.merge(scan_chunk(*task))
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Merge each range as soon as it is done, so only the merged totals stay in memory
+            for future in as_completed([executor.submit(scan_chunk, *task) for task in tasks]):
+                self.merge(future.result())
+
+    def scan_outbox(self, path):
+        """
+        Read the contact records and the dead letters (failed messages) from an outbox.
+
+        Parameters:
+        path (str): The outbox file.
+        """
+        if not os.path.exists(path):
+            return
+        # Read-only: the recovery never changes the outbox
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            rows = connection.execute("SELECT email, run_date, contact, state, attempts FROM jobs ORDER BY run_date")
+            for email, run_date, contact, state, attempts in rows:
+                try:
+                    contact = self.outbox_contacts[email] = json.loads(contact)  # The latest day wins
+                except ValueError:
+                    self.skipped += 1
+                    continue
+                if state == "dead":
+                    # Every attempt was recorded as a failed message
+                    self.add(email, FAILED, attempts, run_date, run_date,
+                             datetime.fromisoformat(run_date).timestamp(), contact.get('name'))
+                    self.daily[(run_date, FAILED)] = self.daily.get((run_date, FAILED), 0) + attempts
+        finally:
+            connection.close()
+
+    def recovered_contacts(self):
+        """
+        Return one contact per email seen in the logs or the outbox.
+
+        Returns:
+        list: The contacts, with the latest name and preferred time (08:00 AM when no
+              message recorded one). Time zones are only known from the outbox.
+        """
+        contacts = dict(self.outbox_contacts)
+        for email, stats in self.stats.items():
+            if email not in contacts:
+                contacts[email] = {'name': stats['name'], 'email': email,
+                                   'preferred_time': stats['preferred_time'] or "08:00 AM"}
+        return sorted(contacts.values(), key=lambda contact: contact['email'])
+
+    def format_summary(self):
+        """
+        Return a short summary of what was recovered.
+
+        Returns:
+        str: The summary.
+        """
+        messages = dict.fromkeys((SENT, PLANNED, FAILED), 0)
+        for (_, action), count in self.daily.items():
+            messages[action] += count
+        return (f"Read {self.lines} line(s) from {self.files} log file(s), skipped {self.skipped} unreadable "
+                f"record(s). Recovered {messages[SENT]} sent, {messages[PLANNED]} planned and "
+                f"{messages[FAILED]} failed message(s) for {len(self.stats)} contact(s).")
+
+
+def recover(paths=None, outbox="outbox.db", workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Rebuild the delivery state from the logs and the outbox.
+
+    Parameters:
+    paths (iterable): The log files (defaults to the sent and planned logs and their backups).
+    outbox (str): The outbox file (None to skip it).
+    workers (int): The number of processes parsing the logs (defaults to the number of CPUs).
+    chunk_size (int): The size in bytes of the ranges parsed by one process.
+
+    Returns:
+    RecoveredState: The recovered totals and contacts.
+    """
+    state = RecoveredState()
+    state.scan_logs(default_logs() if paths is None else paths, workers, chunk_size)
+    if outbox:
+        state.scan_outbox(outbox)
+    return state
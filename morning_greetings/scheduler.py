@@ -0,0 +1,201 @@
+# scheduler.py
+
+"""
+Module to keep the send schedule in memory.
+
+Contacts sharing a time zone and a preferred time form a group, and groups are placed in
+buckets by the UTC minute of the day they are due at. Finding who is due at a given minute
+does not require scanning every contact, and moving to a new day (when UTC offsets may
+change) only re-buckets the groups, not the contacts. The schedule is updated
+incrementally when contacts are added, changed or removed.
+"""
+
+from datetime import datetime, time, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+
+@lru_cache(maxsize=None)
+def minute_of_day(preferred_time):
+    """
+    Convert a preferred time to the number of minutes since midnight.
+
+    Parameters:
+    preferred_time (str): A time in the format "HH:MM AM/PM".
+
+    Returns:
+    int: The minute of the day (0-1439).
+    """
+    parsed = datetime.strptime(preferred_time, "%I:%M %p")
+    return parsed.hour * 60 + parsed.minute
+
+
+def utc_offset_minutes(time_zone, day):
+    """
+    Calculate the UTC offset of a time zone on a given day.
+
+    Parameters:
+    time_zone (str): The time zone name, or None for the local time zone.
+    day (date): The day (the offset is taken at noon UTC).
+
+    Returns:
+    int: The offset in minutes (e.g. 60 for UTC+01:00).
+    """
+    noon = datetime.combine(day, time(12), tzinfo=timezone.utc)
+    local = noon.astimezone(ZoneInfo(time_zone)) if time_zone else noon.astimezone()
+    return int(local.utcoffset().total_seconds() // 60)
+
+
+class Schedule:
+    def __init__(self, day=None):
+        """
+        Initialize an empty schedule.
+
+        Parameters:
+        day (date): The UTC day the schedule is computed for (defaults to today).
+        """
+        self.day = day or datetime.now(timezone.utc).date()
+        # Contacts grouped by (time zone, local minute of the day): {group: {email: contact}}
+        self._groups = {}
+        # Groups bucketed by UTC minute of the day: {utc minute: set of groups}
+        self.buckets = {}
+        # Where each contact is scheduled: {email: (group, contact)}
+        self._index = {}
+        # UTC offset of each time zone on self.day: {time zone: minutes}
+        self._offsets = {}
+        # The last contact list that was synchronized (to skip unchanged snapshots)
+        self._last_contacts = None
+
+    def __len__(self):
+        return len(self._index)
+
+    def _utc_minute(self, group):
+        """
+        Calculate the UTC minute of the day a group is due at on self.day.
+
+        Parameters:
+        group (tuple): (time zone, local minute of the day).
+
+        Returns:
+        int: The UTC minute of the day (0-1439).
+        """
+        time_zone, minute = group
+        offset = self._offsets.get(time_zone)
+        if offset is None:
+            offset = self._offsets[time_zone] = utc_offset_minutes(time_zone, self.day)
+        return (minute - offset) % 1440
+
+    def set_day(self, day):
+        """
+        Move the schedule to another day, recalculating UTC offsets once per time zone.
+
+        Parameters:
+        day (date): The new UTC day.
+        """
+        if day == self.day:
+            return
+        self.day = day
+        self._offsets = {}
+        self.buckets = {}
+        for group in self._groups:
+            self.buckets.setdefault(self._utc_minute(group), set()).add(group)
+
+    def add(self, contact):
+        """
+        Schedule a contact (or move it if it is already scheduled).
+
+        Parameters:
+        contact (dict): The contact to schedule.
+        """
+        self.remove(contact['email'])
+        group = (contact.get('time_zone'), minute_of_day(contact['preferred_time']))
+        members = self._groups.get(group)
+        if members is None:
+            # First contact in this group: place the group in its bucket
+            members = self._groups[group] = {}
+            self.buckets.setdefault(self._utc_minute(group), set()).add(group)
+        members[contact['email']] = contact
+        self._index[contact['email']] = (group, contact)
+
+    def remove(self, email):
+        """
+        Remove a contact from the schedule.
+
+        Parameters:
+        email (str): The email of the contact to remove.
+        """
+        entry = self._index.pop(email, None)
+        if entry is None:
+            return
+        group = entry[0]
+        members = self._groups[group]
+        del members[email]
+        if not members:
+            # Last contact in this group: remove the group from its bucket
+            del self._groups[group]
+            utc_minute = self._utc_minute(group)
+            bucket = self.buckets[utc_minute]
+            bucket.discard(group)
+            if not bucket:
+                del self.buckets[utc_minute]
+
+    def sync(self, contacts):
+        """
+        Bring the schedule in line with the given contacts, touching only what changed.
+
+        Parameters:
+        contacts (iterable): The current contacts (e.g. a snapshot from ContactsManager).
+
+        Returns:
+        tuple: The number of contacts (added, updated, removed).
+        """
+        if contacts is self._last_contacts:
+            return (0, 0, 0)  # Same snapshot as last time, nothing to do
+        self._last_contacts = contacts
+
+        added = updated = 0
+        seen = set()
+        for contact in contacts:
+            email = contact['email']
+            seen.add(email)
+            entry = self._index.get(email)
+            if entry is None:
+                self.add(contact)
+                added += 1
+            elif entry[1] != contact:
+                self.add(contact)
+                updated += 1
+
+        removed = [email for email in self._index if email not in seen]
+        for email in removed:
+            self.remove(email)
+
+        return (added, updated, len(removed))
+
+    def utc_minute_of(self, email):
+        """
+        Find the UTC minute of the day a contact is due at.
+
+        Parameters:
+        email (str): The email of the contact.
+
+        Returns:
+        int or None: The UTC minute of the day (0-1439), or None if the contact is not scheduled.
+        """
+        entry = self._index.get(email)
+        return self._utc_minute(entry[0]) if entry else None
+
+    def due(self, utc_minute):
+        """
+        Retrieve the contacts that should be greeted at the given UTC minute.
+
+        Parameters:
+        utc_minute (int): The UTC minute of the day (0-1439).
+
+        Returns:
+        list: The contacts scheduled at that minute.
+        """
+        due = []
+        for group in self.buckets.get(utc_minute, ()):
+            due.extend(self._groups[group].values())
+        return due
@@ -0,0 +1,205 @@
+# simulator.py
+
+"""
+Module to fast-forward a whole day of sends without waiting for the clock.
+
+The simulation runs the real daemon (schedule, send queue and rate limits) against a
+simulated clock that jumps straight to the next thing that can happen, and replaces the
+transport by a recorder. A day with a large population is replayed in seconds, and the
+result shows how many contacts are due and how many are actually sent in each minute, so
+peak buckets (like the 08:00 AM default) can be planned for before they reach production.
+"""
+
+import csv
+from datetime import datetime, time as day_time, timedelta, timezone
+
+from morning_greetings.contacts import Contacts
+from morning_greetings.daemon import Daemon
+from morning_greetings.metrics import Histogram
+from morning_greetings.minute_index import MinuteIndex
+from morning_greetings.rate_limiter import RateLimiter, email_domain
+
+# Buckets (in seconds) of the histogram of delays between the due minute and the send
+LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 14400)
+
+
+class SimulatedClock:
+    def __init__(self, start):
+        """
+        Initialize the clock.
+
+        Parameters:
+        start (datetime): The simulated time to start at (an aware datetime).
+        """
+        self.current = start.timestamp()
+
+    def now(self):
+        """Return the simulated time as an aware UTC datetime."""
+        return datetime.fromtimestamp(self.current, timezone.utc)
+
+    def time(self):
+        """Return the simulated time in seconds (used as the rate limiter's clock)."""
+        return self.current
+
+    def sleep(self, seconds):
+        """Move the simulated time forward instead of waiting."""
+        self.current += max(seconds, 0)
+
+    def advance_to(self, timestamp):
+        """Move the simulated time forward to a timestamp (never backwards)."""
+        self.current = max(self.current, timestamp)
+
+
+class _FixedContacts:
+    """Stand-in for ContactsManager holding a fixed list of contacts in memory."""
+
+    def __init__(self, contacts):
+        self.contacts = Contacts()
+        self.contacts.set_contacts(contacts)
+
+    def refresh(self):
+        return False
+
+    def get_contacts(self):
+        return self.contacts.get_contacts()
+
+
+class SimulationResult:
+    def __init__(self, day):
+        """
+        Initialize an empty result.
+
+        Parameters:
+        day (date): The simulated UTC day.
+        """
+        self.day = day
+        # Contacts due and contacts sent per UTC minute of the day
+        self.due = [0] * 1440
+        self.sent = [0] * 1440
+        # Sent after the end of the day (queue left over when the day ended)
+        self.overflow = 0
+        # Delay between the due minute and the send, in seconds
+        self.lag = Histogram(LAG_BUCKETS)
+        # (send time, email, due UTC minute, lag in seconds) per message, in send order
+        self.outcomes = []
+
+    def peak_minutes(self, top=5):
+        """
+        Return the minutes with the most contacts due.
+
+        Parameters:
+        top (int): The number of minutes to return.
+
+        Returns:
+        list: (UTC minute of the day, contacts due) tuples, busiest first.
+        """
+        busiest = sorted(range(1440), key=lambda minute: (-self.due[minute], minute))[:top]
+        return [(minute, self.due[minute]) for minute in busiest if self.due[minute]]
+
+    def format_summary(self, top=5):
+        """
+        Return a short human-readable summary of the simulation.
+
+        Parameters:
+        top (int): The number of peak minutes to show.
+
+        Returns:
+        str: The summary.
+        """
+        total = sum(self.sent) + self.overflow
+        lines = [f"Simulated {self.day}: {total} message(s) sent, {self.overflow} after the end of the day. "
+                 f"Delay after the due minute: p50={self.lag.quantile(0.5):.0f} s "
+                 f"p99={self.lag.quantile(0.99):.0f} s max={self.lag.max:.0f} s",
+                 f"Top {top} minutes (UTC) by contacts due:"]
+        peak = max((count for _, count in self.peak_minutes(1)), default=0)
+        for minute, count in self.peak_minutes(top):
+            bar = "#" * max(1, round(40 * count / peak))
+            lines.append(f"  {minute // 60:02d}:{minute % 60:02d} due={count:<8} sent={self.sent[minute]:<8} {bar}")
+        return "\n".join(lines)
+
+    def write_histogram(self, path):
+        """
+        Write the contacts due and sent per minute as CSV (one row per minute of the day).
+
+        Parameters:
+        path (str): The file to write.
+        """
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["utc_minute", "due", "sent"])
+            for minute in range(1440):
+                writer.writerow([f"{minute // 60:02d}:{minute % 60:02d}", self.due[minute], self.sent[minute]])
+
+    def write_outcomes(self, path):
+        """
+        Write the outcome of every message as CSV.
+
+        Parameters:
+        path (str): The file to write.
+        """
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["sent_at", "email", "domain", "due_utc_minute", "lag_seconds"])
+            for sent_at, email, due_minute, lag in self.outcomes:
+                writer.writerow([sent_at.isoformat(), email, email_domain(email),
+                                 f"{due_minute // 60:02d}:{due_minute % 60:02d}", f"{lag:.3f}"])
+
+
+def simulate_day(contacts, day=None, rate=10, domain_rate=2, window=60, keep_outcomes=True):
+    """
+    Replay one UTC day of sends for the given contacts with a simulated clock.
+
+    Parameters:
+    contacts (list): The contacts to simulate.
+    day (date): The UTC day to simulate (defaults to today).
+    rate (float): Maximum messages per second (0 for no limit).
+    domain_rate (float): Maximum messages per second to one email domain (0 for no limit).
+    window (float): Seconds over which the contacts of one minute are spread.
+    keep_outcomes (bool): Keep one outcome record per message (turn off for huge populations).
+
+    Returns:
+    SimulationResult: The contacts due and sent per minute, the delays and the outcomes.
+    """
+    day = day or datetime.now(timezone.utc).date()
+    start = datetime.combine(day, day_time(0), tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    clock = SimulatedClock(start)
+    result = SimulationResult(day)
+
+    def record(contact):
+        """Fake transport: record the message instead of sending it."""
+        now = clock.now()
+        due_minute = daemon.schedule.utc_minute_of(contact['email'])
+        lag = (now - start).total_seconds() - due_minute * 60
+        if now < end:
+            minute = int((now - start).total_seconds() // 60)
+            result.sent[minute] += 1
+        else:
+            result.overflow += 1
+        result.lag.observe(lag)
+        if keep_outcomes:
+            result.outcomes.append((now, contact['email'], due_minute, lag))
+
+    limiter = RateLimiter(rate=rate, domain_rate=domain_rate, clock=clock.time, sleep=clock.sleep)
+    daemon = Daemon(_FixedContacts(contacts), send=record, limiter=limiter, window=window, clock=clock.now)
+    daemon.schedule.set_day(day)
+    daemon.reload()
+    result.due = MinuteIndex(contacts, day).volume()
+
+    # Tick once per simulated minute, and in between only drain the send queue, jumping
+    # straight to the next queued message (or the next token of the rate limit)
+    for minute in range(1440):
+        minute_start = start + timedelta(minutes=minute)
+        clock.advance_to(minute_start.timestamp())
+        daemon.tick(clock.now())
+        next_minute = (minute_start + timedelta(minutes=1)).timestamp()
+        while daemon.queue and clock.time() < next_minute:
+            clock.sleep(daemon.next_wait(next_minute - clock.time()))
+            if clock.time() < next_minute:
+                daemon.drain(clock.now())
+
+    # Send what is still queued when the day is over
+    while daemon.queue:
+        clock.sleep(daemon.next_wait(60))
+        daemon.drain(clock.now())
+    return result
@@ -0,0 +1,116 @@
+# synthetic.py
+
+"""
+Module to generate large, realistic contact lists for tests and load tests.
+
+The contacts are reproducible (the same seed always gives the same list) and follow
+skewed distributions like real data: most people keep the 08:00 AM default or pick a round
+time, a few mail providers hold most of the addresses, and most contacts live in a handful
+of time zones.
+"""
+
+import random
+from itertools import accumulate
+
+FIRST_NAMES = ("James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "David",
+               "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas",
+               "Sarah", "Maria", "Ahmed", "Wei", "Yuki", "Olga", "Pedro", "Fatima", "Lars", "Ingrid",
+               "Kari", "Nils", "Amara", "Priya", "Omar", "Sofia", "Mateo", "Chen", "Ana")
+LAST_NAMES = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+              "Martinez", "Hansen", "Johansen", "Olsen", "Larsen", "Andersen", "Nguyen", "Kim", "Singh",
+              "Wang", "Li", "Tanaka", "Sato", "Ivanova", "Silva", "Santos", "Khan", "Ali", "Muller",
+              "Schmidt", "Rossi", "Dubois", "Novak", "Kowalski", "Okafor", "Mensah", "Haddad")
+
+# (value, weight) pairs: the weights give the share of the contacts
+DOMAINS = (("gmail.com", 40), ("outlook.com", 15), ("yahoo.com", 10), ("hotmail.com", 8),
+           ("icloud.com", 7), ("proton.me", 2))
+# Share of the contacts with a company address (spread over many small domains)
+COMPANY_DOMAIN_WEIGHT = 18
+COMPANY_DOMAINS = 500
+
+PREFERRED_TIMES = (("08:00 AM", 45), ("07:00 AM", 10), ("07:30 AM", 8), ("09:00 AM", 7),
+                   ("06:30 AM", 4), ("08:30 AM", 4), ("06:00 AM", 3), ("10:00 AM", 2))
+# Share of the contacts with a random minute between 05:00 and 11:00 AM
+RANDOM_TIME_WEIGHT = 17
+
+TIME_ZONES = ((None, 40), ("Europe/Oslo", 15), ("Europe/London", 10), ("America/New_York", 10),
+              ("America/Los_Angeles", 6), ("Asia/Tokyo", 5), ("Asia/Kolkata", 5),
+              ("Australia/Sydney", 4), ("America/Sao_Paulo", 3), ("Pacific/Kiritimati", 2))
+
+
+class _Choice:
+    """Weighted random choice with precomputed cumulative weights."""
+
+    def __init__(self, pairs, extra_weight=0):
+        """
+        Parameters:
+        pairs (tuple): (value, weight) pairs.
+        extra_weight (int): Weight of an extra category handled by the caller.
+        """
+        self.values = [value for value, _ in pairs]
+        self.cumulative = list(accumulate(weight for _, weight in pairs))
+        # Drawing a value past the last weight means "the extra category"
+        self.total = self.cumulative[-1] + extra_weight
+
+    def pick(self, rng):
+        """
+        Draw a value.
+
+        Parameters:
+        rng (random.Random): The random generator.
+
+        Returns:
+        tuple: (value, True), or (None, False) for the extra category.
+        """
+        point = rng.random() * self.total
+        for value, bound in zip(self.values, self.cumulative):
+            if point < bound:
+                return value, True
+        return None, False
+
+
+def generate_contacts(count, seed=0):
+    """
+    Generate a reproducible list of realistic contacts.
+
+    Every contact has a unique email. Names repeat (like in real contact lists), some
+    emails use +tags or dots, preferred times are concentrated on a few popular times and
+    about 40% of the contacts use the local time zone.
+
+    Parameters:
+    count (int): The number of contacts.
+    seed (int): The random seed (the same seed gives the same contacts).
+
+    Returns:
+    list: The contacts, as stored by ContactsManager.
+    """
+    rng = random.Random(seed)
+    domains = _Choice(DOMAINS, COMPANY_DOMAIN_WEIGHT)
+    times = _Choice(PREFERRED_TIMES, RANDOM_TIME_WEIGHT)
+    zones = _Choice(TIME_ZONES)
+
+    contacts = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+        domain, found = domains.pick(rng)
+        if not found:
+            # Company domains: a long tail where the first domains are the biggest
+            domain = f"company{int(rng.paretovariate(1.2)) % COMPANY_DOMAINS}.com"
+        # The index keeps the emails unique, the rest makes them look like real addresses
+        local = f"{first}.{last}{i}".lower() if rng.random() < 0.5 else f"{first[0]}{last}{i}".lower()
+        if rng.random() < 0.05:
+            local += "+greetings"
+
+        preferred_time, found = times.pick(rng)
+        if not found:
+            minute = rng.randrange(5 * 60, 11 * 60)
+            preferred_time = f"{(minute // 60 - 1) % 12 + 1:02d}:{minute % 60:02d} AM"
+
+        contact = {'name': f"{first} {last}", 'email': f"{local}@{domain}",
+                   'preferred_time': preferred_time}
+        time_zone = zones.pick(rng)[0]
+        if time_zone:
+            contact['time_zone'] = time_zone
+        contacts.append(contact)
+    return contacts
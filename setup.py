@@ -5,6 +5,9 @@ setup(
     version="0.1",
     packages=find_packages(),
     install_requires=[],
+    extras_require={
+        'fast': ['numpy'],  # Vectorized "who is due" queries (minute_index.py)
+    },
     description="A package to automate sending Good Morning messages",
     author="Sunniva Josefsen",
     author_email="sunniva.josefsen@hotmail.com",
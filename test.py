@@ -6,6 +6,21 @@ import tests.test_contacts_manager as test2
 import tests.test_logger as test3
 import tests.test_message_generator as test4
 import tests.test_message_sender as test5
+import tests.test_scheduler as test6
+import tests.test_daemon as test7
+import tests.test_rate_limiter as test8
+import tests.test_outbox as test9
+import tests.test_metrics as test10
+import tests.test_output as test11
+import tests.test_profiling as test12
+import tests.test_email_canonicalizer as test13
+import tests.test_name_index as test14
+import tests.test_simulator as test15
+import tests.test_synthetic as test16
+import tests.test_minute_index as test17
+import tests.test_history as test18
+import tests.test_recovery as test19
+import tests.test_change_feed as test20
 
 if __name__ == "__main__":
     # Create a test suite
@@ -17,6 +32,21 @@ if __name__ == "__main__":
     suite.addTests(unittest.TestLoader().loadTestsFromModule(test3))
     suite.addTests(unittest.TestLoader().loadTestsFromModule(test4))
     suite.addTests(unittest.TestLoader().loadTestsFromModule(test5))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test6))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test7))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test8))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test9))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test10))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test11))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test12))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test13))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test14))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test15))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test16))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test17))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test18))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test19))
+    suite.addTests(unittest.TestLoader().loadTestsFromModule(test20))
     
     # Run the test suite
     runner = unittest.TextTestRunner()
@@ -0,0 +1,133 @@
+# test_change_feed.py
+
+import unittest
+import os
+import sys
+import tempfile
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.change_feed import ChangeFeed, FeedConsumer, add_event, feed_path  # Importing the change feed for testing
+from morning_greetings.contacts_manager import ContactsManager
+
+class TestChangeFeed(unittest.TestCase):
+    """Unit tests for the change feed file."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.feed = ChangeFeed(os.path.join(self.tmp_dir.name, "contacts.changes.jsonl"), clock=lambda: 1000.0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def contact(self, i):
+        return {'name': f"Contact {i}", 'email': f"contact{i}@example.com", 'preferred_time': "08:00 AM"}
+
+    def test_sequence_numbers(self):
+        """Every change gets the next sequence number, across batches and feed instances."""
+        self.assertEqual(self.feed.last_seq(), 0)
+        self.assertEqual(self.feed.append([add_event(self.contact(1)), add_event(self.contact(2))]), 2)
+        other = ChangeFeed(self.feed.path)
+        self.assertEqual(other.append([add_event(self.contact(3))]), 3)
+        self.assertEqual(self.feed.append([]), 3)
+        events = self.feed.read()
+        self.assertEqual([event['seq'] for event in events], [1, 2, 3])
+        self.assertEqual(events[0], {'seq': 1, 'at': 1000.0, 'op': 'add', 'email': 'contact1@example.com',
+                                     'contact': self.contact(1)})
+
+    def test_read_after(self):
+        """Only the changes after a sequence number are returned."""
+        for i in range(300):
+            self.feed.append([add_event(self.contact(i))])
+        for after in (0, 1, 150, 298, 299, 300, 1000):
+            self.assertEqual([event['seq'] for event in self.feed.read(after)], list(range(after + 1, 301)))
+        self.assertEqual([event['seq'] for event in self.feed.read(10, limit=3)], [11, 12, 13])
+        self.assertEqual(ChangeFeed(os.path.join(self.tmp_dir.name, "missing.jsonl")).read(), [])
+
+    def test_torn_line(self):
+        """A line cut by a crash is ignored by readers and dropped by the next writer."""
+        self.feed.append([add_event(self.contact(1))])
+        with open(self.feed.path, "a") as file:
+            file.write('{"seq": 2, "at": 1000.0, "op": "ad')
+        self.assertEqual([event['seq'] for event in self.feed.read()], [1])
+        size = os.path.getsize(self.feed.path)
+        self.assertEqual(self.feed.last_seq(), 1)
+        self.assertEqual(os.path.getsize(self.feed.path), size)  # Reading never changes the file
+        self.assertEqual(self.feed.append([add_event(self.contact(2))]), 2)
+        self.assertEqual([event['email'] for event in self.feed.read()],
+                         ['contact1@example.com', 'contact2@example.com'])
+
+    def test_consumer_resumes(self):
+        """A consumer only gets the changes it has not committed yet."""
+        consumer = FeedConsumer(self.feed, os.path.join(self.tmp_dir.name, "crm.cursor"))
+        self.feed.append([add_event(self.contact(1)), add_event(self.contact(2))])
+        events = consumer.poll()
+        self.assertEqual(len(events), 2)
+        self.assertEqual(len(consumer.poll()), 2)  # Not committed yet
+        consumer.commit(events[-1]['seq'])
+        self.feed.append([add_event(self.contact(3))])
+        self.assertEqual([event['seq'] for event in consumer.poll()], [3])
+
+class TestContactsManagerFeed(unittest.TestCase):
+    """The changes made through ContactsManager are published in order."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp_dir.name, "contacts.json")
+        self.manager = ContactsManager(data_file=self.data_file)
+        self.feed = ChangeFeed(feed_path(self.data_file))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_mutations(self):
+        """Add, update, remove and clear each publish one change."""
+        self.manager.add_contact("Alice", "alice@example.com", "09:00 AM")
+        self.manager.add_contact("Bob", "bob@example.com")
+        self.manager.add_contact("Bob", "bob@example.com")  # Duplicate: nothing changes
+        self.manager.update_contact("Alice", "alice@work.com", "10:00 AM")
+        self.manager.update_contact("Alice", "alice@work.com", "10:00 AM")  # Nothing changes
+        self.manager.remove_contact("Bob")
+        self.manager.add_contact("Carol", "carol@example.com")
+        self.manager.clear_contacts()
+        self.manager.clear_contacts()  # Already empty: nothing changes
+
+        events = self.feed.read()
+        self.assertEqual([(event['seq'], event['op']) for event in events],
+                         [(1, 'add'), (2, 'add'), (3, 'update'), (4, 'remove'), (5, 'add'), (6, 'clear')])
+        update = events[2]
+        self.assertEqual((update['email'], update['previous']['email']), ('alice@work.com', 'alice@example.com'))
+        self.assertEqual(update['contact']['preferred_time'], '10:00 AM')
+        self.assertEqual(events[3]['previous']['email'], 'bob@example.com')
+        self.assertEqual(events[5]['count'], 2)
+        # Only the delta after what a consumer has already seen
+        self.assertEqual([event['op'] for event in self.feed.read(4)], ['add', 'clear'])
+
+    def test_deduplicate(self):
+        """Contacts dropped as duplicates are published as removed."""
+        self.manager.add_contact("John", "johndoe@gmail.com")
+        self.manager.contacts.set_contacts(self.manager.get_contacts() + [
+            {'name': 'John', 'email': 'john.doe+news@gmail.com', 'preferred_time': '08:00 AM'}])
+        self.manager.deduplicate()
+        self.assertEqual([(event['op'], event['email']) for event in self.feed.read(1)],
+                         [('remove', 'john.doe+news@gmail.com')])
+
+    def test_shared_feed(self):
+        """Two managers on the same file share one sequence."""
+        other = ContactsManager(data_file=self.data_file)
+        self.manager.add_contact("Alice", "alice@example.com")
+        other.add_contact("Bob", "bob@example.com")
+        self.manager.add_contact("Carol", "carol@example.com")
+        self.assertEqual([(event['seq'], event['email']) for event in self.feed.read()],
+                         [(1, 'alice@example.com'), (2, 'bob@example.com'), (3, 'carol@example.com')])
+
+    def test_disabled(self):
+        """No feed is written when it is turned off."""
+        data_file = os.path.join(self.tmp_dir.name, "quiet.json")
+        ContactsManager(data_file=data_file, change_feed=False).add_contact("Alice", "alice@example.com")
+        self.assertFalse(os.path.exists(feed_path(data_file)))
+
+
+if __name__ == "__main__":
+    unittest.main()
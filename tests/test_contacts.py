@@ -3,6 +3,7 @@
 import unittest  # Importing the unittest module for creating test cases
 import sys
 import os
+import threading
 
 # Dynamically add the project root directory to sys.path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -21,6 +22,22 @@ class TestContacts(unittest.TestCase):
         self.assertEqual(len(contacts), 1)  # Assert that there is one contact
         self.assertEqual(contacts[0]['name'], "Alice")  # Assert the contact's name is "Alice"
 
+    def test_add_contact_with_time_zone(self):
+        """Test adding a contact with a time zone."""
+        self.contacts.add_contact("Alice", "alice@example.com", "09:00 AM", "Europe/Oslo")
+        self.contacts.add_contact("Bob", "bob@example.com", "09:00 AM", "Not/AZone")  # Invalid time zone
+        contacts = self.contacts.get_contacts()
+        self.assertEqual(len(contacts), 1)  # Assert that only the valid contact was added
+        self.assertEqual(contacts[0]['time_zone'], "Europe/Oslo")
+
+    def test_update_time_zone(self):
+        """Test updating a contact's time zone."""
+        self.contacts.add_contact("Alice", "alice@example.com", "09:00 AM")
+        self.assertNotIn('time_zone', self.contacts.get_contacts()[0])  # No time zone by default
+        self.contacts.update_contact("Alice", new_email="alice@example.com", new_preferred_time="09:00 AM",
+                                     new_time_zone="America/New_York")
+        self.assertEqual(self.contacts.get_contacts()[0]['time_zone'], "America/New_York")
+
     def test_add_duplicate_contact(self):
         """Test adding a duplicate contact with the same name and email."""
         self.contacts.add_contact("Bob", "bob@example.com")  # Add a contact
@@ -66,6 +83,22 @@ class TestContacts(unittest.TestCase):
         self.assertEqual(updated_contact['email'], "alice_new@example.com")  # Assert the email is updated
         self.assertEqual(updated_contact['preferred_time'], "10:00 AM")  # Assert the preferred time is updated
 
+    def test_update_does_not_change_snapshot(self):
+        """Test that a snapshot is immutable even without the thread-safe mode."""
+        self.contacts.add_contact("Alice", "alice@example.com", "09:00 AM")
+        snapshot = self.contacts.snapshot()
+        self.contacts.update_contact("Alice", new_email="alice_new@example.com", new_preferred_time="10:00 AM")
+        self.assertEqual(snapshot[0]['email'], "alice@example.com")
+        self.assertEqual(self.contacts.get_contacts()[0]['email'], "alice_new@example.com")
+
+    def test_replace_removed_contact(self):
+        """Test that replacing a contact removed by another writer reports the failure."""
+        self.contacts.add_contact("Alice", "alice@example.com", "09:00 AM")
+        alice = self.contacts.get_contacts()[0]
+        self.contacts.remove_contact("Alice")
+        self.assertFalse(self.contacts._replace(alice, dict(alice, email="alice_new@example.com")))
+        self.assertEqual(self.contacts.get_contacts(), [])
+
     def test_remove_nonexistent_contact(self):
         """Test removing a contact that does not exist."""
         self.contacts.remove_contact("Nonexistent")  # Attempt to remove a non-existing contact
@@ -83,6 +116,50 @@ class TestContacts(unittest.TestCase):
         self.contacts.clear_contacts()  # Clear all contacts
         self.assertEqual(len(self.contacts.get_contacts()), 0)  # Assert that there are no contacts left
 
+class TestThreadSafeContacts(unittest.TestCase):
+    def setUp(self):
+        """Set up a fresh thread-safe Contacts instance for each test."""
+        self.contacts = Contacts(thread_safe=True)
+        self.contacts.add_contact("Alice", "alice@example.com", "09:00 AM")
+
+    def test_snapshot_is_not_affected_by_changes(self):
+        """Test that a snapshot keeps its content when contacts are added, updated or removed."""
+        snapshot = self.contacts.snapshot()
+        self.contacts.add_contact("Bob", "bob@example.com")
+        self.contacts.update_contact("Alice", new_email="alice_new@example.com", new_preferred_time="10:00 AM")
+        self.assertEqual(len(snapshot), 1)
+        self.assertEqual(snapshot[0]['email'], "alice@example.com")  # The old contact is not modified
+        self.assertEqual(snapshot[0]['preferred_time'], "09:00 AM")
+        self.contacts.remove_contact("Bob")
+        self.assertEqual([c['email'] for c in self.contacts.snapshot()], ["alice_new@example.com"])
+
+    def test_snapshot_is_reused_until_changed(self):
+        """Test that the snapshot is only rebuilt after a change."""
+        snapshot = self.contacts.snapshot()
+        self.assertIs(self.contacts.snapshot(), snapshot)
+        self.contacts.add_contact("Bob", "bob@example.com")
+        self.assertIsNot(self.contacts.snapshot(), snapshot)
+
+    def test_iterate_while_editing(self):
+        """Test that a reader thread can iterate snapshots while another thread adds contacts."""
+        errors = []
+
+        def reader():
+            try:
+                for _ in range(200):
+                    for contact in self.contacts.snapshot():
+                        contact['email']
+            except Exception as e:  # pragma: no cover - only reached on failure
+                errors.append(e)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for i in range(200):
+            self.contacts.add_contact(f"Friend {i}", f"friend{i}@example.com")
+        thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.contacts.snapshot()), 201)
+
 # Entry point for the test runner
 if __name__ == "__main__":
     unittest.main()  # Run the tests
@@ -3,11 +3,18 @@
 import unittest # Importing the unittest module for creating test cases
 import sys
 import os
+import json
+import stat
+import tempfile
+import threading
+import time
+from unittest.mock import patch
 
 # Dynamically add the project root directory to sys.path to allow imports from the main package
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from morning_greetings.contacts_manager import ContactsManager  # Importing the ContactsManager class for testing
+from morning_greetings.message_generator import render_cache
 
 class TestContactsManager(unittest.TestCase):
     def setUp(self):
@@ -95,6 +102,103 @@ class TestContactsManager(unittest.TestCase):
         self.assertEqual(len(self.contacts.get_contacts()), 0)  # Assert that there are still no contacts
 
 
+class TestContactsManagerSharedFile(unittest.TestCase):
+    """Tests for two ContactsManager instances (e.g. two processes) sharing one data file."""
+
+    def setUp(self):
+        """Create two managers on the same temporary data file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp_dir.name, "contacts.json")
+        self.sender = ContactsManager(data_file=self.data_file)
+        self.editor = ContactsManager(data_file=self.data_file)
+
+    def tearDown(self):
+        """Remove the temporary data file."""
+        self.tmp_dir.cleanup()
+
+    def read_file(self):
+        """Return the emails stored in the data file."""
+        with open(self.data_file) as file:
+            return [contact['email'] for contact in json.load(file)]
+
+    def test_writes_are_not_lost(self):
+        """Test that saving from one manager keeps the contacts added by the other one."""
+        self.sender.add_contact("Alice", "alice@example.com")
+        self.editor.add_contact("Bob", "bob@example.com")
+        self.sender.add_contact("Charlie", "charlie@example.com")
+        self.assertEqual(sorted(self.read_file()), ["alice@example.com", "bob@example.com", "charlie@example.com"])
+
+    def test_refresh_picks_up_changes(self):
+        """Test that a manager sees the changes saved by another manager."""
+        self.editor.add_contact("Alice", "alice@example.com", "09:00 AM")
+        self.assertTrue(self.sender.refresh())
+        self.assertFalse(self.sender.refresh())  # Nothing changed since the last refresh
+        self.editor.update_contact("Alice", new_email="alice@example.org", new_preferred_time="10:00 AM")
+        contacts = self.sender.get_contacts()
+        self.assertEqual(len(contacts), 1)
+        self.assertEqual(contacts[0]['email'], "alice@example.org")
+        self.assertEqual(contacts[0]['preferred_time'], "10:00 AM")
+
+    def test_removal_is_shared(self):
+        """Test that a contact removed by one manager is removed for the other one."""
+        self.editor.add_contact("Alice", "alice@example.com")
+        self.editor.add_contact("Bob", "bob@example.com")
+        self.sender.remove_contact("Alice")
+        self.assertEqual([c['email'] for c in self.editor.get_contacts()], ["bob@example.com"])
+        self.assertEqual(self.read_file(), ["bob@example.com"])
+
+    def test_update_invalidates_render_cache(self):
+        """Test that updating a contact drops its cached message only."""
+        self.editor.add_contact("Alice", "alice@example.com")
+        self.editor.add_contact("Bob", "bob@example.com")
+        for contact in self.editor.get_contacts():
+            render_cache.render(contact)
+        self.editor.update_contact("Alice", new_email="alice@example.org", new_preferred_time="10:00 AM")
+        misses = render_cache.misses
+        for contact in self.editor.get_contacts():
+            render_cache.render(contact)
+        self.assertEqual(render_cache.misses, misses + 1)  # Only Alice is rendered again
+        render_cache.clear()
+
+    def test_update_during_refresh_is_kept(self):
+        """Test that a contact added by another thread while a refresh merges is not lost."""
+        sender = ContactsManager(data_file=self.data_file, thread_safe=True)
+        self.editor.add_contact("Alice", "alice@example.com")
+        merge = ContactsManager._merge
+        writer = threading.Thread(target=sender.contacts.add_contact, args=("Bob", "bob@example.com"))
+
+        def slow_merge(base, local, remote):
+            merged = merge(base, local, remote)
+            # Another thread edits the contacts before the refresh has swapped in the merged list
+            writer.start()
+            time.sleep(0.05)
+            return merged
+
+        with patch.object(ContactsManager, '_merge', staticmethod(slow_merge)):
+            self.assertTrue(sender.refresh())
+        writer.join()
+        self.assertEqual(sorted(c['email'] for c in sender.contacts.get_contacts()),
+                         ["alice@example.com", "bob@example.com"])
+
+    def test_no_temporary_files_left(self):
+        """Test that the atomic write does not leave temporary files behind."""
+        self.sender.add_contact("Alice", "alice@example.com")
+        leftovers = [f for f in os.listdir(self.tmp_dir.name) if f.startswith(".tmp-")]
+        self.assertEqual(leftovers, [])
+
+    def test_permissions_are_kept(self):
+        """Test that the atomic write keeps the file's permissions instead of mkstemp's 0600."""
+        umask = os.umask(0o022)
+        try:
+            self.sender.add_contact("Alice", "alice@example.com")
+            self.assertEqual(stat.S_IMODE(os.stat(self.data_file).st_mode), 0o644)  # A new file follows the umask
+            os.chmod(self.data_file, 0o640)
+            self.editor.add_contact("Bob", "bob@example.com")
+            self.assertEqual(stat.S_IMODE(os.stat(self.data_file).st_mode), 0o640)  # An existing file keeps its mode
+        finally:
+            os.umask(umask)
+
+
 # Entry point for the test runner
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+# test_daemon.py
+
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.contacts_manager import ContactsManager
+from morning_greetings.daemon import Daemon  # Importing the daemon to test
+from morning_greetings.rate_limiter import RateLimiter
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        """Set up a daemon watching a temporary contacts file, recording who is greeted."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp_dir.name, "contacts.json")
+        self.manager = ContactsManager(data_file=self.data_file)
+        self.manager.add_contact("Alice", "alice@example.com", "08:00 AM")
+        self.manager.add_contact("Bob", "bob@example.com", "08:05 AM")
+        self.greeted = []
+        self.daemon = Daemon(ContactsManager(data_file=self.data_file), send=lambda c: self.greeted.append(c['name']))
+
+    def tearDown(self):
+        """Remove the temporary contacts file."""
+        self.tmp_dir.cleanup()
+
+    def test_fires_buckets_on_time(self):
+        """Test that each contact is greeted once, when their preferred time is reached."""
+        self.daemon.tick(datetime(2024, 1, 1, 7, 59))
+        self.assertEqual(self.greeted, [])
+        self.daemon.tick(datetime(2024, 1, 1, 8, 0))
+        self.assertEqual(self.greeted, ["Alice"])
+        self.daemon.tick(datetime(2024, 1, 1, 8, 0, 30))  # Same minute: no second greeting
+        self.assertEqual(self.greeted, ["Alice"])
+        self.daemon.tick(datetime(2024, 1, 1, 8, 10))  # Minutes skipped between ticks are fired
+        self.assertEqual(self.greeted, ["Alice", "Bob"])
+
+    def test_next_day(self):
+        """Test that contacts are greeted again on the next day."""
+        self.daemon.tick(datetime(2024, 1, 1, 9, 0))
+        self.daemon.tick(datetime(2024, 1, 2, 8, 1))
+        self.assertEqual(self.greeted, ["Alice"])
+
+    def test_end_of_day_is_not_skipped(self):
+        """Test that the last minutes of a day are fired when the next tick is on the next day."""
+        self.manager.add_contact("Late", "late@example.com", "11:59 PM", "UTC")
+        self.daemon.tick(datetime(2024, 1, 1, 23, 58, tzinfo=timezone.utc))
+        self.daemon.tick(datetime(2024, 1, 2, 0, 1, tzinfo=timezone.utc))
+        self.assertEqual(self.greeted, ["Late"])
+
+    def test_hot_reload(self):
+        """Test that contacts changed by another process are picked up by the running daemon."""
+        self.daemon.tick(datetime(2024, 1, 1, 7, 0))
+        self.manager.add_contact("Charlie", "charlie@example.com", "07:30 AM")
+        self.manager.remove_contact("Bob")
+        self.daemon.tick(datetime(2024, 1, 1, 8, 30))
+        self.assertEqual(self.greeted, ["Charlie", "Alice"])
+
+
+class TestDaemonSendQueue(unittest.TestCase):
+    def setUp(self):
+        """Set up a daemon with a busy 08:00 AM (UTC) bucket."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp_dir.name, "contacts.json")
+        manager = ContactsManager(data_file=self.data_file)
+        for i in range(6):
+            manager.add_contact(f"Friend {i}", f"friend{i}@big.com", "08:00 AM", "UTC")
+        manager.add_contact("Alice", "alice@small.com", "08:00 AM", "UTC")
+        self.greeted = []
+        self.clock = 0.0
+        self.limiter = RateLimiter(rate=None, domain_rate=1, clock=lambda: self.clock, sleep=None)
+        self.daemon = Daemon(manager, send=lambda c: self.greeted.append(c['email']), limiter=self.limiter)
+
+    def tearDown(self):
+        """Remove the temporary contacts file."""
+        self.tmp_dir.cleanup()
+
+    def at(self, minute, second):
+        """Return a UTC time on the test day."""
+        return datetime(2024, 1, 1, 8, minute, second, tzinfo=timezone.utc)
+
+    def test_bucket_is_spread_over_its_minute(self):
+        """Test that the contacts of one minute are sent over that minute, not all at once."""
+        self.daemon.limiter = None
+        self.daemon.tick(self.at(0, 0))
+        self.assertEqual(len(self.greeted), 1)
+        self.daemon.tick(self.at(0, 30))
+        self.assertEqual(len(self.greeted), 4)
+        self.daemon.tick(self.at(1, 0))
+        self.assertEqual(len(self.greeted), 7)
+
+    def test_throttled_domain_does_not_block_tick(self):
+        """Test that a throttled domain stays queued without blocking the other contacts."""
+        self.daemon.window = 0
+        self.daemon.tick(self.at(0, 0))
+        self.assertEqual(sorted(self.greeted), ["alice@small.com", "friend0@big.com"])
+        self.assertEqual(len(self.daemon.queue), 5)  # The rest of big.com waits in the queue
+        self.clock += 2.0
+        self.daemon.tick(self.at(0, 2))
+        self.assertEqual(len(self.greeted), 3)  # One more for big.com (1 per second, no burst)
+
+
+if __name__ == "__main__":
+    unittest.main()  # Run the tests
@@ -0,0 +1,134 @@
+# test_email_canonicalizer.py
+
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.email_canonicalizer import canonicalize_email, deduplicate  # Functions under test
+from morning_greetings.contacts import Contacts
+from morning_greetings.contacts_manager import ContactsManager
+
+class TestCanonicalizeEmail(unittest.TestCase):
+    """Unit tests for the per-domain email rules."""
+
+    def test_gmail_ignores_dots_tags_and_case(self):
+        """Gmail variants (dots, +tags, case, googlemail.com) map to one address."""
+        self.assertEqual(canonicalize_email(" John.Doe+News@Gmail.com "), "johndoe@gmail.com")
+        self.assertEqual(canonicalize_email("johndoe@googlemail.com"), "johndoe@gmail.com")
+
+    def test_tag_only_domains_keep_dots(self):
+        """Outlook removes +tags but dots are significant."""
+        self.assertEqual(canonicalize_email("john.doe+x@outlook.com"), "john.doe@outlook.com")
+
+    def test_yahoo_uses_dash_tags(self):
+        """Yahoo sub-addresses start with a dash."""
+        self.assertEqual(canonicalize_email("john-news@yahoo.com"), "john@yahoo.com")
+
+    def test_unknown_domain_is_only_lowercased(self):
+        """Domains without rules keep their local part as is."""
+        self.assertEqual(canonicalize_email("John.Doe+x@Example.com"), "john.doe+x@example.com")
+
+
+class TestDeduplicate(unittest.TestCase):
+    """Unit tests for the bulk deduplication pass."""
+
+    def test_keeps_first_and_reports_merges_by_domain(self):
+        """The first contact of each mailbox is kept and the others are reported per domain."""
+        contacts = [
+            {'name': 'John', 'email': 'johndoe@gmail.com'},
+            {'name': 'Jane', 'email': 'jane@example.com'},
+            {'name': 'John 2', 'email': 'john.doe+news@gmail.com'},
+            {'name': 'John 3', 'email': 'j.o.h.n.doe@googlemail.com'},
+        ]
+        kept, merges = deduplicate(contacts)
+        self.assertEqual([c['email'] for c in kept], ['johndoe@gmail.com', 'jane@example.com'])
+        self.assertEqual(merges, {'gmail.com': {'johndoe@gmail.com': ['john.doe+news@gmail.com',
+                                                                      'j.o.h.n.doe@googlemail.com']}})
+
+    def test_no_duplicates(self):
+        """Without duplicates nothing is merged."""
+        contacts = [{'name': 'A', 'email': 'a@example.com'}, {'name': 'B', 'email': 'b@example.com'}]
+        kept, merges = deduplicate(contacts)
+        self.assertEqual(kept, contacts)
+        self.assertEqual(merges, {})
+
+
+class TestContactsCanonicalIndex(unittest.TestCase):
+    """Duplicate checks of the Contacts class use the canonical email."""
+
+    def test_add_rejects_variant(self):
+        """Adding a variant of an existing email is refused."""
+        contacts = Contacts()
+        contacts.add_contact("John", "johndoe@gmail.com")
+        contacts.add_contact("John again", "John.Doe+x@gmail.com")
+        self.assertEqual(len(contacts.get_contacts()), 1)
+
+    def test_remove_frees_email(self):
+        """After removing a contact, its email can be used again."""
+        contacts = Contacts()
+        contacts.add_contact("John", "johndoe@gmail.com")
+        contacts.remove_contact("John")
+        contacts.add_contact("John", "john.doe@gmail.com")
+        self.assertEqual(len(contacts.get_contacts()), 1)
+
+    def test_update_rejects_other_contacts_email(self):
+        """Changing an email to a variant of another contact's email is refused."""
+        contacts = Contacts()
+        contacts.add_contact("John", "johndoe@gmail.com")
+        contacts.add_contact("Jane", "jane@example.com")
+        contacts.update_contact("Jane", new_email="john.doe@gmail.com", new_preferred_time="09:00 AM")
+        self.assertEqual(contacts.get_contacts()[1]['email'], "jane@example.com")
+        # A variant of the contact's own email is accepted
+        contacts.update_contact("John", new_email="john.doe@gmail.com", new_preferred_time="09:00 AM")
+        self.assertEqual(contacts.get_contacts()[0]['email'], "john.doe@gmail.com")
+
+
+class TestContactsManagerDeduplicate(unittest.TestCase):
+    """Deduplicating the stored contacts."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmp_dir.name, "contacts.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_deduplicate_saves_result(self):
+        """Duplicates loaded from the file are removed and the file is rewritten."""
+        manager = ContactsManager(data_file=self.data_file)
+        manager.contacts.set_contacts([
+            {'name': 'John', 'email': 'johndoe@gmail.com', 'preferred_time': '08:00 AM'},
+            {'name': 'John 2', 'email': 'john.doe+x@gmail.com', 'preferred_time': '08:00 AM'},
+        ])
+        manager.save_contacts()
+
+        merges = manager.deduplicate()
+        self.assertEqual(merges, {'gmail.com': {'johndoe@gmail.com': ['john.doe+x@gmail.com']}})
+        reloaded = ContactsManager(data_file=self.data_file)
+        self.assertEqual([c['email'] for c in reloaded.get_contacts()], ['johndoe@gmail.com'])
+
+    def test_duplicates_in_file_survive_loading(self):
+        """Variants already in contacts.json are loaded, so deduplicate() can merge and report them."""
+        with open(self.data_file, "w") as file:
+            json.dump([{'name': 'John', 'email': 'johndoe@gmail.com', 'preferred_time': '08:00 AM'},
+                       {'name': 'John 2', 'email': 'john.doe+x@gmail.com', 'preferred_time': '08:00 AM'}], file)
+        manager = ContactsManager(data_file=self.data_file)
+        self.assertEqual(len(manager.get_contacts()), 2)
+
+        # Saving another change keeps both contacts until they are deduplicated
+        manager.add_contact("Alice", "alice@example.com")
+        with open(self.data_file) as file:
+            self.assertEqual(len(json.load(file)), 3)
+
+        merges = manager.deduplicate()
+        self.assertEqual(merges, {'gmail.com': {'johndoe@gmail.com': ['john.doe+x@gmail.com']}})
+        self.assertEqual(len(ContactsManager(data_file=self.data_file).get_contacts()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# test_history.py
+
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+from unittest.mock import patch
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.history import DeliveryHistory, SENT, PLANNED, FAILED  # Importing the history for testing
+from morning_greetings.daemon import send_greeting
+
+def at(day, hour=8):
+    """Timestamp of a local time on a day."""
+    return datetime(day.year, day.month, day.day, hour).timestamp()
+
+class TestDeliveryHistory(unittest.TestCase):
+    """Unit tests for the delivery history store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "history.db")
+        self.history = DeliveryHistory(self.path)
+        self.alice = {'name': 'Alice', 'email': 'alice@example.com'}
+        self.bob = {'name': 'Bob', 'email': 'bob@example.com'}
+
+    def tearDown(self):
+        self.history.close()
+        self.tmp_dir.cleanup()
+
+    def test_contact_aggregates(self):
+        """Each outcome updates the contact's counts and last days."""
+        self.history.record(self.alice, PLANNED, at=at(date(2024, 1, 1)))
+        self.history.record(self.alice, SENT, at=at(date(2024, 1, 2)))
+        self.history.record(self.alice, FAILED, "no route", at=at(date(2024, 1, 3)))
+        stats = self.history.contact_stats('alice@example.com')
+        self.assertEqual((stats['planned'], stats['sent'], stats['failed']), (1, 1, 1))
+        self.assertEqual(stats['first_day'], "2024-01-01")
+        self.assertEqual(stats['last_day'], "2024-01-03")
+        self.assertEqual(stats['last_action'], FAILED)
+        self.assertEqual(stats['last_sent_day'], "2024-01-02")
+        self.assertIsNone(self.history.contact_stats('nobody@example.com'))
+
+    def test_already_sent_and_never_reached(self):
+        """Skip checks and "never reached" use the last sent day."""
+        self.history.record(self.alice, SENT, at=at(date(2024, 1, 2)))
+        self.history.record(self.bob, PLANNED, at=at(date(2024, 1, 2)))
+        self.assertTrue(self.history.already_sent('alice@example.com', date(2024, 1, 2)))
+        self.assertFalse(self.history.already_sent('alice@example.com', date(2024, 1, 3)))
+        self.assertFalse(self.history.already_sent('bob@example.com', date(2024, 1, 2)))
+        self.assertEqual(self.history.never_reached([self.alice, self.bob]), [self.bob])
+        self.assertEqual(self.history.last_sent_day('alice@example.com'), "2024-01-02")
+
+    def test_daily_counts(self):
+        """Messages per day include the days without messages."""
+        self.history.record(self.alice, SENT, at=at(date(2024, 1, 2)))
+        self.history.record(self.bob, SENT, at=at(date(2024, 1, 2)))
+        self.history.record(self.bob, FAILED, at=at(date(2024, 1, 3)))
+        counts = dict(self.history.daily_counts(3, today=date(2024, 1, 3)))
+        self.assertEqual(list(counts), ["2024-01-01", "2024-01-02", "2024-01-03"])
+        self.assertEqual(counts["2024-01-02"][SENT], 2)
+        self.assertEqual(counts["2024-01-03"][FAILED], 1)
+        self.assertEqual(counts["2024-01-01"][SENT], 0)
+
+    def test_persisted_and_reloaded(self):
+        """A new instance (e.g. another process) sees what was recorded."""
+        self.history.record(self.alice, SENT, at=at(date(2024, 1, 2)))
+        other = DeliveryHistory(self.path)
+        try:
+            self.assertTrue(other.already_sent('alice@example.com', date(2024, 1, 2)))
+        finally:
+            other.close()
+
+    def test_sees_messages_recorded_by_another_process(self):
+        """A long-running instance (the daemon) sees what another one (a send run) recorded after it started."""
+        self.assertFalse(self.history.already_sent('alice@example.com'))
+        other = DeliveryHistory(self.path)
+        try:
+            other.record(self.alice, SENT)
+        finally:
+            other.close()
+        self.assertTrue(self.history.already_sent('alice@example.com'))
+        self.assertTrue(self.history.already_sent('alice@example.com', refresh=False))  # Now in memory
+
+    def test_daemon_skips_contact_sent_by_another_process(self):
+        """The daemon does not greet a contact a send run already greeted today."""
+        contact = dict(self.alice, preferred_time="08:00 AM")
+        other = DeliveryHistory(self.path)
+        try:
+            other.record(contact, SENT)
+        finally:
+            other.close()
+        with patch("morning_greetings.daemon.log_message") as log:
+            send_greeting(contact, history=self.history)
+        log.assert_not_called()
+
+    def test_prune_keeps_contact_aggregates(self):
+        """Old deliveries are deleted, the per-contact totals stay."""
+        self.history.record(self.alice, SENT, at=at(date(2024, 1, 1)))
+        self.history.record(self.alice, SENT, at=at(date(2024, 3, 1)))
+        self.assertEqual(self.history.prune(keep_days=30, today=date(2024, 3, 1)), 1)
+        self.assertEqual(self.history.contact_stats('alice@example.com')['sent'], 2)
+        self.assertEqual(dict(self.history.daily_counts(90, today=date(2024, 3, 1)))["2024-01-01"][SENT], 0)
+
+    def test_unknown_action(self):
+        """Only sent, planned and failed can be recorded."""
+        with self.assertRaises(ValueError):
+            self.history.record(self.alice, "lost")
+
+    def test_daemon_records_and_skips(self):
+        """The daemon records what it sends and skips contacts already greeted today."""
+        contact = dict(self.alice, preferred_time="08:00 AM")
+        with patch("morning_greetings.daemon.log_message") as log:
+            send_greeting(contact, history=self.history)
+            send_greeting(contact, history=self.history)
+        self.assertEqual(log.call_count, 1)
+        self.assertEqual(self.history.contact_stats('alice@example.com')['sent'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,7 @@ import sys
 # Dynamically add the project root directory to sys.path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from morning_greetings.message_generator import generate_message  # Importing the generate_message function from the message_generator module
+from morning_greetings.message_generator import generate_message, RenderCache  # Importing the generate_message function from the message_generator module
 
 class TestMessageGenerator(unittest.TestCase):
     """Unit test class to test the message generation functionality."""
@@ -40,5 +40,66 @@ class TestMessageGenerator(unittest.TestCase):
         # Verify that the generated message matches the expected message when special characters are included
         self.assertEqual(generate_message(name), expected_message)  
 
+class TestRenderCache(unittest.TestCase):
+    """Unit test class to test the render cache."""
+
+    def setUp(self):
+        """Set up a small cache and two contacts."""
+        self.cache = RenderCache(max_entries=2)
+        self.alice = {'name': 'Alice', 'email': 'alice@example.com', 'preferred_time': '08:00 AM'}
+        self.bob = {'name': 'Bob', 'email': 'bob@example.com', 'preferred_time': '08:00 AM'}
+
+    def test_hit_and_miss(self):
+        """Test that the same contact is only rendered once, whatever the day."""
+        self.assertEqual(self.cache.render(self.alice), "Good Morning, Alice! Have a great day!")
+        self.cache.render(self.alice)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.cache.render(dict(self.alice, email="alice@work.com"))  # A new recipient is a new entry
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(len(self.cache), 2)  # One entry per recipient
+
+    def test_stale_entry_misses(self):
+        """Test that an entry is not used once the contact was edited elsewhere, without invalidation."""
+        self.cache.render(self.alice)
+        self.assertEqual(self.cache.render(dict(self.alice, name="Alice B.")), "Good Morning, Alice B.! Have a great day!")
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_changed_field_is_rendered_again(self):
+        """Test that a change to a field used by the template gives a new message."""
+        self.cache.render(self.alice)
+        self.assertEqual(self.cache.render(dict(self.alice, name="Alicia")),
+                         "Good Morning, Alicia! Have a great day!")
+        self.cache.render(dict(self.alice, name="Alicia", preferred_time="09:00 AM"))
+        self.assertEqual(self.cache.hits, 1)  # preferred_time is not used by the template
+
+    def test_invalidate(self):
+        """Test that invalidating one recipient keeps the other entries."""
+        self.cache.render(self.alice)
+        self.cache.render(self.bob)
+        self.cache.invalidate("alice@example.com")
+        self.cache.render(self.bob)
+        self.cache.render(self.alice)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        charlie = {'name': 'Charlie', 'email': 'charlie@example.com'}
+        self.cache.render(self.alice)
+        self.cache.render(self.bob)
+        self.cache.render(self.alice)  # Alice is now the most recently used
+        self.cache.render(charlie)
+        stats = self.cache.stats()
+        self.assertEqual((stats['entries'], stats['evictions']), (2, 1))
+        self.cache.render(self.alice)
+        self.assertEqual(self.cache.hits, 2)  # Alice was kept, Bob was evicted
+
+    def test_memory_cap(self):
+        """Test that the cache stays under its memory cap."""
+        cache = RenderCache(max_bytes=200)
+        for i in range(10):
+            cache.render({'name': f'Friend {i}', 'email': f'friend{i}@example.com'})
+        self.assertLessEqual(cache.bytes, 200)
+        self.assertGreater(cache.evictions, 0)
+
 if __name__ == "__main__":
     unittest.main()  # Run the tests when the script is executed directly
@@ -1,7 +1,8 @@
 import unittest
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 # Dynamically add the project root directory to sys.path for imports.
 # This ensures that the message_sender module can be imported even when
@@ -56,6 +57,22 @@ class TestMessageSender(unittest.TestCase):
         # Assert that the result is "sent", indicating the message was sent immediately since the preferred time has passed.
         self.assertEqual(result, "sent")
 
+    def test_calculate_time_uses_contact_time_zone(self):
+        """Test that the preferred time is compared with the current time in the contact's time zone."""
+        # Freeze the clock at 20:00 UTC, which is 10:00 the next morning in Kiritimati (UTC+14)
+        instant = datetime(2024, 1, 15, 20, 0, tzinfo=timezone.utc)
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return instant.astimezone(tz) if tz else instant.astimezone().replace(tzinfo=None)
+
+        with patch("morning_greetings.message_sender.datetime", FrozenDatetime):
+            kiritimati = {'name': 'Dave', 'email': 'dave@example.com', 'time_zone': 'Pacific/Kiritimati'}
+            self.assertEqual(calculate_time(kiritimati, "Good Morning!", preferred_time="11:00 AM"), "planned")
+            london = {'name': 'Erin', 'email': 'erin@example.com', 'time_zone': 'Europe/London'}
+            self.assertEqual(calculate_time(london, "Good Morning!", preferred_time="11:00 AM"), "sent")
+
     def test_calculate_time_missing_email(self):
         """Test that a ValueError is raised if the email is missing."""
         # Set up a contact dictionary with a missing email.
@@ -0,0 +1,70 @@
+# test_metrics.py
+
+import unittest
+import os
+import sys
+import json
+import tempfile
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.metrics import Histogram, Metrics  # Importing the metrics to test
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        """Set up a fresh metrics registry for each test."""
+        self.metrics = Metrics()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.tmp_dir.cleanup()
+
+    def test_histogram_quantiles(self):
+        """Test that quantiles are estimated from the buckets."""
+        histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+        for _ in range(99):
+            histogram.observe(0.0005)
+        histogram.observe(0.05)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.quantile(0.5), 0.001)
+        self.assertEqual(histogram.quantile(1.0), 0.05)  # Capped at the largest value seen
+        self.assertEqual(histogram.to_dict()['buckets'], {'0.001': 99, '0.01': 99, '0.1': 100, '+Inf': 100})
+
+    def test_counters_and_timer(self):
+        """Test counting and timing stages."""
+        self.metrics.increment("messages_sent")
+        self.metrics.increment("messages_sent", 2)
+        with self.metrics.timer("render"):
+            pass
+        summary = self.metrics.summary()
+        self.assertEqual(summary['counters'], {'messages_sent': 3})
+        self.assertEqual(summary['stages']['render']['count'], 1)
+        self.assertIn("messages_sent: 3", self.metrics.format_summary())
+
+    def test_write_prometheus(self):
+        """Test writing the metrics in the Prometheus text format."""
+        self.metrics.increment("messages_sent")
+        self.metrics.observe("send", 0.002)
+        path = os.path.join(self.tmp_dir.name, "metrics.prom")
+        self.metrics.write(path)
+        with open(path) as file:
+            text = file.read()
+        self.assertIn("morning_greetings_messages_sent_total 1", text)
+        self.assertIn('morning_greetings_stage_seconds_bucket{stage="send",le="+Inf"} 1', text)
+        self.assertIn('morning_greetings_stage_seconds_count{stage="send"} 1', text)
+
+    def test_write_json(self):
+        """Test writing the metrics as JSON."""
+        self.metrics.observe("load", 0.5)
+        path = os.path.join(self.tmp_dir.name, "metrics.json")
+        self.metrics.write(path)
+        with open(path) as file:
+            data = json.load(file)
+        self.assertEqual(data['stages']['load']['count'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()  # Run the tests
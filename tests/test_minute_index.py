@@ -0,0 +1,105 @@
+# test_minute_index.py
+
+import unittest
+import os
+import sys
+import logging
+from datetime import date, datetime, timezone
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings import minute_index  # Importing the module to check whether NumPy is available
+from morning_greetings.minute_index import MinuteIndex, index_for
+from morning_greetings.message_sender import calculate_time
+from morning_greetings.scheduler import Schedule
+from morning_greetings.synthetic import generate_contacts
+
+DAY = date(2024, 1, 15)
+
+class TestMinuteIndexPurePython(unittest.TestCase):
+    """Unit tests for the minute index without NumPy."""
+
+    use_numpy = False
+
+    def setUp(self):
+        self.contacts = generate_contacts(500, seed=2)
+        self.index = MinuteIndex(self.contacts, DAY, use_numpy=self.use_numpy)
+
+    def test_due_matches_schedule(self):
+        """The contacts due at each minute are the ones the daemon's schedule finds."""
+        schedule = Schedule(DAY)
+        for contact in self.contacts:
+            schedule.add(contact)
+        for minute in (0, 5 * 60, 7 * 60, 8 * 60, 8 * 60 + 30, 23 * 60):
+            expected = sorted(contact['email'] for contact in schedule.due(minute))
+            self.assertEqual(sorted(contact['email'] for contact in self.index.due(minute)), expected)
+
+    def test_volume(self):
+        """The volume per minute adds up to all contacts and matches due()."""
+        volume = self.index.volume()
+        self.assertEqual(len(volume), 1440)
+        self.assertEqual(sum(volume), len(self.contacts))
+        self.assertEqual(volume[7 * 60], len(self.index.due(7 * 60)))
+        self.assertEqual(len(self.index.due_between(0, 1440)), len(self.contacts))
+
+    def test_overdue_matches_calculate_time(self):
+        """A contact is overdue exactly when calculate_time would send right away."""
+        now = datetime(2024, 1, 15, 7, 30, 20, tzinfo=timezone.utc)
+        logging.disable(logging.INFO)
+        try:
+            expected = [contact['email'] for contact in self.contacts
+                        if calculate_time(contact, "Hi", contact['preferred_time'], now=now) == "sent"]
+        finally:
+            logging.disable(logging.NOTSET)
+        self.assertEqual([contact['email'] for contact in self.index.overdue(now)], expected)
+
+    def test_empty(self):
+        """An index without contacts answers every question with nothing."""
+        index = MinuteIndex([], DAY, use_numpy=self.use_numpy)
+        self.assertEqual(index.due(480), [])
+        self.assertEqual(index.overdue(datetime(2024, 1, 15, 12, tzinfo=timezone.utc)), [])
+        self.assertEqual(sum(index.volume()), 0)
+
+
+@unittest.skipUnless(minute_index.np is not None, "NumPy is not installed")
+class TestMinuteIndexNumPy(TestMinuteIndexPurePython):
+    """The same tests with NumPy arrays."""
+
+    use_numpy = True
+
+    def test_uses_int16_arrays(self):
+        """Preferred times are kept in compact int16 arrays."""
+        self.assertEqual(str(self.index.local_minutes.dtype), "int16")
+        self.assertEqual(str(self.index.utc_minutes.dtype), "int16")
+
+
+class TestMinuteIndexWithoutNumPy(unittest.TestCase):
+    """Asking for NumPy when it is missing is an error."""
+
+    def test_missing_numpy(self):
+        saved, minute_index.np = minute_index.np, None
+        try:
+            with self.assertRaises(ValueError):
+                MinuteIndex([], DAY, use_numpy=True)
+            self.assertFalse(MinuteIndex([], DAY).use_numpy)
+        finally:
+            minute_index.np = saved
+
+
+class TestIndexFor(unittest.TestCase):
+    """The index of a snapshot is only built again when the snapshot or the day changes."""
+
+    def test_reuse(self):
+        snapshot = tuple(generate_contacts(50, seed=3))
+        index = index_for(snapshot, DAY)
+        self.assertIs(index_for(snapshot, DAY), index)
+        self.assertIsNot(index_for(snapshot, date(2024, 1, 16)), index)
+        changed = snapshot[1:]
+        self.assertEqual(len(index_for(changed, date(2024, 1, 16))), 49)
+        contacts = list(snapshot)
+        self.assertIsNot(index_for(contacts, DAY), index_for(contacts, DAY))  # Lists can change in place
+
+
+if __name__ == "__main__":
+    unittest.main()
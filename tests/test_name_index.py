@@ -0,0 +1,90 @@
+# test_name_index.py
+
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.name_index import NameIndex  # Importing the NameIndex class for testing
+from morning_greetings.contacts import Contacts
+
+def contact(name, email):
+    return {'name': name, 'email': email, 'preferred_time': '08:00 AM'}
+
+class TestNameIndex(unittest.TestCase):
+    """Unit tests for the name search index."""
+
+    def setUp(self):
+        self.john = contact("John Smith", "john@example.com")
+        self.jane = contact("Jane Smithers", "jane@example.com")
+        self.bob = contact("Bob Brown", "bob@example.com")
+        self.index = NameIndex([self.john, self.jane, self.bob])
+
+    def test_exact_ignores_case_and_spaces(self):
+        """Exact lookups ignore case and extra spaces."""
+        self.assertEqual(self.index.exact("  john   SMITH "), [self.john])
+        self.assertEqual(self.index.exact("John"), [])
+
+    def test_prefix(self):
+        """Names starting with the query are found."""
+        self.assertEqual(self.index.search("bo"), [self.bob])
+
+    def test_typo(self):
+        """Misspelled names are found, the closest first."""
+        self.assertEqual(self.index.search("jon smith")[0], self.john)
+
+    def test_no_match(self):
+        """Unrelated names are not offered."""
+        self.assertEqual(self.index.search("Nonexistent"), [])
+
+    def test_add_and_remove_after_search(self):
+        """The search index follows additions and removals once it is built."""
+        self.index.search("bob")
+        alice = contact("Alice Jones", "alice@example.com")
+        self.index.add(alice)
+        self.assertEqual(self.index.search("alice jnes"), [alice])
+        self.index.remove(self.bob)
+        self.assertEqual(self.index.search("bob brown"), [])
+        self.assertEqual(len(self.index), 3)
+
+    def test_homonyms(self):
+        """Contacts sharing a name are all returned, and removing one keeps the other."""
+        other = contact("John Smith", "john.smith@example.org")
+        self.index.add(other)
+        self.assertEqual(self.index.exact("john smith"), [self.john, other])
+        self.index.remove(self.john)
+        self.assertEqual(self.index.search("john smith"), [other])
+
+
+class TestContactsSuggestions(unittest.TestCase):
+    """remove_contact and update_contact offer the closest names."""
+
+    def setUp(self):
+        self.contacts = Contacts()
+        self.contacts.add_contact("John Smith", "john@example.com")
+        self.contacts.add_contact("Bob Brown", "bob@example.com")
+
+    def test_remove_offers_candidates(self):
+        """A misspelled name offers candidates, and the chosen one is removed."""
+        with patch("builtins.input", return_value="1"):
+            self.contacts.remove_contact("jon smith")
+        self.assertEqual([c['name'] for c in self.contacts.get_contacts()], ["Bob Brown"])
+
+    def test_update_offers_candidates(self):
+        """A partial name offers candidates, and the chosen one is updated."""
+        with patch("builtins.input", return_value="1"):
+            self.contacts.update_contact("bob", new_email="bob@example.org", new_preferred_time="09:00 AM")
+        self.assertEqual(self.contacts.get_contacts()[1]['email'], "bob@example.org")
+
+    def test_declined_candidate_keeps_contacts(self):
+        """An invalid choice leaves the contacts unchanged."""
+        with patch("builtins.input", return_value="9"):
+            self.contacts.remove_contact("jon smith")
+        self.assertEqual(len(self.contacts.get_contacts()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
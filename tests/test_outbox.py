@@ -0,0 +1,97 @@
+# test_outbox.py
+
+import unittest
+import os
+import sys
+import tempfile
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.outbox import Outbox  # Importing the outbox to test
+
+
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        """Set up an outbox in a temporary file with a controllable clock."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "outbox.db")
+        self.now = 1000.0
+        self.outbox = Outbox(self.path, max_attempts=3, base_delay=10, lease=60, clock=lambda: self.now)
+        self.alice = {'name': 'Alice', 'email': 'alice@example.com', 'preferred_time': '08:00 AM'}
+        self.bob = {'name': 'Bob', 'email': 'bob@example.com', 'preferred_time': '08:00 AM'}
+
+    def tearDown(self):
+        """Close and remove the outbox."""
+        self.outbox.close()
+        self.tmp_dir.cleanup()
+
+    def test_enqueue_once_per_day(self):
+        """Test that a contact is only queued once per day."""
+        self.assertEqual(self.outbox.enqueue_many([(self.alice, "Hi"), (self.bob, "Hi")], "2024-01-01"), 2)
+        self.assertEqual(self.outbox.enqueue_many([(self.alice, "Hi")], "2024-01-01"), 0)
+        self.assertTrue(self.outbox.enqueue(self.alice, "Hi", "2024-01-02"))
+        self.assertEqual(self.outbox.counts()['pending'], 3)
+
+    def test_process(self):
+        """Test that processed jobs are marked as sent."""
+        self.outbox.enqueue_many([(self.alice, "Hi Alice"), (self.bob, "Hi Bob")], "2024-01-01")
+        sent = []
+        self.assertEqual(self.outbox.process(lambda contact, message: sent.append(message)), (2, 0))
+        self.assertEqual(sent, ["Hi Alice", "Hi Bob"])
+        self.assertEqual(self.outbox.counts()['sent'], 2)
+
+    def test_retry_with_backoff_then_dead_letter(self):
+        """Test that a failing job is retried after 10 s, then 20 s, and then given up."""
+        self.outbox.enqueue(self.alice, "Hi", "2024-01-01")
+
+        def fail(contact, message):
+            raise ValueError("Email address is missing")
+
+        self.assertEqual(self.outbox.process(fail), (0, 1))
+        self.assertEqual(self.outbox.process(fail), (0, 0))  # Not ready yet
+        self.now += 10
+        self.assertEqual(self.outbox.process(fail), (0, 1))
+        self.now += 20
+        self.assertEqual(self.outbox.process(fail), (0, 1))
+        self.assertEqual(self.outbox.counts()['dead'], 1)
+        dead = self.outbox.dead_letters()
+        self.assertEqual(dead[0]['contact']['email'], "alice@example.com")
+        self.assertEqual(dead[0]['attempts'], 3)
+        self.assertEqual(dead[0]['last_error'], "Email address is missing")
+
+    def test_any_exception_fails_the_job(self):
+        """Test that a send raising something else than ValueError fails only that job, up to the dead-letter list."""
+        self.outbox.enqueue_many([(self.alice, "Hi"), (self.bob, "Hi")], "2024-01-01")
+        sent = []
+
+        def send(contact, message):
+            if contact['email'] == "alice@example.com":
+                raise KeyError('preferred_time')  # E.g. a broken contact record
+            sent.append(contact['email'])
+
+        self.assertEqual(self.outbox.process(send), (1, 1))
+        self.assertEqual(sent, ["bob@example.com"])
+        self.assertEqual(self.outbox.counts()['in_flight'], 0)  # Not left claimed until the lease expires
+        for delay in (10, 20):
+            self.now += delay
+            self.outbox.process(send)
+        dead = self.outbox.dead_letters()
+        self.assertEqual([job['contact']['email'] for job in dead], ["alice@example.com"])
+        self.assertEqual(dead[0]['last_error'], "KeyError: 'preferred_time'")
+
+    def test_crashed_claim_is_released(self):
+        """Test that jobs claimed by a process that died are sent by the next run."""
+        self.outbox.enqueue_many([(self.alice, "Hi"), (self.bob, "Hi")], "2024-01-01")
+        self.assertEqual(len(self.outbox.claim(batch_size=1)), 1)  # Claimed, then the process "dies"
+        self.outbox.close()
+
+        self.outbox = Outbox(self.path, lease=60, clock=lambda: self.now)
+        self.assertEqual(self.outbox.process(lambda contact, message: None), (1, 0))  # Lease still running
+        self.now += 61
+        self.assertEqual(self.outbox.process(lambda contact, message: None), (1, 0))
+        self.assertEqual(self.outbox.counts()['sent'], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()  # Run the tests
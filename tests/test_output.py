@@ -0,0 +1,55 @@
+# test_output.py
+
+import unittest
+import io
+import logging
+import os
+import sys
+from contextlib import redirect_stdout
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.contacts import Contacts
+from morning_greetings.output import configure_output, summary  # Importing the output setup to test
+
+
+class TestOutput(unittest.TestCase):
+    def setUp(self):
+        """Remember the package logger's settings so that they can be restored."""
+        self.package_logger = logging.getLogger("morning_greetings")
+        self.saved = (self.package_logger.handlers, self.package_logger.propagate, self.package_logger.level)
+
+    def tearDown(self):
+        """Restore the package logger's settings."""
+        self.package_logger.handlers, self.package_logger.propagate, level = self.saved
+        self.package_logger.setLevel(level)
+
+    def run_contacts(self, quiet):
+        """Add a valid and an invalid contact and log a summary, returning what was printed."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            configure_output(quiet=quiet)
+            contacts = Contacts()
+            contacts.add_contact("Alice", "alice@example.com")
+            contacts.add_contact("Bob", "not-an-email")
+            summary.info("Loaded %d contact(s)", 1)
+        return output.getvalue()
+
+    def test_normal_output(self):
+        """Test that per-contact messages are printed by default."""
+        output = self.run_contacts(quiet=False)
+        self.assertIn("Contact added: Alice with email alice@example.com", output)
+        self.assertIn("Invalid email format: not-an-email", output)
+        self.assertIn("Loaded 1 contact(s)", output)
+
+    def test_quiet_output(self):
+        """Test that quiet mode only prints warnings and summaries."""
+        output = self.run_contacts(quiet=True)
+        self.assertNotIn("Contact added", output)
+        self.assertIn("Invalid email format: not-an-email", output)
+        self.assertIn("Loaded 1 contact(s)", output)
+
+
+if __name__ == "__main__":
+    unittest.main()  # Run the tests
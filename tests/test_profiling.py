@@ -0,0 +1,51 @@
+# test_profiling.py
+
+import unittest
+import os
+import sys
+import tempfile
+import time
+import pstats
+import tracemalloc
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.profiling import profile_call  # Importing the profiler to test
+
+
+def busy_work(n):
+    """Allocate and spend a little time, so that there is something to profile."""
+    data = [str(i) * 10 for i in range(n)]
+    end = time.perf_counter() + 0.05
+    while time.perf_counter() < end:
+        sum(range(1000))
+    return len(data)
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        """Set up a temporary output directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the temporary output directory."""
+        self.tmp_dir.cleanup()
+
+    def test_profile_call(self):
+        """Test that the result is returned and the profile files are written."""
+        with self.assertLogs("morning_greetings.summary", level="INFO") as logs:
+            result = profile_call(busy_work, 1000, output_dir=self.tmp_dir.name, name="busy", sample_interval=0.001)
+        self.assertEqual(result, 1000)
+
+        base = os.path.join(self.tmp_dir.name, "busy")
+        stats = pstats.Stats(f"{base}.prof")
+        self.assertTrue(any(key[2] == "busy_work" for key in stats.stats))  # The function was profiled
+        self.assertTrue(tracemalloc.Snapshot.load(f"{base}.tracemalloc").traces)
+        with open(f"{base}.folded") as file:
+            self.assertIn("busy_work", file.read())  # The stacks were sampled
+        self.assertIn("Top 15 functions", "\n".join(logs.output))
+
+
+if __name__ == "__main__":
+    unittest.main()  # Run the tests
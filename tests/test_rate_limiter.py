@@ -0,0 +1,69 @@
+# test_rate_limiter.py
+
+import unittest
+import os
+import sys
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.rate_limiter import RateLimiter, TokenBucket  # Importing the rate limiter to test
+
+
+class FakeClock:
+    """A clock that only moves when sleep() is called."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        """Set up a fake clock so that the tests do not wait."""
+        self.clock = FakeClock()
+
+    def contacts(self, domain, count):
+        """Create contacts at the given domain."""
+        return [{'name': f'Friend {i}', 'email': f'friend{i}@{domain}'} for i in range(count)]
+
+    def test_token_bucket(self):
+        """Test that a bucket allows a burst, then one token per 1/rate seconds."""
+        bucket = TokenBucket(rate=2, burst=2, clock=self.clock)
+        bucket.take()
+        bucket.take()
+        self.assertAlmostEqual(bucket.wait_time(), 0.5)
+        self.clock.sleep(0.5)
+        self.assertEqual(bucket.wait_time(), 0.0)
+
+    def test_global_rate(self):
+        """Test that sending is spread out at the global rate."""
+        limiter = RateLimiter(rate=10, domain_rate=None, burst=1, clock=self.clock, sleep=self.clock.sleep)
+        sent = list(limiter.throttle(self.contacts("example.com", 50)))
+        self.assertEqual(len(sent), 50)
+        self.assertAlmostEqual(self.clock.now, 4.9)  # 50 messages at 10/s after the first one
+
+    def test_acquire(self):
+        """Test that acquire waits for the domain limit."""
+        limiter = RateLimiter(rate=None, domain_rate=1, clock=self.clock, sleep=self.clock.sleep)
+        limiter.acquire("alice@example.com")
+        limiter.acquire("bob@example.com")
+        self.assertAlmostEqual(self.clock.now, 1.0)
+
+    def test_throttled_domain_does_not_block_others(self):
+        """Test that the contacts of other domains are sent while one domain is throttled."""
+        limiter = RateLimiter(rate=None, domain_rate=1, clock=self.clock, sleep=self.clock.sleep)
+        sent_at = {}
+        for contact in limiter.throttle(self.contacts("big.com", 5) + self.contacts("small.com", 1)):
+            sent_at[contact['email']] = self.clock.now
+        self.assertEqual(sent_at["friend0@small.com"], 0.0)  # Not waiting behind big.com
+        self.assertAlmostEqual(sent_at["friend4@big.com"], 4.0)
+
+
+if __name__ == "__main__":
+    unittest.main()  # Run the tests
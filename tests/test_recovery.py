@@ -0,0 +1,138 @@
+# test_recovery.py
+
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.recovery import backup_log, default_logs, parse_line, recover  # Importing the recovery tool for testing
+from morning_greetings.contacts_manager import ContactsManager
+from morning_greetings.history import DeliveryHistory
+from morning_greetings.outbox import Outbox
+
+def line(day, clock, name, email, preferred_time="08:00 AM"):
+    """A log line as written by log_message."""
+    return f"{day} {clock} - Sent to {name} ({email}) at {preferred_time}: Good Morning, {name}! Have a great day!\n"
+
+class TestParseLine(unittest.TestCase):
+    """Unit tests for the log line parser."""
+
+    def test_log_line(self):
+        """A log line gives its day, time, name, email and preferred time."""
+        day, at, name, email, preferred_time = parse_line(
+            line("2024-01-31", "08:00:00.123456", "Alice", "alice@example.com").encode())
+        self.assertEqual((day, name, email, preferred_time), ("2024-01-31", "Alice", "alice@example.com", "08:00 AM"))
+        self.assertAlmostEqual(at % 1, 0.123456, places=5)
+
+    def test_missing_preferred_time(self):
+        """N/A (the send loop's log lines) means no preferred time."""
+        self.assertIsNone(parse_line(line("2024-01-31", "08:00:00", "Alice", "alice@example.com", "N/A").encode())[4])
+
+    def test_name_with_parentheses(self):
+        """Parentheses in the name do not confuse the email."""
+        parsed = parse_line(line("2024-01-31", "08:00:00", "Bob (work)", "bob@example.com").encode())
+        self.assertEqual(parsed[2:4], ("Bob (work)", "bob@example.com"))
+
+    def test_damaged_lines(self):
+        """Lines that are not log entries are rejected."""
+        for damaged in (b"", b"garbage\n", b"2024-01-31 08:00:0", line("2024-13-45", "08:00:00", "A", "a@b.c").encode(),
+                        b"2024-01-31 08:00:00 - Sent to Alice (no email) at 08:00 AM: Hi\n"):
+            self.assertIsNone(parse_line(damaged), damaged)
+
+class TestRecovery(unittest.TestCase):
+    """Unit tests for rebuilding the delivery state from the logs."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.sent_log = os.path.join(self.tmp_dir.name, "sent_messages_log.txt")
+        self.planned_log = os.path.join(self.tmp_dir.name, "planned_messages_log.txt")
+        with open(self.sent_log, "w") as file:
+            for day in ("2024-01-01", "2024-01-02", "2024-01-03"):
+                file.write(line(day, "08:00:00.5", "Alice", "alice@example.com"))
+                file.write(line(day, "09:00:00", "Bob", "bob@example.com", "N/A"))
+            file.write("torn line without a newline")
+        with open(self.planned_log, "w") as file:
+            file.write(line("2024-01-03", "06:00:00", "Carol", "carol@example.com", "10:00 AM"))
+            file.write("\x00\x00 damaged \xff\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_totals(self):
+        """Every contact gets its totals, last greeted day and latest preferred time."""
+        state = recover([self.sent_log, self.planned_log], outbox=None, workers=1)
+        self.assertEqual((state.lines, state.skipped), (9, 2))
+        alice = state.stats['alice@example.com']
+        self.assertEqual((alice['sent'], alice['first_day'], alice['last_sent_day']), (3, "2024-01-01", "2024-01-03"))
+        self.assertEqual(state.stats['carol@example.com']['last_action'], "planned")
+        self.assertIsNone(state.stats['carol@example.com']['last_sent_day'])
+        self.assertEqual(state.daily[("2024-01-02", "sent")], 2)
+        contacts = {contact['email']: contact for contact in state.recovered_contacts()}
+        self.assertEqual(contacts['carol@example.com']['preferred_time'], "10:00 AM")
+        self.assertEqual(contacts['bob@example.com']['preferred_time'], "08:00 AM")  # Never logged
+
+    def test_chunks_and_workers(self):
+        """Splitting the logs into small ranges, in several processes, gives the same result."""
+        whole = recover([self.sent_log, self.planned_log], outbox=None, workers=1)
+        for workers in (1, 2):
+            split = recover([self.sent_log, self.planned_log], outbox=None, workers=workers, chunk_size=37)
+            self.assertEqual((split.stats, split.daily, split.lines, split.skipped),
+                             (whole.stats, whole.daily, whole.lines, whole.skipped))
+
+    def test_outbox(self):
+        """The outbox gives complete contact records and the failed messages."""
+        path = os.path.join(self.tmp_dir.name, "outbox.db")
+        outbox = Outbox(path, max_attempts=1)
+        outbox.enqueue({'name': 'Dave', 'email': 'dave@example.com', 'preferred_time': '07:00 AM',
+                        'time_zone': 'Europe/Oslo'}, "Hi", "2024-01-03")
+        for job in outbox.claim():
+            outbox.fail(job['id'], "no route")
+        outbox.close()
+        state = recover([self.sent_log], outbox=path, workers=1)
+        self.assertEqual(state.stats['dave@example.com']['failed'], 1)
+        self.assertEqual(state.daily[("2024-01-03", "failed")], 1)
+        dave = [contact for contact in state.recovered_contacts() if contact['email'] == 'dave@example.com']
+        self.assertEqual(dave[0]['time_zone'], 'Europe/Oslo')
+
+    def test_restore_history(self):
+        """The recovered totals replace the delivery history."""
+        history = DeliveryHistory(os.path.join(self.tmp_dir.name, "history.db"))
+        try:
+            self.assertTrue(history.is_empty())
+            history.record({'name': 'Old', 'email': 'old@example.com'}, "sent")
+            self.assertFalse(history.is_empty())
+            state = recover([self.sent_log, self.planned_log], outbox=None, workers=1)
+            self.assertEqual(history.restore(state.stats.values(),
+                                             ((day, action, count) for (day, action), count in state.daily.items())), 3)
+            self.assertIsNone(history.contact_stats('old@example.com'))
+            self.assertTrue(history.already_sent('alice@example.com', date(2024, 1, 3)))
+            self.assertEqual(dict(history.daily_counts(1, today=date(2024, 1, 3)))["2024-01-03"],
+                             {'sent': 2, 'planned': 1, 'failed': 0})
+        finally:
+            history.close()
+
+    def test_restore_contacts(self):
+        """Only the contacts missing from contacts.json are added."""
+        manager = ContactsManager(data_file=os.path.join(self.tmp_dir.name, "contacts.json"))
+        manager.add_contact("Alice", "alice@example.com", "09:00 AM")
+        state = recover([self.sent_log, self.planned_log], outbox=None, workers=1)
+        self.assertEqual(manager.restore_contacts(state.recovered_contacts()), 2)
+        contacts = {contact['email']: contact for contact in manager.get_contacts()}
+        self.assertEqual(sorted(contacts), ['alice@example.com', 'bob@example.com', 'carol@example.com'])
+        self.assertEqual(contacts['alice@example.com']['preferred_time'], "09:00 AM")
+
+    def test_backup_log(self):
+        """Clearing a log keeps its messages in a backup the recovery finds."""
+        backup = backup_log(self.sent_log)
+        self.assertEqual(os.path.getsize(self.sent_log), 0)
+        self.assertIn(backup, default_logs(self.tmp_dir.name))
+        self.assertEqual(recover([backup], outbox=None, workers=1).stats['alice@example.com']['sent'], 3)
+        self.assertIsNone(backup_log(self.sent_log))  # Nothing to back up
+
+
+if __name__ == "__main__":
+    unittest.main()
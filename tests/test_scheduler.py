@@ -0,0 +1,87 @@
+# test_scheduler.py
+
+import unittest
+import os
+import sys
+from datetime import date
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.scheduler import Schedule, minute_of_day, utc_offset_minutes  # Importing the schedule to test
+
+
+class TestSchedule(unittest.TestCase):
+    def setUp(self):
+        """Set up a schedule with two contacts."""
+        self.alice = {'name': 'Alice', 'email': 'alice@example.com', 'preferred_time': '08:00 AM'}
+        self.bob = {'name': 'Bob', 'email': 'bob@example.com', 'preferred_time': '06:30 PM'}
+        self.schedule = Schedule()
+        self.schedule.sync([self.alice, self.bob])
+        # Contacts without a time zone use the local time zone
+        self.local_offset = utc_offset_minutes(None, self.schedule.day)
+
+    def test_minute_of_day(self):
+        """Test converting preferred times to minutes since midnight."""
+        self.assertEqual(minute_of_day("12:00 AM"), 0)
+        self.assertEqual(minute_of_day("08:00 AM"), 480)
+        self.assertEqual(minute_of_day("06:30 PM"), 1110)
+
+    def utc(self, minute):
+        """Convert a local minute of the day to the UTC minute of the day."""
+        return (minute - self.local_offset) % 1440
+
+    def test_due(self):
+        """Test that contacts are found in the bucket of their preferred time."""
+        self.assertEqual(self.schedule.due(self.utc(480)), [self.alice])
+        self.assertEqual(self.schedule.due(self.utc(1110)), [self.bob])
+        self.assertEqual(self.schedule.due(self.utc(481)), [])
+
+    def test_sync_applies_only_changes(self):
+        """Test that sync adds, moves and removes only the contacts that changed."""
+        moved_alice = dict(self.alice, preferred_time='09:00 AM')
+        charlie = {'name': 'Charlie', 'email': 'charlie@example.com', 'preferred_time': '08:00 AM'}
+        self.assertEqual(self.schedule.sync([moved_alice, charlie]), (1, 1, 1))
+        self.assertEqual(self.schedule.due(self.utc(480)), [charlie])
+        self.assertEqual(self.schedule.due(self.utc(540)), [moved_alice])
+        self.assertEqual(self.schedule.due(self.utc(1110)), [])
+        self.assertEqual(len(self.schedule), 2)
+
+    def test_sync_same_snapshot(self):
+        """Test that syncing the same snapshot twice does nothing."""
+        snapshot = (self.alice,)
+        self.schedule.sync(snapshot)
+        self.assertEqual(self.schedule.sync(snapshot), (0, 0, 0))
+
+
+class TestScheduleTimeZones(unittest.TestCase):
+    def setUp(self):
+        """Set up a winter schedule with contacts in Oslo and New York."""
+        self.oslo = [{'name': f'Oslo {i}', 'email': f'oslo{i}@example.com',
+                      'preferred_time': '08:00 AM', 'time_zone': 'Europe/Oslo'} for i in range(3)]
+        self.new_york = {'name': 'New York', 'email': 'ny@example.com',
+                         'preferred_time': '08:00 AM', 'time_zone': 'America/New_York'}
+        self.schedule = Schedule(day=date(2024, 1, 15))
+        self.schedule.sync(self.oslo + [self.new_york])
+
+    def test_utc_offset_minutes(self):
+        """Test the UTC offset of a time zone in winter and in summer."""
+        self.assertEqual(utc_offset_minutes('Europe/Oslo', date(2024, 1, 15)), 60)
+        self.assertEqual(utc_offset_minutes('Europe/Oslo', date(2024, 7, 15)), 120)
+
+    def test_bucketed_by_utc_minute(self):
+        """Test that 08:00 AM is due at a different UTC minute in each time zone."""
+        self.assertEqual(self.schedule.due(7 * 60), self.oslo)  # 08:00 in Oslo is 07:00 UTC
+        self.assertEqual(self.schedule.due(13 * 60), [self.new_york])  # 08:00 in New York is 13:00 UTC
+        self.assertEqual(len(self.schedule.buckets), 2)  # One group per (time zone, time) pair
+
+    def test_set_day_moves_groups(self):
+        """Test that changing day applies daylight saving time to every group."""
+        self.schedule.set_day(date(2024, 7, 15))
+        self.assertEqual(self.schedule.due(6 * 60), self.oslo)
+        self.assertEqual(self.schedule.due(12 * 60), [self.new_york])
+        self.assertEqual(self.schedule.due(7 * 60), [])
+
+
+if __name__ == "__main__":
+    unittest.main()  # Run the tests
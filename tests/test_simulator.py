@@ -0,0 +1,80 @@
+# test_simulator.py
+
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timezone
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.simulator import SimulatedClock, simulate_day  # Importing the simulator for testing
+from morning_greetings.synthetic import generate_contacts
+from morning_greetings.message_sender import calculate_time, send_message
+
+def contact(i, preferred_time, domain="example.com", time_zone='UTC'):
+    return {'name': f"Contact {i}", 'email': f"contact{i}@{domain}", 'preferred_time': preferred_time,
+            'time_zone': time_zone}
+
+class TestSimulatedClock(unittest.TestCase):
+    """Unit tests for the simulated clock."""
+
+    def test_sleep_moves_time_forward(self):
+        """Sleeping advances the simulated time immediately."""
+        clock = SimulatedClock(datetime(2024, 1, 1, tzinfo=timezone.utc))
+        clock.sleep(90)
+        self.assertEqual(clock.now(), datetime(2024, 1, 1, 0, 1, 30, tzinfo=timezone.utc))
+        clock.advance_to(0)  # Never goes backwards
+        self.assertEqual(clock.now(), datetime(2024, 1, 1, 0, 1, 30, tzinfo=timezone.utc))
+
+    def test_injected_clock_in_message_sender(self):
+        """calculate_time and send_message use the injected time and sleep."""
+        now = datetime(2024, 1, 15, 7, 0, tzinfo=timezone.utc)
+        person = contact(1, "08:00 AM", time_zone='Europe/Oslo')  # 08:00 in Oslo is 07:00 UTC in winter
+        self.assertEqual(calculate_time(person, "Hi", preferred_time="08:30 AM", now=now), "planned")
+        self.assertEqual(calculate_time(person, "Hi", preferred_time="07:30 AM", now=now), "sent")
+        clock = SimulatedClock(now)
+        send_message(5, sleep=clock.sleep)
+        self.assertEqual(clock.time(), now.timestamp() + 5)
+
+
+class TestSimulateDay(unittest.TestCase):
+    """Unit tests for the day simulation."""
+
+    def test_everyone_is_sent_in_their_minute(self):
+        """Without limits, each contact is sent within its due minute."""
+        contacts = [contact(i, "08:00 AM") for i in range(30)] + [contact(30, "09:15 AM")]
+        result = simulate_day(contacts, date(2024, 1, 15), rate=0, domain_rate=0)
+        self.assertEqual(result.due[8 * 60], 30)
+        self.assertEqual(result.sent[8 * 60], 30)
+        self.assertEqual(result.sent[9 * 60 + 15], 1)
+        self.assertEqual(sum(result.sent), 31)
+        self.assertLess(result.lag.max, 60)
+        self.assertEqual(result.peak_minutes(1), [(8 * 60, 30)])
+
+    def test_rate_limit_creates_backlog(self):
+        """A peak larger than the rate allows spills into the next minutes."""
+        contacts = [contact(i, "08:00 AM", domain=f"d{i % 10}.com") for i in range(120)]
+        result = simulate_day(contacts, date(2024, 1, 15), rate=1, domain_rate=0)
+        self.assertEqual(sum(result.sent), 120)
+        self.assertLess(result.sent[8 * 60], 120)
+        self.assertGreater(result.lag.max, 60)
+        self.assertEqual(len(result.outcomes), 120)
+
+    def test_output_files(self):
+        """The per-minute histogram and the outcome log are written as CSV."""
+        result = simulate_day(generate_contacts(50, seed=1), date(2024, 1, 15), rate=0, domain_rate=0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            histogram_file = os.path.join(tmp_dir, "histogram.csv")
+            outcome_file = os.path.join(tmp_dir, "outcomes.csv")
+            result.write_histogram(histogram_file)
+            result.write_outcomes(outcome_file)
+            with open(histogram_file) as file:
+                self.assertEqual(len(file.readlines()), 1441)
+            with open(outcome_file) as file:
+                self.assertEqual(len(file.readlines()), 51)
+
+
+if __name__ == "__main__":
+    unittest.main()
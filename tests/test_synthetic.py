@@ -0,0 +1,84 @@
+# test_synthetic.py
+
+import unittest
+import os
+import sys
+import time
+from collections import Counter
+from unittest.mock import patch
+
+# Dynamically add the project root directory to sys.path for imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from morning_greetings.synthetic import generate_contacts  # Importing the generator for testing
+from morning_greetings.load_test import FakeTransport, LoadTest, STAGES, peak_rss
+from morning_greetings.contacts import Contacts
+from morning_greetings.message_sender import calculate_time
+
+class TestGenerateContacts(unittest.TestCase):
+    """Unit tests for the synthetic contact generator."""
+
+    def setUp(self):
+        self.contacts = generate_contacts(2000, seed=7)
+
+    def test_reproducible(self):
+        """The same seed gives the same contacts, another seed different ones."""
+        self.assertEqual(generate_contacts(100, seed=7), self.contacts[:100])
+        self.assertNotEqual(generate_contacts(100, seed=8), self.contacts[:100])
+
+    def test_contacts_are_valid_and_unique(self):
+        """Every generated contact passes the validation of Contacts.add_contact."""
+        contacts = Contacts()
+        for contact in self.contacts:
+            contacts.add_contact(contact['name'], contact['email'], contact['preferred_time'], contact.get('time_zone'))
+        self.assertEqual(len(contacts.get_contacts()), len(self.contacts))
+
+    def test_distributions_are_skewed(self):
+        """The default time and the biggest provider hold the largest shares."""
+        times = Counter(contact['preferred_time'] for contact in self.contacts)
+        self.assertEqual(times.most_common(1)[0][0], "08:00 AM")
+        self.assertGreater(times["08:00 AM"], len(self.contacts) * 0.35)
+        domains = Counter(contact['email'].rsplit('@', 1)[1] for contact in self.contacts)
+        self.assertEqual(domains.most_common(1)[0][0], "gmail.com")
+
+
+class TestLoadTest(unittest.TestCase):
+    """Unit tests for the load-test harness."""
+
+    def test_runs_every_stage(self):
+        """Every stage is measured and every message reaches the fake transport."""
+        transport = FakeTransport()
+        load_test = LoadTest(300, seed=1, transport=transport)
+        results = load_test.run()
+        self.assertEqual(set(results), set(STAGES))
+        self.assertEqual(transport.sent, 300)
+        report = load_test.to_dict()
+        self.assertGreater(report['stages']['render']['contacts_per_second'], 0)
+        self.assertGreater(report['stages']['log']['peak_rss_bytes'], 0)
+        self.assertIsNone(report['stages']['load']['p50_seconds'])  # Loading is one operation
+        self.assertIn("render", load_test.format_report())
+
+    def test_stages_are_not_nested(self):
+        """Each stage only counts its own time: slow scheduling is not counted as "send" too."""
+        def slow_calculate_time(*args):
+            time.sleep(0.01)
+            return calculate_time(*args)
+
+        load_test = LoadTest(20, seed=1)
+        with patch('morning_greetings.main.calculate_time', slow_calculate_time):
+            results = load_test.run()
+        self.assertGreaterEqual(results['schedule'][0], 0.2)
+        self.assertLess(results['send'][0], 0.1)
+
+    def test_no_resource_module(self):
+        """Without the Unix-only resource module the peak memory is unknown, not an error."""
+        with patch.dict(sys.modules, {'resource': None}):
+            self.assertIsNone(peak_rss())
+            load_test = LoadTest(20, seed=1)
+            load_test.run()
+        self.assertIsNone(load_test.to_dict()['stages']['send']['peak_rss_bytes'])
+        self.assertIn("send", load_test.format_report())
+
+
+if __name__ == "__main__":
+    unittest.main()